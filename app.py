@@ -1,45 +1,63 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os, time, random, base64
+import os, io, time, random, base64, html, functools
 from datetime import datetime, timedelta
-from sklearn.ensemble import IsolationForest
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
+from rollups import build_daily_rollup, ALL_STATES
+from llm_runner import ExplanationRunner, ChatStream
+from explain_cache import ExplanationCache
+from enrichment import EnrichmentQueue
+from chat_context import ChatContextBuilder
+from query_engine import answer_question
+from rate_limit import limits
+from case_grid import case_grid_html, grid_height
+from exporter import export_frauds, available_formats, discard, iter_frauds
+from dossier import DossierService, dossier_available, index_groups, collect_groups
+from run_metrics import RunMetrics, FULL_SCRIPT
+from pipeline_jobs import JobRunner
+from session_store import open_store, new_session_id
+from snapshot import ResultSnapshot, code_version, file_fingerprint, SNAPSHOT_ON
+from upload_batch import read_files, dedupe_keys, file_summaries
+
+_script_t0 = time.perf_counter()
+
 load_dotenv()
 
-try:
-    from openai import OpenAI as _OpenAI
-    _openai_available = True
-    _ai_client = _OpenAI(api_key=os.getenv("OPENAI_API_KEY")) if os.getenv("OPENAI_API_KEY") else None
-except ImportError:
-    _openai_available = False
-    _ai_client = None
+# The OpenAI SDK (~0.5s to import) is loaded on first use by chat / enrichment,
+# so the login page never pays for it. See tools/profile_startup.py.
+AI_CONFIGURED = bool(os.getenv("OPENAI_API_KEY"))
+
+@st.cache_resource
+def get_ai_client():
+    if not AI_CONFIGURED:
+        return None
+    try:
+        from openai import OpenAI
+    except ImportError:
+        return None
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # ============================================================
-#  FORENSIC RATE LIMITER (Streamlit Implementation)
+#  FORENSIC RATE LIMITER (process-wide token buckets, see rate_limit.py)
 # ============================================================
 class RateLimiter:
     def __init__(self):
-        if "rate_limit_data" not in st.session_state:
-            st.session_state.rate_limit_data = {}
+        if "rate_limit_key" not in st.session_state:
+            st.session_state.rate_limit_key = os.urandom(8).hex()
+
+    def _key(self):
+        # Per signed-in user (shared across their tabs), else per browser session
+        return st.session_state.get("uid") or st.session_state.rate_limit_key
 
     def is_allowed(self, endpoint, limit, period=60):
         """Checks if a request is allowed for a specific endpoint."""
-        now = time.time()
-        if endpoint not in st.session_state.rate_limit_data:
-            st.session_state.rate_limit_data[endpoint] = []
-        
-        # Clear old requests
-        st.session_state.rate_limit_data[endpoint] = [
-            t for t in st.session_state.rate_limit_data[endpoint] if now - t < period
-        ]
-        
-        if len(st.session_state.rate_limit_data[endpoint]) >= limit:
-            return False
-        
-        st.session_state.rate_limit_data[endpoint].append(now)
-        return True
+        name = f"ui:{endpoint}"
+        if name not in limits:
+            limits.configure(name, rpm=10 ** 6, user_rpm=limit * 60 / period, user_burst=limit)
+        return limits.try_acquire(name, user=self._key())
 
     def show_error(self):
         st.error("🚫 Too many requests!")
@@ -369,26 +387,75 @@ div[data-baseweb="tab-highlight"] {
 </style>
 """, unsafe_allow_html=True)
 
-# ── Supabase (graceful if not configured yet) ───────────────
+# ── Database backend (Supabase by default, SQLite via DB_BACKEND=sqlite) ──
 try:
-    import supabase_db as sb
+    import storage
+    sb = storage.load_backend()
     _supabase_ready = sb.is_configured()
-except Exception:
+except Exception as e:
+    print(f"[Storage] Backend unavailable: {e}")
     _supabase_ready = False
     sb = None
 
-# ── Global Session Cache ─────────────────────────────────────
+# ── Login sessions behind the ?s= link (TTL + LRU bounded, see session_store.py) ──
 @st.cache_resource
-def get_session_cache():
-    return {}
+def get_session_store():
+    return open_store()
 
-_global_sessions = get_session_cache()
+_session_store = get_session_store()
+
+# ── Background AI Enrichment (optional) ──────────────────────
+# Replaces the template AI_Justification of flagged claims with model-written
+# text after upload, without blocking the page. Disable with AI_ENRICHMENT=0.
+@st.cache_resource
+def get_enrichment_queue(_backend):
+    runner = ExplanationRunner.from_env(get_ai_client(), concurrency=int(os.getenv("AI_ENRICH_CONCURRENCY", "4")))
+    return EnrichmentQueue(runner, _backend, ExplanationCache())
+
+def get_enricher():
+    """The shared enrichment queue, or None when AI or storage is not configured."""
+    if not (AI_CONFIGURED and _supabase_ready and os.getenv("AI_ENRICHMENT", "1") != "0"):
+        return None
+    return get_enrichment_queue(sb) if get_ai_client() else None
+
+# ── PDF Audit Dossiers (rendered in a worker pool, cached by content hash) ──
+@st.cache_resource
+def get_dossier_service():
+    return DossierService()
+
+# ── Chat Context (compact queue summary, rebuilt only when detected_frauds changes) ──
+@st.cache_resource
+def get_chat_context(_backend):
+    return ChatContextBuilder(_backend)
+
+# ── Rerun cost per region (full script vs. single fragment), shown in Settings ──
+@st.cache_resource
+def get_run_metrics():
+    return RunMetrics()
+
+# ── Background pipeline jobs (CSV uploads), polled by the Home page ──
+@st.cache_resource
+def get_job_runner():
+    return JobRunner(max_workers=int(os.getenv("PIPELINE_WORKERS", "2")))
+
+run_metrics = get_run_metrics()
+
+def timed_fragment(region, run_every=None):
+    """st.fragment whose runs are timed under `region`: interactions inside it
+    rerun only this function, not the session / sidebar / data-loading code."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with run_metrics.timed(region):
+                return fn(*args, **kwargs)
+        return st.fragment(timed, run_every=run_every)
+    return decorate
 
 # ============================================================
 #  SESSION STATE INITIALIZATION
 # ============================================================
 for k, v in [("page","Account"),("contamination",.12),("n_estimators",200),
-              ("df",None),("cost_col",None),("chat_open",False),("chat_history",[]),
+              ("df",None),("cost_col",None),("chat_open",False),("chat_history",[]),("chat_metrics",{}),
               ("user",None),("uid",None),("auth_mode","login")]:
     if k not in st.session_state: st.session_state[k] = v
 
@@ -396,10 +463,10 @@ for k, v in [("page","Account"),("contamination",.12),("n_estimators",200),
 if st.session_state.user is None:
     # 1. Try URL parameters first
     sid = st.query_params.get("s")
-    if sid and sid in _global_sessions:
-        cached = _global_sessions[sid]
-        st.session_state.user = cached.get("user")
-        st.session_state.uid = cached.get("uid")
+    cached = _session_store.get(sid) if sid else None
+    if cached:
+        st.session_state.user = SimpleNamespace(id=cached["uid"], email=cached.get("email", ""))
+        st.session_state.uid = cached["uid"]
         # Don't overwrite the page if it was explicitly set, but default to Dashboard if recovering
         if st.session_state.page == "Account":
             st.session_state.page = "Home"
@@ -415,6 +482,9 @@ if st.session_state.user is None:
         except:
             pass
 
+# Shared OpenAI / Supabase buckets charge this session's calls to its user
+limits.set_user(st.session_state.uid)
+
 # --- VALIDATE PAGE ---
 if st.session_state.user is None:
     st.session_state.page = "Account"
@@ -424,8 +494,9 @@ elif st.session_state.page not in ["Home", "Report", "Account", "Settings", "Cha
 # ============================================================
 #  PIPELINE (CACHED FOR SPEED)
 # ============================================================
-@st.cache_data(show_spinner=False)
-def run_pipeline(df, contamination, n_estimators):
+def score_claims(df, contamination, n_estimators):
+    """Feature engineering, rules, IsolationForest and explanations; modifies df in place.
+    Returns (scored df, cost column, fitted forest)."""
     cost_col = ("Final_Billed_Amount" if "Final_Billed_Amount" in df.columns else
                 "TreatmentCost"       if "TreatmentCost"       in df.columns else None)
     for col in ["Admission_Timestamp","Discharge_Timestamp","PreAuth_Request_Date","PreAuth_Approval_Date"]:
@@ -454,6 +525,7 @@ def run_pipeline(df, contamination, n_estimators):
 
     fcols = [c for c in [cost_col,"LOS","Cost_to_Package","PreAuth_Delay","Hospital_Avg_Cost","Patient_Claim_Count","Age"] if c and c in df.columns]
     # 🔥 Use all available cores for isolation forest training
+    from sklearn.ensemble import IsolationForest      # ~1.5s import, only needed once data is scored
     iso = IsolationForest(contamination=contamination, n_estimators=n_estimators, random_state=42, n_jobs=-1)
     df["ML_Anomaly"] = iso.fit_predict(df[fcols].fillna(0))
 
@@ -510,9 +582,161 @@ def run_pipeline(df, contamination, n_estimators):
     fraud_mask = df["Fraud_Flag"] == 1
     if fraud_mask.any():
         df.loc[fraud_mask, "AI_Justification"] = df[fraud_mask].apply(smart_just, axis=1)
-    
+
+    return df, cost_col, iso
+
+@st.cache_data(show_spinner=False)
+def run_pipeline(df, contamination, n_estimators):
+    df, cost_col, _ = score_claims(df, contamination, n_estimators)
     return df, cost_col
 
+# ── Warm restart: scored claims + model on disk, reused while the source is unchanged ──
+PIPELINE_VERSION = code_version(score_claims)
+
+@st.cache_resource
+def get_snapshots():
+    return ResultSnapshot()
+
+def snapshot_scored(scope, fingerprint, fetch, contamination, n_estimators):
+    """(df, cost_col) from the snapshot of `scope` if fingerprint() still matches
+    the source; otherwise fetch(), score and replace the snapshot. (None, None) if empty.
+    When fingerprint() fails the source is unreachable: serve the last snapshot as is."""
+    if not SNAPSHOT_ON:
+        raw = fetch()
+        return run_pipeline(raw, contamination, n_estimators) if not raw.empty else (None, None)
+    snaps = get_snapshots()
+    key   = snaps.key(scope, {"contamination": contamination, "n_estimators": n_estimators,
+                              "pipeline": PIPELINE_VERSION})
+    try:
+        current = fingerprint()
+    except Exception as e:
+        print(f"[Snapshot] {scope}: source fingerprint unavailable ({e}); using the last snapshot")
+        hit = snaps.load_latest(key)
+        if hit is not None:
+            return hit["df"], hit["cost_col"]
+        raw = fetch()                       # may still come from the last-good cache or the mirror
+        return run_pipeline(raw, contamination, n_estimators) if not raw.empty else (None, None)
+    hit = snaps.load(key, current)
+    if hit is not None:
+        return hit["df"], hit["cost_col"]
+    raw = fetch()
+    if raw.empty:
+        return None, None
+    df, cost_col, model = score_claims(raw, contamination, n_estimators)
+    snaps.save(key, current, df, cost_col, model, scope=scope)
+    return df, cost_col
+
+def scored_cloud_claims(uid, contamination, n_estimators):
+    return snapshot_scored(f"cloud:{uid}", lambda: sb.claims_fingerprint(user_id=uid),
+                           lambda: sb.fetch_data_from_supabase(user_id=uid), contamination, n_estimators)
+
+
+# ── Upload pipeline (runs as a background job, see pipeline_jobs.py) ──
+UPLOAD_STAGES = [
+    ("parse",   "📂 Reading files…",                      5),
+    ("score",   "🔍 Scoring claims…",                    35),
+    ("claims",  "☁️ Syncing claims…",                    20),
+    ("results", "💾 Saving fraud results…",              10),
+    ("frauds",  "🚩 Saving detected frauds…",            10),
+    ("log",     "🧾 Logging upload sessions…",            5),
+    ("refresh", "📊 Refreshing dashboard data…",         15),
+]
+UPLOAD_POLL_S = float(os.getenv("UPLOAD_POLL_S", "1"))
+
+def upload_job(job, files, uid, contamination, n_estimators, chat_ctx=None, enricher=None):
+    """Score the uploaded CSVs ([(name, bytes)]) as one batch and write them through
+    every storage phase once. Runs off the script thread, so everything it needs is passed in."""
+    limits.set_user(uid)                      # charge this job's Supabase calls to its user
+    job.stage("parse", f"📂 Reading {len(files)} file{'s' if len(files) != 1 else ''}…")
+    batch = read_files(files)
+    raw   = batch.frame
+    label = batch.names[0] if len(batch.names) == 1 else f"{len(batch.names)} files"
+
+    job.stage("score", f"🔍 Scoring {len(raw):,} claims…")
+    result_df, cc = run_pipeline(raw.copy(), contamination, n_estimators)
+    fraud_up = result_df[result_df["Fraud_Flag"]==1]
+    susp_up  = fraud_up[cc].sum() if cc else 0
+    new_keys = None
+
+    if _supabase_ready:
+        job.stage("claims", f"☁️ Syncing {len(raw):,} claims…")
+        upload_res = sb.insert_new_rows_only(dedupe_keys(raw), conflict_col="PatientID", user_id=uid)
+        job.stage("results")
+        persisted = dedupe_keys(result_df)
+        sb.save_fraud_results_to_supabase(persisted, user_id=uid)
+
+        # Daily trend rollup: count only the claims that were actually new
+        if not upload_res.get("error"):
+            new_keys   = upload_res.get("new_keys", [])
+            new_claims = (persisted[persisted["PatientID"].astype(str).isin(new_keys)]
+                          if "PatientID" in persisted.columns else persisted)
+            sb.bump_daily_rollup(build_daily_rollup(new_claims, cc, uid=uid))
+
+        # 🔥 STEP 1 & 2: EXTRACT ONLY FRAUDS & UPSERT TO detected_frauds
+        job.stage("frauds", f"🚩 Saving {len(fraud_up):,} detected frauds…")
+        fraud_only = dedupe_keys(fraud_up).copy()
+        if not fraud_only.empty:
+            # Map columns to match detected_frauds table schema
+            if cc and cc != "Final_Billed_Amount":
+                fraud_only["Final_Billed_Amount"] = fraud_only[cc]
+            if "Primary_Diagnosis" not in fraud_only.columns and "Disease" in fraud_only.columns:
+                fraud_only["Primary_Diagnosis"] = fraud_only["Disease"]
+
+            sb.upsert_detected_frauds(fraud_only, user_id=uid)
+            if chat_ctx is not None:
+                chat_ctx.index_frauds(uid, fraud_only)
+            if enricher is not None:
+                enricher.submit(fraud_only, uid)
+
+    # One upload_sessions record per file, one combined audit entry
+    summaries = file_summaries(batch, result_df, cc, new_keys)
+    if _supabase_ready:
+        job.stage("log")
+        for f in summaries:
+            sb.log_upload_session(
+                uid=uid,
+                filename=f["file"],
+                total_rows=f["rows"],
+                new_rows=f["new"],
+                skipped_rows=f["skipped"],
+                fraud_detected=f["flagged"],
+                suspicious_amt=f["suspicious"]
+            )
+        sb.upsert_audit_log(
+            uid=uid,
+            action="Batch Analysis",
+            description=(f"Processed {len(result_df)} rows from {', '.join(batch.names)}. "
+                         f"Detected {len(fraud_up)} frauds."),
+            amount=susp_up
+        )
+
+    # Dashboard data: the user's full database if connected, else just this file
+    job.stage("refresh")
+    df, cost_col = result_df, cc
+    if _supabase_ready and uid:
+        try:
+            if hasattr(sb.fetch_data_from_supabase, "clear"):
+                sb.fetch_data_from_supabase.clear()          # the claims just changed
+            cloud_df, cloud_cc = scored_cloud_claims(uid, contamination, n_estimators)
+            if cloud_df is not None:
+                df, cost_col = cloud_df, cloud_cc
+        except Exception as e:
+            print(f"[Upload] refresh failed, showing the uploaded file only: {e}")
+    return {"result_df": result_df, "cc": cc, "df": df, "cost_col": cost_col,
+            "label": label, "files": summaries, "errors": batch.errors}
+
+def collect_upload(job):
+    """Move a finished upload's frames into this session once (the shared runner keeps
+    only its status) and return what the results page shows, or None if it expired."""
+    if st.session_state.get("upload_job_applied") != job.id:
+        st.session_state.upload_job_applied = job.id
+        res = job.take_result()
+        if res is not None:
+            st.session_state.df, st.session_state.cost_col = res.pop("df"), res.pop("cost_col")
+        st.session_state.upload_result = res
+        print(f"[Upload] {job.label}: " + ", ".join(f"{k} {v:.2f}s" for k, v in job.stage_times.items()))
+    return st.session_state.get("upload_result")
+
 
 # ============================================================
 #  HELPERS
@@ -534,15 +758,54 @@ def fmt_crore(amount):
     elif amount>=100_000:  return f"₹{amount/100_000:.1f} L"
     else:                  return f"₹{amount:,.0f}"
 
-# ── Generate synthetic daily fraud trend data ─────────────────
-@st.cache_data
-def make_trend_data(n_days=30, seed=42):
-    rng  = np.random.default_rng(seed)
-    base = datetime.today() - timedelta(days=n_days)
-    dates  = [base + timedelta(days=i) for i in range(n_days)]
-    flagged = rng.integers(2, 12, size=n_days).tolist()
-    total   = rng.integers(15, 40, size=n_days).tolist()
-    return pd.DataFrame({"Date":dates,"Flagged":flagged,"Total":total})
+FRAUD_TYPE_COLORS = {"Ghost Billing":"#DC2626","Up-coding":"#D97706","Fake Admission":"#EA580C","Identity Misuse":"#7C3AED","Anomalous Pattern":"#16A34A"}
+
+def ai_cards_html(fraud_df, cc):
+    """All cards of one page as a single HTML string (no per-row Streamlit elements)."""
+    id_u  = "PatientID" if "PatientID" in fraud_df.columns else fraud_df.columns[0]
+    cards = []
+    for r in fraud_df.to_dict("records"):
+        pid, ft = html.escape(str(r.get(id_u, "—"))), str(r.get("Fraud_Type") or "—")
+        rs, cv  = float(r.get("Risk_Score") or 0), float(r.get(cc) or 0) if cc else 0.0
+        ai      = str(r.get("AI_Justification") or "").strip() or f"₹{cv:,.0f} flagged — {ft}. Risk: {rs:.2f}. Manual review needed."
+        cl      = FRAUD_TYPE_COLORS.get(ft, "#16A34A")
+        cards.append(f"""
+        <div class='section-card' style='margin-bottom:10px;'>
+          <div style='display:flex;justify-content:space-between;margin-bottom:10px;'>
+            <div><span style='font-weight:700;color:#16A34A;font-size:.95rem;'>{pid}</span>
+              &nbsp;<span style='background:{cl}18;color:{cl};border:1px solid {cl};border-radius:20px;padding:2px 8px;font-size:.7rem;font-weight:700;'>{html.escape(ft)}</span>
+            </div>
+            <div style='font-size:.75rem;color:#1F2937;'>Age:{html.escape(str(r.get("Age", "?")))} | ₹{cv:,.0f} | Risk:{rs:.2f}</div>
+          </div>
+          <div style='background:#DCFCE7;border-left:3px solid #16A34A;border-radius:8px;padding:12px 14px;'>
+            <div style='font-size:.68rem;font-weight:700;color:#14532D;text-transform:uppercase;letter-spacing:.7px;margin-bottom:6px;'>Forensic AI Analysis</div>
+            <div style='font-size:.87rem;color:#1F2937;line-height:1.65;'>{html.escape(ai)}</div>
+          </div>
+        </div>""")
+    return "".join(cards)
+
+@timed_fragment("upload results")
+def upload_ai_cards(fraud_df, cc, key):
+    """Flagged claims of the last upload, UPLOAD_CARDS_PAGE at a time, with search."""
+    q = st.text_input("Search flagged cases", key="upload_cards_q", placeholder="Patient ID, fraud type or explanation…",
+                      label_visibility="collapsed").strip()
+    view = fraud_df
+    if q:
+        text = pd.Series("", index=fraud_df.index)
+        for col in ("PatientID", "Fraud_Type", "Primary_Diagnosis", "AI_Justification"):
+            if col in fraud_df.columns:
+                text = text + " " + fraud_df[col].astype(str)
+        view = fraud_df[text.str.contains(q, case=False, regex=False)]
+    state_key = (key, q)
+    if st.session_state.get("upload_cards_key") != state_key:
+        st.session_state.upload_cards_key = state_key
+        st.session_state.upload_cards_n   = UPLOAD_CARDS_PAGE
+    shown = min(st.session_state.upload_cards_n, len(view))
+    st.caption(f"Showing {shown:,} of {len(view):,} flagged cases" + (f" matching “{q}”" if q else ""))
+    st.markdown(ai_cards_html(view.head(shown), cc), unsafe_allow_html=True)
+    if shown < len(view):
+        st.button(f"⬇ Load {min(UPLOAD_CARDS_PAGE, len(view) - shown)} more", key="upload_cards_more", use_container_width=True,
+                  on_click=lambda: st.session_state.update(upload_cards_n=st.session_state.upload_cards_n + UPLOAD_CARDS_PAGE))
 
 # ── Generate synthetic audit timeline ─────────────────────────
 def make_audit_log(fraud_df):
@@ -575,6 +838,14 @@ def make_audit_log(fraud_df):
 #  AUTO-LOAD DATA  (Supabase cloud-first, then local CSV)
 # ============================================================
 CSV_PATH = "ayushman_claims.csv"
+REPORT_PAGE_SIZE    = 90     # cases fetched per "load more"
+REPORT_GRID_PAGE    = 9      # cards per page of the client-side grid
+UPLOAD_CARDS_PAGE   = int(os.getenv("UPLOAD_CARDS_PAGE", "25"))   # AI cards per "load more" after upload
+ENRICH_POLL_S       = 3
+CHAT_TIMEOUT_S      = float(os.getenv("CHAT_TIMEOUT_S", "60"))       # whole streamed reply
+CHAT_IDLE_TIMEOUT_S = float(os.getenv("CHAT_IDLE_TIMEOUT_S", "20"))  # first token / gap between chunks
+TREND_WINDOWS = {"30D": 30, "90D": 90, "1Y": 365, "3Y": 3 * 365}
+INVESTIGATION_STATUSES = ["Pending", "Under Investigation", "Confirmed Fraud", "Cleared"]
 
 @st.cache_data(ttl=600, show_spinner=False)
 def master_data_loader(uid, contamination, n_estimators, _supabase_ready):
@@ -584,27 +855,25 @@ def master_data_loader(uid, contamination, n_estimators, _supabase_ready):
     df_out = None
     cost_col_out = None
     
-    # 1. Try Supabase
+    # 1. Try Supabase (or its disk snapshot, if no claim was added since)
     if _supabase_ready and uid:
         try:
-            cloud_df = sb.fetch_data_from_supabase(user_id=uid)
-            if not cloud_df.empty:
-                df_out, cost_col_out = run_pipeline(cloud_df, contamination, n_estimators)
-        except:
-            pass
+            df_out, cost_col_out = scored_cloud_claims(uid, contamination, n_estimators)
+        except Exception as e:
+            print(f"[Loader] cloud claims unavailable, falling back to the bundled CSV: {e}")
             
     # 2. Try Local CSV fallback
     if df_out is None and os.path.exists(CSV_PATH):
         try:
-            raw_df = pd.read_csv(CSV_PATH)
-            df_out, cost_col_out = run_pipeline(raw_df, contamination, n_estimators)
-        except:
-            pass
+            df_out, cost_col_out = snapshot_scored(f"csv:{os.path.abspath(CSV_PATH)}", lambda: file_fingerprint(CSV_PATH),
+                                                   lambda: pd.read_csv(CSV_PATH), contamination, n_estimators)
+        except Exception as e:
+            print(f"[Loader] bundled CSV could not be scored: {e}")
             
     return df_out, cost_col_out
 
-# ── Auto-trigger load
-if st.session_state.df is None:
+# ── Auto-trigger load (signed-in only: the login page must not wait on scoring)
+if st.session_state.df is None and st.session_state.user is not None:
     with st.spinner("🔍 Performing Initial Forensic Audit..."):
         st.session_state.df, st.session_state.cost_col = master_data_loader(
             st.session_state.uid, 
@@ -653,9 +922,18 @@ with st.sidebar:
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # ── Background upload: progress on any page, results applied once ──
+    up_job = get_job_runner().get(st.session_state.get("upload_job_id", ""))
+    if up_job is not None and not up_job.done:
+        st.caption(f"⏳ Auditing {up_job.label} — {up_job.message} ({up_job.progress():.0%})")
+    elif up_job is not None and up_job.status == "done":
+        collect_upload(up_job)
+
     # ── Data source status chips ──────────────────────
-    sb_status  = ("Live: Supabase" if _supabase_ready else "Local: CSV")
-    sb_color   = "#27ae60" if _supabase_ready else "#F39C12"
+    sb_degraded = _supabase_ready and getattr(getattr(sb, "breaker", None), "is_open", False)
+    sb_status  = ("Degraded: Cached" if sb_degraded else
+                  f"Live: {getattr(sb, 'BACKEND_LABEL', 'Supabase')}" if _supabase_ready else "Local: CSV")
+    sb_color   = "#27ae60" if _supabase_ready and not sb_degraded else "#F39C12"
     df_loaded  = st.session_state.df is not None
     n_rows     = len(st.session_state.df) if df_loaded else 0
     n_fraud    = int(st.session_state.df["Fraud_Flag"].sum()) if df_loaded and "Fraud_Flag" in st.session_state.df.columns else 0
@@ -711,17 +989,70 @@ if st.session_state.page == "Report":
         st.error("❌ Live database required for Audit Reports.")
         st.stop()
 
-    with st.spinner("📥 Fetching your critical cases from Cloud..."):
-        frauds_df = sb.fetch_detected_frauds(user_id=st.session_state.uid)
-
-    if frauds_df.empty:
-        st.info("✅ No critical frauds pending review in the cloud database.")
-    else:
-        # ── Premium Forensic Summary ──
-        total_amt = frauds_df.get("Final_Billed_Amount", pd.Series([0])).sum()
-        avg_risk = frauds_df.get("Risk_Score", pd.Series([0])).mean() * 100
+    def load_more_cases(q_type, q_status):
+        page, nxt = sb.fetch_detected_frauds_page(user_id=st.session_state.uid,
+                                                   page_size=REPORT_PAGE_SIZE,
+                                                   cursor=st.session_state.report_cursor,
+                                                   fraud_type=q_type, status=q_status)
+        st.session_state.report_pages.append(page)
+        st.session_state.report_cursor = nxt
+        st.session_state.report_done   = nxt is None
+
+    def apply_bulk_status():
+        ids, new_status = st.session_state.bulk_ids, st.session_state.bulk_status
+        res = sb.update_claims_status_bulk(ids, new_status, user_id=st.session_state.uid)
+        if res["status"] == "success":
+            st.session_state.report_query = None        # reload pages with fresh statuses
+            st.session_state.bulk_reset   = True
+        st.session_state.bulk_result = {**res, "new_status": new_status}
+
+    def toggle_select_all(case_ids):
+        # Once per click: afterwards single cases can still be removed from the selection
+        st.session_state.bulk_ids = list(case_ids) if st.session_state.bulk_all else []
+
+    # Everything below reruns on its own when a filter, button or status changes
+    @timed_fragment("report")
+    def report_view():
+        # ── Queue filters (applied server-side) ──
+        all_summary = sb.get_detected_frauds_summary(user_id=st.session_state.uid)
+        f1, f2 = st.columns(2)
+        with f1:
+            type_opt = st.selectbox("Fraud Type", ["All"] + list(all_summary["by_type"]), key="report_type")
+        with f2:
+            status_opt = st.selectbox("Investigation Status", ["All"] + INVESTIGATION_STATUSES, key="report_status")
+        q_type   = None if type_opt == "All" else type_opt
+        q_status = None if status_opt == "All" else status_opt
+
+        summary = (all_summary if q_type is None and q_status is None else
+                   sb.get_detected_frauds_summary(user_id=st.session_state.uid, fraud_type=q_type, status=q_status))
+
+        # ── Lazily loaded pages: reset whenever the filters change ──
+        q_key = (st.session_state.uid, q_type, q_status)
+        if st.session_state.get("report_query") != q_key:
+            st.session_state.report_query  = q_key
+            st.session_state.report_pages  = []
+            st.session_state.report_cursor = None
+            st.session_state.report_done   = False
+        if not st.session_state.report_pages and not st.session_state.report_done:
+            with st.spinner("📥 Fetching your critical cases from Cloud..."):
+                page, nxt = sb.fetch_detected_frauds_page(user_id=st.session_state.uid,
+                                                           page_size=REPORT_PAGE_SIZE,
+                                                           fraud_type=q_type, status=q_status)
+            st.session_state.report_pages  = [page]
+            st.session_state.report_cursor = nxt
+            st.session_state.report_done   = nxt is None
+
+        frauds_df = (pd.concat(st.session_state.report_pages, ignore_index=True)
+                     if st.session_state.report_pages else pd.DataFrame())
+
+        if summary["cases"] == 0 or frauds_df.empty:
+            st.info("✅ No critical frauds pending review in the cloud database.")
+        else:
+            # ── Premium Forensic Summary ──
+            total_amt = summary["total_amount"]
+            avg_risk = summary["avg_risk"] * 100
         
-        summary_html = f"""
+            summary_html = f"""
         <div style='background: white; border: 1px solid #E5E7EB; border-radius: 20px; padding: 25px; margin-bottom: 25px; box-shadow: 0 4px 20px rgba(0,0,0,0.02);'>
             <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px;'>
                 <div style='font-size: 1.4rem; font-weight: 800; color: #14532D;'>Forensic Audit Summary</div>
@@ -730,7 +1061,7 @@ if st.session_state.page == "Report":
             <div style='display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px;'>
                 <div style='background: #F9FAFB; padding: 15px; border-radius: 12px; border: 1px solid #F3F4F6;'>
                     <div style='font-size: 0.85rem; color: #6B7280; font-weight: 700; text-transform: uppercase;'>Investigation Queue</div>
-                    <div style='font-size: 2.2rem; font-weight: 800; color: #111827;'>{len(frauds_df)} <span style='font-size: 1rem; color: #6B7280;'>Cases</span></div>
+                    <div style='font-size: 2.2rem; font-weight: 800; color: #111827;'>{summary["cases"]:,} <span style='font-size: 1rem; color: #6B7280;'>Cases</span></div>
                 </div>
                 <div style='background: #FFF7ED; padding: 15px; border-radius: 12px; border: 1px solid #FFEDD5;'>
                     <div style='font-size: 0.85rem; color: #9A3412; font-weight: 700; text-transform: uppercase;'>Pipeline Value</div>
@@ -743,23 +1074,22 @@ if st.session_state.page == "Report":
             </div>
         </div>
         """
-        st.markdown(summary_html, unsafe_allow_html=True)
+            st.markdown(summary_html, unsafe_allow_html=True)
         
-        # ── Category Distribution (Split View) ──
-        c1, c2 = st.columns([1.5, 1])
-        with c1:
-            if "Fraud_Type" in frauds_df.columns:
-                chart_data = frauds_df["Fraud_Type"].value_counts().reset_index()
-                chart_data.columns = ["Category", "Counts"]
-                st.markdown("<div style='font-size:0.95rem; font-weight:700; color:#4B5563; margin-bottom:12px; letter-spacing:0.5px;'>CATEGORY DISTRIBUTION</div>", unsafe_allow_html=True)
-                st.bar_chart(chart_data.set_index("Category"), color="#16A34A", use_container_width=True)
+            # ── Category Distribution (Split View) ──
+            c1, c2 = st.columns([1.5, 1])
+            with c1:
+                if summary["by_type"]:
+                    chart_data = pd.DataFrame(list(summary["by_type"].items()), columns=["Category", "Counts"])
+                    st.markdown("<div style='font-size:0.95rem; font-weight:700; color:#4B5563; margin-bottom:12px; letter-spacing:0.5px;'>CATEGORY DISTRIBUTION</div>", unsafe_allow_html=True)
+                    st.bar_chart(chart_data.set_index("Category"), color="#16A34A", use_container_width=True)
         
-        with c2:
-            st.markdown("<div style='font-size:0.95rem; font-weight:700; color:#4B5563; margin-bottom:12px; letter-spacing:0.5px;'>RECENT ALERTS</div>", unsafe_allow_html=True)
-            for _, row in frauds_df.head(3).iterrows():
-                pid = row.get("PatientID", "—")
-                ft = row.get("Fraud_Type", "—")
-                st.markdown(f"""
+            with c2:
+                st.markdown("<div style='font-size:0.95rem; font-weight:700; color:#4B5563; margin-bottom:12px; letter-spacing:0.5px;'>RECENT ALERTS</div>", unsafe_allow_html=True)
+                for _, row in frauds_df.head(3).iterrows():
+                    pid = row.get("PatientID", "—")
+                    ft = row.get("Fraud_Type", "—")
+                    st.markdown(f"""
                 <div style='background:white; border:1px solid #F3F4F6; padding:12px 18px; border-radius:10px; margin-bottom:8px; display:flex; justify-content:space-between; align-items:center;'>
                     <div>
                         <div style='font-size:1.1rem; font-weight:700; color:#111827;'>{pid}</div>
@@ -769,70 +1099,156 @@ if st.session_state.page == "Report":
                 </div>
                 """, unsafe_allow_html=True)
 
-        st.markdown("---")
-        st.markdown(f"<p style='color:#14532D; font-weight:700; font-size:1.25rem;'>Listing {len(frauds_df)} priority investigations:</p>", unsafe_allow_html=True)
+            st.markdown("---")
+            st.markdown(f"<p style='color:#14532D; font-weight:700; font-size:1.25rem;'>Showing {len(frauds_df):,} of {summary['cases']:,} priority investigations:</p>", unsafe_allow_html=True)
+
+            # ── Bulk triage: apply one status to many loaded cases ──
+            with st.expander("🗂️ Bulk Status Update", expanded=False):
+                if st.session_state.pop("bulk_reset", False):
+                    st.session_state.bulk_ids = []
+                    st.session_state.bulk_all = False
+                status_of = (dict(zip(frauds_df["PatientID"].astype(str), frauds_df["Investigation_Status"].fillna("Pending")))
+                             if "Investigation_Status" in frauds_df.columns else {})
+                type_of   = dict(zip(frauds_df["PatientID"].astype(str), frauds_df.get("Fraud_Type", pd.Series("", index=frauds_df.index))))
+                case_ids  = frauds_df["PatientID"].astype(str).tolist()
+                st.checkbox(f"Select all {len(case_ids)} loaded cases", key="bulk_all",
+                            on_change=toggle_select_all, args=(case_ids,))
+                sel_ids = st.multiselect("Cases", case_ids, key="bulk_ids",
+                                         format_func=lambda p: f"{p} · {type_of.get(p, '')} · {status_of.get(p, 'Pending')}")
+                b1, b2 = st.columns([2, 1])
+                with b1:
+                    st.selectbox("New status", INVESTIGATION_STATUSES, key="bulk_status")
+                with b2:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    st.button(f"Apply to {len(sel_ids)} cases", type="primary", disabled=not sel_ids, on_click=apply_bulk_status)
+                res = st.session_state.pop("bulk_result", None)
+                if res and res["status"] == "success":
+                    st.toast(f"✅ {res['updated']} cases marked '{res['new_status']}'.")
+                elif res:
+                    st.error(f"❌ Status update failed: {res.get('error')}")
         
-        # Display Cards in a 3-column grid
-        for i in range(0, len(frauds_df), 3):
-            cols = st.columns(3)
-            for j in range(3):
-                if i + j < len(frauds_df):
-                    row = frauds_df.iloc[i + j]
-                    pid    = row.get("PatientID", "—")
-                    age    = row.get("Age", "—")
-                    diag   = row.get("Primary_Diagnosis", "—")
-                    amt    = row.get("Final_Billed_Amount", 0)
-                    risk   = row.get("Risk_Score", 0.0)
-                    ftype  = row.get("Fraud_Type", "Anomalous")
-                    ai     = row.get("AI_Justification", "Risk pattern detected. Manual verification required.")
-                    
-                    # Sanitize strings for HTML inclusion
-                    s_pid  = str(pid).strip().replace("\n", " ")
-                    s_diag = str(diag).strip().replace("\n", " ")
-                    s_ai   = str(ai).strip().replace("\n", " ")
-
-                    card_html = (
-                        f"<div style=\"font-family:sans-serif; background:#fff; border:1px solid #E5E7EB; border-left:5px solid #DC2626; border-radius:12px; padding:20px; box-shadow: 0 4px 12px rgba(22,163,74, 0.05); height: 420px; overflow: hidden;\">"
-                        f"<div style=\"display:flex; justify-content:space-between; align-items:flex-start; margin-bottom:15px;\">"
-                        f"<div><div style=\"font-size:.75rem; color:#DC2626; font-weight:700; text-transform:uppercase;\">Patient ID</div>"
-                        f"<div style=\"font-size:1.1rem; font-weight:800; color:#14532D;\">{s_pid}</div></div>"
-                        f"<div style=\"text-align:right;\"><div style=\"background:#DC2626; color:#fff; font-size:.7rem; font-weight:800; padding:2px 10px; border-radius:12px;\">{int(risk*100)}% RISK</div></div></div>"
-                        f"<div style=\"background:#F9FAFB; border-radius:8px; padding:12px; border:1px solid #F3F4F6; margin-bottom:15px;\">"
-                        f"<div style=\"margin-bottom:8px;\"><div style=\"font-size:.7rem; font-weight:700; color:#6B7280;\">DIAGNOSIS</div><div style=\"font-size:.85rem; font-weight:700; color:#14532D; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;\">{s_diag}</div></div>"
-                        f"<div style=\"display:flex; justify-content:space-between;\">"
-                        f"<div><div style=\"font-size:.7rem; font-weight:700; color:#6B7280;\">AGE</div><div style=\"font-size:.9rem; font-weight:700; color:#14532D;\">{age} yrs</div></div>"
-                        f"<div><div style=\"font-size:.7rem; font-weight:700; color:#6B7280; text-align:right;\">AMOUNT</div><div style=\"font-size:.9rem; font-weight:700; color:#DC2626;\">&#8377;{amt:,.0f}</div></div></div></div>"
-                        f"<div><div style=\"font-size:.75rem; color:#16A34A; font-weight:800; text-transform:uppercase; margin-bottom:5px;\">&#129302; AI Justification</div>"
-                        f"<div style=\"font-size:.85rem; color:#1F2937; line-height:1.5; background:#DCFCE7; padding:10px; border-radius:8px; border-left:3px solid #16A34A; height: 160px; overflow-y: auto;\">{s_ai}</div></div>"
-                        f"</div>"
-                    )
-                    with cols[j]:
-                        st.components.v1.html(card_html, height=440)
-        
-        # --- Single Master Download Button at the Bottom ---
-        st.markdown("<br><hr>", unsafe_allow_html=True)
-        st.subheader("📥 Export Audit Data")
-        st.info("Download the consolidated list of detected frauds in CSV format for further investigation.")
-        
-        # Prepare CSV data for export (Strip Emojis for better Excel compatibility)
-        import re
-        export_df = frauds_df.copy()
+            # ── All loaded cases in one client-side grid (sort / filter / page without a rerun).
+            #    While AI explanations are written in the background only this fragment polls:
+            #    a new batch redraws the grid here, the rest of the report is left alone ──
+            enricher = get_enricher()
+            polling  = enricher is not None and enricher.status(st.session_state.uid)["running"]
+            drawn    = {}                                   # version → grid html, for this set of pages
+
+            @timed_fragment("report cards", run_every=ENRICH_POLL_S if polling else None)
+            def case_cards(frauds_df):
+                s = enricher.status(st.session_state.uid) if enricher is not None else {"version": 0, "running": False}
+                if s["version"] not in drawn:
+                    enriched = enricher.texts(st.session_state.uid) if enricher is not None else {}
+                    if enriched:
+                        current   = frauds_df.get("AI_Justification", pd.Series("", index=frauds_df.index))
+                        frauds_df = frauds_df.assign(AI_Justification=frauds_df["PatientID"].astype(str).map(enriched).fillna(current))
+                    drawn.clear()
+                    drawn[s["version"]] = case_grid_html(frauds_df, page_size=REPORT_GRID_PAGE)
+                if s["running"]:
+                    st.caption(f"🤖 Writing AI explanations in the background — {s['done'] + s['failed']:,} of {s['queued']:,} done")
+                st.components.v1.html(drawn[s["version"]], height=grid_height(REPORT_GRID_PAGE, len(frauds_df)),
+                                      scrolling=True)
+            case_cards(frauds_df)
         
-        # Remove emojis from all string columns
-        for col in export_df.select_dtypes(include=['object']).columns:
-            export_df[col] = export_df[col].apply(lambda x: re.sub(r'[^\x00-\x7F\u0900-\u097F\u20B9]', '', str(x)) if pd.notnull(x) else x)
-        
-        csv_data = export_df.to_csv(index=False).encode('utf-8-sig')
-        
-        st.download_button(
-            label="📊 DOWNLOAD AUDIT REPORT (CSV)",
-            data=csv_data,
-            file_name=f"Fraud_Audit_Export_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-            mime="text/csv",
-            use_container_width=True,
-            type="primary"
-        )
-        st.markdown("<br><br>", unsafe_allow_html=True)
+            # ── Load the next page on demand ──
+            if not st.session_state.report_done:
+                st.button(f"⬇ Load {REPORT_PAGE_SIZE} more cases", use_container_width=True,
+                          on_click=load_more_cases, args=(q_type, q_status))
+
+            # ── PDF dossiers per hospital or per case, built in the background ──
+            with st.expander("📄 Audit Dossiers (PDF)", expanded=False):
+                if not dossier_available():
+                    st.info("Install `fpdf2` to enable PDF dossiers.")
+                else:
+                    dossiers  = get_dossier_service()
+                    scope     = st.radio("One dossier per", ["hospital", "case"], horizontal=True, key="dossier_scope",
+                                         format_func=str.title)
+                    # The queue is only paged through on request: once to list the groups,
+                    # again to collect the picked ones (expanders don't stop code from running)
+                    index_key = (q_key, scope, sb.frauds_version())
+                    index     = st.session_state.get("dossier_index")
+                    if (index is None or index[0] != index_key) and st.button(f"List {scope}s in this queue"):
+                        try:
+                            with st.spinner("Reading the investigation queue..."):
+                                index = (index_key, index_groups(iter_frauds(sb, st.session_state.uid, q_type, q_status), scope))
+                            st.session_state.dossier_index = index
+                        except Exception as e:
+                            print(f"[Dossier] listing failed: {e}")
+                            st.error(f"❌ Could not read the investigation queue: {str(e)[:200]}")
+                    counts    = index[1] if index is not None and index[0] == index_key else None
+                    if counts is not None:
+                        picks = st.multiselect(f"{scope.title()}s", list(counts), key="dossier_picks",
+                                               format_func=lambda k: f"{k} ({counts[k]} cases)")
+                        if st.button(f"Generate {len(picks)} dossiers", disabled=not picks):
+                            try:
+                                with st.spinner("Collecting cases..."):
+                                    groups = collect_groups(iter_frauds(sb, st.session_state.uid, q_type, q_status),
+                                                            scope, picks)
+                                st.session_state.dossier_jobs = [(k, dossiers.request(k, groups[k]))
+                                                                 for k in picks if k in groups]
+                            except Exception as e:
+                                print(f"[Dossier] collecting cases failed: {e}")
+                                st.error(f"❌ Could not read the investigation queue: {str(e)[:200]}")
+
+                    jobs = st.session_state.get("dossier_jobs", [])
+
+                    pdfs = {}                                   # dossier id → bytes, read once
+
+                    # Polls (this fragment only) while dossiers render; finished ones are served from memory
+                    @timed_fragment("report dossiers", run_every=2 if any(dossiers.status(d) == "pending" for _, d in jobs) else None)
+                    def dossier_downloads():
+                        states = [(label, d, dossiers.status(d)) for label, d in jobs]
+                        if any(s == "pending" for _, _, s in states):
+                            st.caption(f"🖨️ Rendering {sum(s == 'pending' for _, _, s in states)} of {len(states)} dossiers…")
+                        for label, d, state in states:
+                            if state == "ready":
+                                if d not in pdfs:
+                                    with open(dossiers.path(d), "rb") as f:
+                                        pdfs[d] = f.read()
+                                st.download_button(f"⬇ {label}", data=pdfs[d], key=f"dossier_{d}",
+                                                   file_name=f"Dossier_{label.replace(' ', '_')}.pdf",
+                                                   mime="application/pdf", use_container_width=True)
+                            elif state == "failed":
+                                st.error(f"❌ Could not render the dossier for {label}.")
+                    dossier_downloads()
+
+            # --- Single Master Download Button at the Bottom ---
+            st.markdown("<br><hr>", unsafe_allow_html=True)
+            st.subheader("📥 Export Audit Data")
+            st.info("Download the consolidated list of detected frauds for further investigation.")
+
+            # The full queue is only streamed out when an export is actually requested
+            e1, e2 = st.columns([1, 2])
+            with e1:
+                export_fmt = st.selectbox("Format", available_formats(), key="report_export_fmt", label_visibility="collapsed")
+            with e2:
+                prepare = st.button("Prepare full audit export", use_container_width=True)
+            if prepare:
+                with st.spinner(f"📦 Writing {export_fmt} export..."):
+                    discard(st.session_state.pop("report_export_file", None))
+                    st.session_state.report_export = None
+                    try:
+                        st.session_state.report_export_file = export_frauds(
+                            sb, st.session_state.uid, export_fmt, fraud_type=q_type, status=q_status)
+                        st.session_state.report_export = (q_key, export_fmt)
+                    except Exception as e:
+                        print(f"[Export] failed: {e}")
+                        st.error(f"❌ Export failed part-way through, so no file was produced: {str(e)[:200]}")
+            exp = st.session_state.get("report_export_file")
+            if st.session_state.get("report_export") == (q_key, export_fmt) and exp and os.path.exists(exp["path"]):
+                st.caption(f"{exp['rows']:,} cases · {exp['bytes'] / 1e6:.2f} MB · built in {exp['seconds']:.1f}s")
+                with open(exp["path"], "rb") as f:
+                    st.download_button(
+                        label=f"📊 DOWNLOAD AUDIT REPORT ({exp['format']})",
+                        data=f,
+                        file_name=exp["file_name"],
+                        mime=exp["mime"],
+                        use_container_width=True,
+                        type="primary"
+                    )
+            st.markdown("<br><br>", unsafe_allow_html=True)
+
+    report_view()
 
 
 # ============================================================
@@ -879,80 +1295,72 @@ elif st.session_state.page == "Home":
 
     st.markdown("<br><br>", unsafe_allow_html=True)
 
-    # ── 3. ANALYZE NOW ─────────────────────────────────────
+    # ── 3. DAILY FRAUD TREND (pre-aggregated rollup) ───────
+    if _supabase_ready and st.session_state.uid:
+        # Window / state changes rerun only the chart, not an in-progress upload below
+        @timed_fragment("trend")
+        def fraud_trend():
+            st.markdown("<div style='margin-bottom:15px;'><span style='font-size:1.2rem; font-weight:800;'>📈 Daily Fraud Trend</span></div>", unsafe_allow_html=True)
+            t1, t2 = st.columns([2, 1])
+            with t1:
+                window = st.radio("Window", list(TREND_WINDOWS), horizontal=True, key="trend_window", label_visibility="collapsed")
+            with t2:
+                states = ([ALL_STATES] + sorted(st.session_state.df["State"].dropna().astype(str).unique())
+                          if st.session_state.df is not None and "State" in st.session_state.df.columns else [ALL_STATES])
+                trend_state = st.selectbox("State", states, key="trend_state", label_visibility="collapsed",
+                                           format_func=lambda s: "All States" if s == ALL_STATES else s)
+            trend = sb.get_trend_data(n_days=TREND_WINDOWS[window], user_id=st.session_state.uid, state=trend_state)
+            if trend.empty or not trend["Total"].any():
+                st.info("No claims ingested in this window yet — upload a CSV to start the trend.")
+            else:
+                if TREND_WINDOWS[window] > 120:
+                    trend = trend.set_index("Date").resample("W").sum().reset_index()
+                st.line_chart(trend.set_index("Date")[["Total", "Flagged"]], color=["#16A34A", "#DC2626"])
+            st.markdown("<br>", unsafe_allow_html=True)
+        fraud_trend()
+
+    # ── 4. ANALYZE NOW ─────────────────────────────────────
     st.markdown("""
     <div style='margin-bottom:25px; margin-top:10px;'>
       <span style='font-size:1.4rem; font-weight:800; color:#000000;'>🚀 Analyze Now</span>
       <span style='color:#000000; font-size:1.25rem; font-weight:500;'> — Secure Claim Forensic Analysis</span>
     </div>""", unsafe_allow_html=True)
 
-    uploaded = st.file_uploader("Drop CSV here", type=["csv"], label_visibility="collapsed")
-
-    if uploaded:
-        raw = pd.read_csv(uploaded)
-        pb  = st.progress(0, text="Auditing Data...")
-        # Removed artificial delays for instant forensic analysis
-        result_df, cc = run_pipeline(raw.copy(), st.session_state.contamination, st.session_state.n_estimators)
-        fraud_up = result_df[result_df["Fraud_Flag"]==1]
-        susp_up  = fraud_up[cc].sum() if cc else 0
-
-        if _supabase_ready:
-            uid = st.session_state.user.id if st.session_state.user else None
-            time.sleep(.2); pb.progress(90, "☁️ Syncing all claims & saving detected frauds...")
-            upload_res = sb.insert_new_rows_only(raw, conflict_col="PatientID", user_id=uid)
-            sb.save_fraud_results_to_supabase(result_df, user_id=uid)
-            
-            # 🔥 STEP 1 & 2: EXTRACT ONLY FRAUDS & UPSERT TO detected_frauds
-            fraud_only = result_df[result_df["Fraud_Flag"] == 1].copy()
-            if not fraud_only.empty:
-                # Map columns to match detected_frauds table schema
-                if cc and cc != "Final_Billed_Amount":
-                    fraud_only["Final_Billed_Amount"] = fraud_only[cc]
-                if "Primary_Diagnosis" not in fraud_only.columns and "Disease" in fraud_only.columns:
-                    fraud_only["Primary_Diagnosis"] = fraud_only["Disease"]
-                
-                sb.upsert_detected_frauds(fraud_only, user_id=uid)
-            
-            # Log session
-            log_uid = st.session_state.user.id if st.session_state.user else "guest"
-            
-            sb.log_upload_session(
-                uid=uid,
-                filename=uploaded.name,
-                total_rows=len(result_df),
-                new_rows=upload_res.get("new", 0),
-                skipped_rows=upload_res.get("skipped", 0),
-                fraud_detected=len(fraud_up),
-                suspicious_amt=susp_up
-            )
-            
-            sb.upsert_audit_log(
-                uid=uid,
-                action="Batch Analysis",
-                description=f"Processed {len(result_df)} rows from {uploaded.name}. Detected {len(fraud_up)} frauds.",
-                amount=susp_up
-            )
-
-        time.sleep(.2); pb.progress(100, "✅ Complete!")
-        time.sleep(.3); pb.empty()
-
-        # Update global session state with the full database if connected
-        refreshed = False
-        if _supabase_ready and st.session_state.uid:
-            try:
-                cloud_df = sb.fetch_data_from_supabase(user_id=st.session_state.uid) # Fetch user data
-                if not cloud_df.empty:
-                    st.session_state.df, st.session_state.cost_col = run_pipeline(
-                        cloud_df, st.session_state.contamination, st.session_state.n_estimators)
-                    refreshed = True
-            except:
-                pass
-        
-        # Fallback to just the uploaded file if cloud fetch fails or Supabase isn't ready
-        if not refreshed:
-            st.session_state.df = result_df
-            st.session_state.cost_col = cc
-            
+    uploaded = st.file_uploader("Drop CSV files here", type=["csv"], accept_multiple_files=True,
+                                label_visibility="collapsed")
+
+    # The pipeline runs as a background job: this page (or any other) stays usable,
+    # and the job is found again by id on every rerun until its results are shown.
+    # Files dropped together form one batch; files added later form the next one.
+    job_runner = get_job_runner()
+    seen  = st.session_state.setdefault("upload_seen", set())
+    fresh = [f for f in uploaded or [] if f.file_id not in seen]
+    if fresh:
+        seen.update(f.file_id for f in fresh)
+        label = fresh[0].name if len(fresh) == 1 else f"{len(fresh)} files"
+        st.session_state.upload_job_id = job_runner.submit(
+            upload_job, [(f.name, f.getvalue()) for f in fresh], st.session_state.uid,
+            st.session_state.contamination, st.session_state.n_estimators,
+            chat_ctx=get_chat_context(sb) if _supabase_ready else None, enricher=get_enricher(),
+            stages=UPLOAD_STAGES, user_id=st.session_state.uid, label=label)
+
+    job = job_runner.get(st.session_state.get("upload_job_id", ""))
+    if job is not None and not job.done:
+        @timed_fragment("upload progress", run_every=UPLOAD_POLL_S)
+        def upload_progress():
+            snap = job.snapshot()
+            if job.done:
+                st.rerun()                                   # show the results
+            st.progress(snap["progress"], text=f"{snap['message']} · {snap['elapsed_s']:.0f}s")
+            st.caption(f"📄 {snap['label']} — you can keep working; results appear here when the audit finishes.")
+        upload_progress()
+    elif job is not None and job.status == "failed":
+        st.error(f"❌ Analysis of {job.label} failed: {job.error}")
+    elif job is not None and collect_upload(job) is None:
+        st.info(f"ℹ️ The results of {job.label} are no longer available; the dashboard already includes them.")
+    elif job is not None:
+        res = collect_upload(job)
+        result_df, cc = res["result_df"], res["cc"]
         fraud_up = result_df[result_df["Fraud_Flag"]==1]
         susp_up  = fraud_up[cc].sum() if cc else 0
 
@@ -962,6 +1370,13 @@ elif st.session_state.page == "Home":
         m3.metric("💰 Suspicious",   fmt_crore(susp_up))
 
         st.success("✅ Pipeline complete! AI analysis generated for all flagged cases.")
+        for name, err in res["errors"].items():
+            st.warning(f"⚠️ Skipped {name}: {err}")
+        if len(res["files"]) > 1:
+            st.dataframe(pd.DataFrame(res["files"]).rename(columns={
+                "file": "File", "rows": "Rows", "new": "New", "skipped": "Skipped",
+                "flagged": "Flagged", "suspicious": "Suspicious (₹)"}),
+                hide_index=True, use_container_width=True)
         st.markdown("---")
 
         # Fraud type chips
@@ -975,32 +1390,12 @@ elif st.session_state.page == "Home":
                 col_w.markdown(f"<div style='background:{c}18;border:1px solid {c};border-radius:12px;padding:12px;text-align:center;'><div style='font-size:1.4rem;font-weight:800;color:{c};'>{cnt}</div><div style='font-size:.72rem;font-weight:600;color:{c};'>{ft}</div></div>", unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
-        # AI cards
+        # AI cards: one HTML block per page, search + load more rerun only this fragment
         st.markdown("<div class='section-card'><div class='section-title'>🤖 AI Analysis — Flagged Cases</div>", unsafe_allow_html=True)
         if fraud_up.empty:
             st.success("✅ No fraud detected.")
         else:
-            id_u = "PatientID" if "PatientID" in fraud_up.columns else fraud_up.columns[0]
-            tc2  = {"Ghost Billing":"#DC2626","Up-coding":"#D97706","Fake Admission":"#EA580C","Identity Misuse":"#7C3AED","Anomalous Pattern":"#16A34A"}
-            for _,fr in fraud_up.iterrows():
-                pid2  = fr.get(id_u,"—"); age2=fr.get("Age","?"); ft2=fr.get("Fraud_Type","—")
-                rs2   = float(fr.get("Risk_Score",0)); cv2=float(fr.get(cc,0)) if cc else 0
-                ai2   = str(fr.get("AI_Justification","")).strip(); cl2=tc2.get(ft2,"#16A34A")
-                sc2   = int(fr.get("Suspicion_Score",int(rs2*100)))
-                if not ai2: ai2=f"₹{cv2:,.0f} flagged — {ft2}. Risk: {rs2:.2f}. Manual review needed."
-                st.markdown(f"""
-                <div class='section-card' style='margin-bottom:10px;'>
-                  <div style='display:flex;justify-content:space-between;margin-bottom:10px;'>
-                    <div><span style='font-weight:700;color:#16A34A;font-size:.95rem;'>{pid2}</span>
-                      &nbsp;<span style='background:{cl2}18;color:{cl2};border:1px solid {cl2};border-radius:20px;padding:2px 8px;font-size:.7rem;font-weight:700;'>{ft2}</span>
-                    </div>
-                    <div style='font-size:.75rem;color:#1F2937;'>Age:{age2} | ₹{cv2:,.0f} | Risk:{fr.get("Risk score per claim",0.0):.2f}</div>
-                  </div>
-                  <div style='background:#DCFCE7;border-left:3px solid #16A34A;border-radius:8px;padding:12px 14px;'>
-                    <div style='font-size:.68rem;font-weight:700;color:#14532D;text-transform:uppercase;letter-spacing:.7px;margin-bottom:6px;'>Forensic AI Analysis</div>
-                    <div style='font-size:.87rem;color:#1F2937;line-height:1.65;'>{ai2}</div>
-                  </div>
-                </div>""", unsafe_allow_html=True)
+            upload_ai_cards(fraud_up, cc, key=job.id)
         st.markdown("</div>", unsafe_allow_html=True)
 
         st.markdown("---")
@@ -1111,10 +1506,9 @@ elif st.session_state.page == "Account":
                                     if res.user:
                                         st.session_state.user = res.user
                                         st.session_state.uid = res.user.id
-                                        import uuid
-                                        sid = str(uuid.uuid4())[:8]
+                                        sid = new_session_id()
                                         st.query_params["s"] = sid
-                                        get_session_cache()[sid] = {"user": res.user, "uid": res.user.id}
+                                        _session_store.put(sid, {"uid": res.user.id, "email": res.user.email})
                                         st.session_state.page = "Home"
                                         sb.upsert_audit_log(res.user.id, "Login", f"User {email} logged in.")
                                         st.rerun()
@@ -1169,7 +1563,7 @@ margin:0 auto 16px; color:#fff; box-shadow: 0 8px 24px rgba(22,163,74,0.15);'>
             if st.button("🔓 Logout Investigator", use_container_width=True, type="primary"):
                 sb.upsert_audit_log(uid, "Logout", "Investigator session ended.")
                 sid = st.query_params.get("s")
-                if sid in get_session_cache(): del get_session_cache()[sid]
+                if sid: _session_store.delete(sid)
                 st.query_params.clear()
                 sb.sign_out()
                 st.session_state.user = None
@@ -1227,8 +1621,10 @@ Investigator Profile & Activity
 elif st.session_state.page == "Settings":
     st.markdown("<div style='padding:6px 0 18px;'><span style='font-size:1.4rem;font-weight:800;color:#14532D;'>Settings</span><span style='color:#1F2937;font-size:1.4rem;'> — Detection Configuration</span></div>", unsafe_allow_html=True)
 
-    # ── Parameters Dashboard ──
-    st.markdown(f"""<div style='background:white; border:1px solid #E5E7EB; border-radius:20px; padding:30px; margin-bottom:25px; box-shadow: 0 4px 15px rgba(0,0,0,0.03);'>
+    @timed_fragment("settings")
+    def settings_panel():
+        # ── Parameters Dashboard ──
+        st.markdown(f"""<div style='background:white; border:1px solid #E5E7EB; border-radius:20px; padding:30px; margin-bottom:25px; box-shadow: 0 4px 15px rgba(0,0,0,0.03);'>
 <div style='display:grid; grid-template-columns: 1fr 1fr; gap:40px;'>
 <div>
 <div style='font-size:1.2rem; font-weight:800; color:#14532D; margin-bottom:8px; display:flex; align-items:center; gap:8px;'>🎯 Contamination Rate</div>
@@ -1241,31 +1637,31 @@ elif st.session_state.page == "Settings":
 </div>
 </div>""", unsafe_allow_html=True)
 
-    s1, s2 = st.columns(2)
-    with s1:
-        nc = st.slider("Detection Sensitivity (Contamination)", 0.01, 0.30, float(st.session_state.contamination), 0.01, format="%.2f", help="Adjust this based on expected fraud density.")
-        lbl = "🟢 Conservative" if nc < 0.08 else "🟡 Balanced" if nc < 0.16 else "🔴 Aggressive"
-        st.markdown(f"<div style='background:#F9FAFB; padding:10px 15px; border-radius:8px; font-size:0.95rem; color:#1F2937;'>Current Mode: <b>{lbl}</b></div>", unsafe_allow_html=True)
-    with s2:
-        ne = st.slider("Analytical Depth (n_estimators)", 50, 500, int(st.session_state.n_estimators), 50, help="Higher trees equal better precision on complex fraud.")
-        st.markdown(f"<div style='background:#F9FAFB; padding:10px 15px; border-radius:8px; font-size:0.95rem; color:#1F2937;'>Tree Depth: <b>{ne} Iterations</b></div>", unsafe_allow_html=True)
-
-    st.markdown("<br>", unsafe_allow_html=True)
-    if st.button("🔄 Apply & Re-run Pipeline", type="primary"):
-        if st.session_state.df is None:
-            st.warning("No data loaded.")
-        else:
-            st.session_state.contamination=nc; st.session_state.n_estimators=ne
-            raw2 = pd.read_csv(CSV_PATH) if os.path.exists(CSV_PATH) else st.session_state.df.copy()
-            with st.spinner("Re-running..."):
-                st.session_state.df, st.session_state.cost_col = run_pipeline(raw2, nc, ne)
-                uid = st.session_state.user.id if st.session_state.user else "guest"
-                sb.upsert_audit_log(uid, "Pipeline Configuration", f"Updated sensitivity to {nc} and trees to {ne}.")
-            st.success(f"✅ Done! {st.session_state.df['Fraud_Flag'].sum()} fraud cases detected.")
-            time.sleep(1); st.session_state.page="Home"; st.rerun()
-
-    # ── Technical Reference Guide ──
-    st.markdown(f"""<div class='section-card' style='margin-top:20px; padding:25px;'>
+        s1, s2 = st.columns(2)
+        with s1:
+            nc = st.slider("Detection Sensitivity (Contamination)", 0.01, 0.30, float(st.session_state.contamination), 0.01, format="%.2f", help="Adjust this based on expected fraud density.")
+            lbl = "🟢 Conservative" if nc < 0.08 else "🟡 Balanced" if nc < 0.16 else "🔴 Aggressive"
+            st.markdown(f"<div style='background:#F9FAFB; padding:10px 15px; border-radius:8px; font-size:0.95rem; color:#1F2937;'>Current Mode: <b>{lbl}</b></div>", unsafe_allow_html=True)
+        with s2:
+            ne = st.slider("Analytical Depth (n_estimators)", 50, 500, int(st.session_state.n_estimators), 50, help="Higher trees equal better precision on complex fraud.")
+            st.markdown(f"<div style='background:#F9FAFB; padding:10px 15px; border-radius:8px; font-size:0.95rem; color:#1F2937;'>Tree Depth: <b>{ne} Iterations</b></div>", unsafe_allow_html=True)
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("🔄 Apply & Re-run Pipeline", type="primary"):
+            if st.session_state.df is None:
+                st.warning("No data loaded.")
+            else:
+                st.session_state.contamination=nc; st.session_state.n_estimators=ne
+                raw2 = pd.read_csv(CSV_PATH) if os.path.exists(CSV_PATH) else st.session_state.df.copy()
+                with st.spinner("Re-running..."):
+                    st.session_state.df, st.session_state.cost_col = run_pipeline(raw2, nc, ne)
+                    uid = st.session_state.user.id if st.session_state.user else "guest"
+                    sb.upsert_audit_log(uid, "Pipeline Configuration", f"Updated sensitivity to {nc} and trees to {ne}.")
+                st.success(f"✅ Done! {st.session_state.df['Fraud_Flag'].sum()} fraud cases detected.")
+                time.sleep(1); st.session_state.page="Home"; st.rerun()
+
+        # ── Technical Reference Guide ──
+        st.markdown(f"""<div class='section-card' style='margin-top:20px; padding:25px;'>
 <div style='font-size:1.2rem; font-weight:800; color:#14532D; margin-bottom:18px; display:flex; align-items:center; gap:10px;'>
 <span style='background:#DCFCE7; width:28px; height:28px; border-radius:6px; display:flex; align-items:center; justify-content:center;'>🔬</span>
 Detection Parameter Guide
@@ -1295,6 +1691,20 @@ Detection Parameter Guide
 </div>
 </div>""", unsafe_allow_html=True)
 
+        # ── Shared API quota (process-wide token buckets) ──
+        with st.expander("📈 Shared API Rate Limits", expanded=False):
+            st.caption("Token buckets shared by every session on this server. Calls wait in line up to "
+                       "RATE_LIMIT_WAIT_S seconds when a bucket is empty instead of failing.")
+            st.dataframe(pd.DataFrame(limits.metrics()), hide_index=True, use_container_width=True)
+
+        # ── What an interaction costs: full script run vs. the fragment that owns it ──
+        with st.expander("⏱️ Rerun Cost by Region", expanded=False):
+            st.caption("Rolling timings of recent runs in this server process. A chat turn, report action or "
+                       "settings change reruns only its own region instead of the full script.")
+            st.dataframe(pd.DataFrame(run_metrics.summary()), hide_index=True, use_container_width=True)
+
+    settings_panel()
+
 # AI Assistant Section follows
 
 # ── PAGE: AI ASSISTANT (CHAT)
@@ -1319,86 +1729,128 @@ elif st.session_state.page == "Chat":
     </div>
     """, unsafe_allow_html=True)
 
-    # Message Container
-    chat_container = st.container()
-    
-    with chat_container:
-        # Render History
-        for role, msg in st.session_state.chat_history:
-            c1, c2 = st.columns([1, 1])
-            if role == "You":
-                with c2: # Right Side
-                    with st.chat_message("user"):
-                        st.markdown(f"<div style='font-size:1.1rem; color:#1F2937; background:#F3F4F6; padding:12px; border-radius:12px; border-right:4px solid #4B5563;'>{msg}</div>", unsafe_allow_html=True)
+    USER_BUBBLE = "<div style='font-size:1.1rem; color:#1F2937; background:#F3F4F6; padding:12px; border-radius:12px; border-right:4px solid #4B5563;'>{}</div>"
+    BOT_BUBBLE  = "<div style='font-size:1.1rem; color:#1F2937; background:#DCFCE7; padding:12px; border-radius:12px; border-left:4px solid #16A34A;'>{}</div>"
+
+    def latency_caption(m):
+        """Time-to-first-token / total latency under an assistant reply."""
+        if not m:
+            return
+        bits = []
+        if m.get("status") == "local":
+            st.caption(f"⚡ computed from loaded claims in {m['total_s'] * 1000:.0f} ms")
+            return
+        if m.get("ttft_s") is not None:  bits.append(f"first token {m['ttft_s']:.2f}s")
+        if m.get("total_s") is not None: bits.append(f"{m['total_s']:.2f}s total")
+        if m.get("status", "ok") != "ok": bits.append(m["status"])
+        st.caption("⚡ " + " · ".join(bits))
+
+    def render_turn(i, role, msg):
+        c1, c2 = st.columns([1, 1])
+        if role == "You":
+            with c2: # Right Side
+                with st.chat_message("user"):
+                    st.markdown(USER_BUBBLE.format(msg), unsafe_allow_html=True)
+        else:
+            with c1: # Left Side
+                with st.chat_message("assistant", avatar="🤖"):
+                    st.markdown(BOT_BUBBLE.format(msg), unsafe_allow_html=True)
+                    latency_caption(st.session_state.chat_metrics.get(i))
+
+    # A chat turn reruns only this canvas, not the rest of the app
+    @timed_fragment("chat")
+    def chat_canvas():
+        # Message Container (filled after the input is read, so it still sits above it)
+        chat_container = st.container()
+
+        # Dedicated Bottom Input
+        user_input = st.chat_input("Query the forensic database...")
+
+        pending = None
+        if user_input:
+            # Step 3B: AI Assistant Limit (10 per minute)
+            if not limiter.is_allowed("ai_query", limit=10):
+                limiter.show_error()
+                user_input = None
             else:
-                with c1: # Left Side
-                    with st.chat_message("assistant", avatar="🤖"):
-                        st.markdown(f"<div style='font-size:1.1rem; color:#1F2937; background:#DCFCE7; padding:12px; border-radius:12px; border-left:4px solid #16A34A;'>{msg}</div>", unsafe_allow_html=True)
+                st.session_state.chat_history.append(("You", user_input))
+
+                # Aggregate / filter questions are answered exactly from the loaded claims, no LLM call
+                local = answer_question(user_input, st.session_state.df, st.session_state.cost_col)
+                if local is not None:
+                    st.session_state.chat_history.append(("Bot", local.text))
+                    st.session_state.chat_metrics[len(st.session_state.chat_history) - 1] = {
+                        "status": "local", "total_s": round(local.elapsed_ms / 1000, 4)}
+                else:
+                    pending = user_input
 
-    # Dedicated Bottom Input
-    user_input = st.chat_input("Query the forensic database...")
+        with chat_container:
+            # Render History (including the message just sent)
+            for i, (role, msg) in enumerate(st.session_state.chat_history):
+                render_turn(i, role, msg)
 
-    if user_input:
-        # Step 3B: AI Assistant Limit (10 per minute)
-        if not limiter.is_allowed("ai_query", limit=10):
-            limiter.show_error()
-            st.stop()
+            if pending is None:
+                return
 
-        st.session_state.chat_history.append(("You", user_input))
-        
-        # Manually render the user message immediately so it's visible while AI thinks
-        with chat_container:
-            c1, c2 = st.columns([1, 1])
-            with c2:
-                with st.chat_message("user"):
-                    st.markdown(f"<div style='font-size:1.1rem; color:#1F2937; background:#F3F4F6; padding:12px; border-radius:12px; border-right:4px solid #4B5563;'>{user_input}</div>", unsafe_allow_html=True)
-            
             # Show "Thinking" status locally
             with st.spinner("🧠 MedShield AI is analyzing forensic patterns..."):
-                # ── Fetch Live Context from Supabase ──
-                frauds_df = sb.fetch_detected_frauds(user_id=st.session_state.uid)
-                
-                # Prepare contextual data for the AI
-                if not frauds_df.empty:
-                    top_cases = frauds_df.head(5).to_dict(orient="records")
-                    fraud_types = frauds_df["Fraud_Type"].value_counts().to_dict()
-                    total_value = fmt_crore(frauds_df["Final_Billed_Amount"].sum())
-                    
-                    context = (
-                        f"You are the MedShield AI Forensic Auditor. The current audit queue has {len(frauds_df)} cases "
-                        f"with a total suspicious value of {total_value}. "
-                        f"Common patterns: {fraud_types}. "
-                        f"Top cases: {top_cases}. "
-                        "Answer accurately and clinically."
-                    )
-                else:
-                    context = "You are the MedShield AI Forensic Auditor. No fraud cases in queue."
-
-                # ── Generate Response via OpenAI ──
-                if _ai_client:
-                    try:
-                        messages = [{"role": "system", "content": context}]
-                        for role, msg in st.session_state.chat_history[-6:]:
-                            r = "user" if role == "You" else "assistant"
-                            messages.append({"role": r, "content": msg})
-                        
-                        resp = _ai_client.chat.completions.create(
-                            model="gpt-4",
-                            messages=messages,
-                            temperature=0.7
-                        )
-                        reply = resp.choices[0].message.content
-                    except Exception as e:
-                        reply = f"System error: {str(e)}."
-                else:
-                    responses = {
-                        "ghost": "Ghost Billing is when a hospital bills for a patient who was never admitted.",
-                        "upcode": "Up-coding involves inflating reimbursement rates.",
-                        "data": f"Currently, I see {len(frauds_df)} critical cases in the cloud database."
-                    }
-                    msg_lower = user_input.lower()
-                    reply = next((v for k, v in responses.items() if k in msg_lower),
-                                 f"Forensic DB indicates {len(frauds_df)} investigations pending. Configure OpenAI or use specific keywords.")
+                # ── Compact, token-budgeted context (cached between turns) ──
+                chat_ctx   = get_chat_context(sb)
+                n_cases    = chat_ctx.summary(st.session_state.uid)["cases"]
+                context    = chat_ctx.system_prompt(st.session_state.uid, question=pending)
+
+            # ── Stream the response via OpenAI ──
+            ai_client = get_ai_client()
+            if ai_client:
+                messages = [{"role": "system", "content": context}]
+                for role, msg in st.session_state.chat_history[-6:]:
+                    r = "user" if role == "You" else "assistant"
+                    messages.append({"role": r, "content": msg})
+
+                c1, c2 = st.columns([1, 1])
+                with c1:
+                    with st.chat_message("assistant", avatar="🤖"):
+                        bubble    = st.empty()
+                        stop_slot = st.empty()
+                        # Any click reruns the canvas, which interrupts the loop below → stream.close()
+                        stop_slot.button("⏹ Stop generating", key="chat_stop")
+                        stream = ChatStream(ai_client, messages, model="gpt-4", temperature=0.7,
+                                            timeout=CHAT_TIMEOUT_S, idle_timeout=CHAT_IDLE_TIMEOUT_S)
+                        try:
+                            last_paint = 0.0
+                            for _ in stream:
+                                if time.perf_counter() - last_paint > .05:
+                                    bubble.markdown(BOT_BUBBLE.format(stream.text + " ▌"), unsafe_allow_html=True)
+                                    last_paint = time.perf_counter()
+                        finally:
+                            stream.close()
+                            if stream.status == "busy":
+                                reply = "The assistant is busy with other investigators right now — please retry in a moment."
+                            elif stream.status == "error" and not stream.text:
+                                reply = f"System error: {stream.error}."
+                            elif stream.status == "timeout" and not stream.text:
+                                reply = f"No response within {CHAT_IDLE_TIMEOUT_S:.0f}s — please try again."
+                            else:
+                                reply = stream.text + {"timeout": " (timed out)", "cancelled": " (stopped)"}.get(stream.status, "")
+                            st.session_state.chat_history.append(("Bot", reply))
+                            st.session_state.chat_metrics[len(st.session_state.chat_history) - 1] = stream.metrics()
+                            print(f"[Chat] {stream.status} ttft={stream.ttft} total={stream.total} chars={len(stream.text)}")
+                        stop_slot.empty()
+                        bubble.markdown(BOT_BUBBLE.format(reply), unsafe_allow_html=True)
+                        latency_caption(stream.metrics())
+            else:
+                responses = {
+                    "ghost": "Ghost Billing is when a hospital bills for a patient who was never admitted.",
+                    "upcode": "Up-coding involves inflating reimbursement rates.",
+                    "data": f"Currently, I see {n_cases} critical cases in the cloud database."
+                }
+                msg_lower = pending.lower()
+                reply = next((v for k, v in responses.items() if k in msg_lower),
+                             f"Forensic DB indicates {n_cases} investigations pending. Configure OpenAI or use specific keywords.")
 
                 st.session_state.chat_history.append(("Bot", reply))
-                st.rerun()
+                render_turn(len(st.session_state.chat_history) - 1, "Bot", reply)
+
+    chat_canvas()
+
+run_metrics.record(FULL_SCRIPT, time.perf_counter() - _script_t0)
@@ -0,0 +1,188 @@
+"""
+case_grid.py — One-iframe, client-side card grid for flagged cases
+──────────────────────────────────────────────────────────────────
+Rendering each case through its own st.components.v1.html() costs one
+iframe per card.  case_grid_html() instead packs the cases into a compact
+JSON payload (field list + row arrays) and returns a single HTML document
+whose script draws a paginated 3-column grid in the browser.  Sorting,
+searching and filtering by Fraud_Type and risk happen there too, so none of
+them triggers a Streamlit rerun.
+
+  html = case_grid_html(frauds_df, page_size=9)
+  st.components.v1.html(html, height=grid_height(9), scrolling=True)
+"""
+
+import json
+import math
+
+import pandas as pd
+
+GRID_FIELDS  = ("PatientID", "Age", "Primary_Diagnosis", "Final_Billed_Amount",
+                "Risk_Score", "Fraud_Type", "Investigation_Status", "AI_Justification")
+GRID_COLUMNS = 3
+CARD_HEIGHT  = 440          # px per grid row, card + gap
+CHROME_PX    = 130          # toolbar + pager
+DEFAULT_AI   = "Risk pattern detected. Manual verification required."
+
+
+def _cell(value):
+    """JSON-safe, compact cell: NaN → None, whole floats → int."""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        return int(value) if value.is_integer() else round(value, 3)
+    if isinstance(value, (bool, int)):
+        return value
+    if hasattr(value, "item"):                      # numpy scalar
+        return _cell(value.item())
+    return str(value).strip().replace("\n", " ")
+
+
+def grid_payload(frauds_df: pd.DataFrame, cost_col: str = "Final_Billed_Amount") -> dict:
+    """{"f": field names, "r": one list per case} — keys are written once, not per row."""
+    if frauds_df is None or frauds_df.empty:
+        return {"f": list(GRID_FIELDS), "r": []}
+    df   = frauds_df.rename(columns={cost_col: "Final_Billed_Amount"}) if cost_col != "Final_Billed_Amount" else frauds_df
+    cols = [c for c in GRID_FIELDS if c in df.columns]
+    rows = [[_cell(v) for v in rec] for rec in df[cols].itertuples(index=False, name=None)]
+    return {"f": cols, "r": rows}
+
+
+def grid_height(page_size: int, n_cases: int = None) -> int:
+    """Iframe height that fits one page of cards without inner scrolling."""
+    shown = page_size if n_cases is None else max(1, min(page_size, n_cases))
+    return CHROME_PX + math.ceil(shown / GRID_COLUMNS) * CARD_HEIGHT
+
+
+def case_grid_html(frauds_df: pd.DataFrame, page_size: int = 9,
+                   cost_col: str = "Final_Billed_Amount") -> str:
+    """Self-contained HTML for the whole grid; the cases travel as one JSON blob."""
+    payload = json.dumps(grid_payload(frauds_df, cost_col), ensure_ascii=False,
+                         separators=(",", ":")).replace("</", "<\\/")
+    return (_TEMPLATE
+            .replace("__PAYLOAD__", payload)
+            .replace("__PAGE_SIZE__", str(int(page_size)))
+            .replace("__DEFAULT_AI__", json.dumps(DEFAULT_AI)))
+
+
+_TEMPLATE = r"""<!doctype html>
+<html><head><meta charset="utf-8">
+<style>
+  body   { margin:0; font-family:sans-serif; background:transparent; }
+  .bar   { display:flex; flex-wrap:wrap; gap:10px; align-items:center; margin:0 0 14px; }
+  .bar input, .bar select { font-size:.85rem; padding:6px 10px; border:1px solid #D1D5DB; border-radius:8px; background:#fff; color:#14532D; }
+  .bar input { flex:1; min-width:160px; }
+  .count { font-size:.85rem; color:#6B7280; font-weight:700; }
+  .grid  { display:grid; grid-template-columns:repeat(3, minmax(0, 1fr)); gap:16px; }
+  .card  { background:#fff; border:1px solid #E5E7EB; border-left:5px solid #DC2626; border-radius:12px; padding:20px;
+           box-shadow:0 4px 12px rgba(22,163,74,0.05); height:384px; overflow:hidden; }
+  .top   { display:flex; justify-content:space-between; align-items:flex-start; margin-bottom:15px; }
+  .lbl   { font-size:.7rem; font-weight:700; color:#6B7280; }
+  .pid   { font-size:1.1rem; font-weight:800; color:#14532D; }
+  .risk  { background:#DC2626; color:#fff; font-size:.7rem; font-weight:800; padding:2px 10px; border-radius:12px; }
+  .type  { font-size:.72rem; color:#9A3412; font-weight:700; margin-top:6px; text-align:right; }
+  .box   { background:#F9FAFB; border-radius:8px; padding:12px; border:1px solid #F3F4F6; margin-bottom:15px; }
+  .diag  { font-size:.85rem; font-weight:700; color:#14532D; white-space:nowrap; overflow:hidden; text-overflow:ellipsis; }
+  .row   { display:flex; justify-content:space-between; margin-top:8px; }
+  .val   { font-size:.9rem; font-weight:700; color:#14532D; }
+  .amt   { font-size:.9rem; font-weight:700; color:#DC2626; }
+  .aih   { font-size:.75rem; color:#16A34A; font-weight:800; text-transform:uppercase; margin-bottom:5px; }
+  .ai    { font-size:.85rem; color:#1F2937; line-height:1.5; background:#DCFCE7; padding:10px; border-radius:8px;
+           border-left:3px solid #16A34A; height:140px; overflow-y:auto; }
+  .pager { display:flex; justify-content:center; align-items:center; gap:12px; margin-top:16px; }
+  .pager button { font-size:.85rem; font-weight:700; padding:6px 16px; border-radius:8px; border:1px solid #16A34A;
+                  background:#fff; color:#16A34A; cursor:pointer; }
+  .pager button:disabled { opacity:.4; cursor:default; }
+  .empty { color:#6B7280; font-size:.95rem; padding:30px 0; text-align:center; grid-column:1 / -1; }
+</style></head>
+<body>
+<div class="bar">
+  <input id="q" type="search" placeholder="Search Patient ID, diagnosis or explanation…">
+  <select id="type"><option value="">All fraud types</option></select>
+  <select id="risk">
+    <option value="0">Any risk</option><option value="0.5">Risk ≥ 50%</option>
+    <option value="0.7">Risk ≥ 70%</option><option value="0.9">Risk ≥ 90%</option>
+  </select>
+  <select id="sort">
+    <option value="risk-desc">Highest risk</option><option value="risk-asc">Lowest risk</option>
+    <option value="amt-desc">Highest amount</option><option value="type-asc">Fraud type</option>
+    <option value="pid-asc">Patient ID</option>
+  </select>
+  <span class="count" id="count"></span>
+</div>
+<div class="grid" id="grid"></div>
+<div class="pager">
+  <button id="prev">← Prev</button><span class="count" id="page"></span><button id="next">Next →</button>
+</div>
+<script>
+const DATA = __PAYLOAD__, PAGE = __PAGE_SIZE__, DEFAULT_AI = __DEFAULT_AI__;
+const F = Object.fromEntries(DATA.f.map((k, i) => [k, i]));
+const get = (r, k) => (k in F ? r[F[k]] : null);
+const esc = s => String(s ?? "").replace(/[&<>"']/g, c => ({"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;","'":"&#39;"}[c]));
+const num = v => (typeof v === "number" ? v : parseFloat(v) || 0);
+const inr = new Intl.NumberFormat("en-IN", {maximumFractionDigits: 0});
+const rows = DATA.r.map(r => ({r, hay: [get(r,"PatientID"), get(r,"Primary_Diagnosis"), get(r,"Fraud_Type"),
+                                        get(r,"AI_Justification")].join(" ").toLowerCase()}));
+const $ = id => document.getElementById(id);
+
+[...new Set(rows.map(x => get(x.r, "Fraud_Type")).filter(Boolean))].sort().forEach(t => {
+  const o = document.createElement("option"); o.value = o.textContent = t; $("type").appendChild(o);
+});
+
+const SORTS = {
+  "risk-desc": (a, b) => num(get(b,"Risk_Score")) - num(get(a,"Risk_Score")),
+  "risk-asc":  (a, b) => num(get(a,"Risk_Score")) - num(get(b,"Risk_Score")),
+  "amt-desc":  (a, b) => num(get(b,"Final_Billed_Amount")) - num(get(a,"Final_Billed_Amount")),
+  "type-asc":  (a, b) => String(get(a,"Fraud_Type") ?? "").localeCompare(String(get(b,"Fraud_Type") ?? "")),
+  "pid-asc":   (a, b) => String(get(a,"PatientID")).localeCompare(String(get(b,"PatientID")), undefined, {numeric: true}),
+};
+
+let view = [], page = 0;
+
+function card(r) {
+  const risk = Math.round(num(get(r, "Risk_Score")) * 100);
+  return `<div class="card">
+    <div class="top"><div><div class="lbl" style="color:#DC2626;text-transform:uppercase;">Patient ID</div>
+      <div class="pid">${esc(get(r,"PatientID") ?? "—")}</div></div>
+      <div style="text-align:right;"><span class="risk">${risk}% RISK</span>
+      <div class="type">${esc(get(r,"Fraud_Type") || "Anomalous")}</div></div></div>
+    <div class="box"><div class="lbl">DIAGNOSIS</div><div class="diag">${esc(get(r,"Primary_Diagnosis") ?? "—")}</div>
+      <div class="row"><div><div class="lbl">AGE</div><div class="val">${esc(get(r,"Age") ?? "—")} yrs</div></div>
+      <div><div class="lbl" style="text-align:right;">AMOUNT</div><div class="amt">&#8377;${inr.format(num(get(r,"Final_Billed_Amount")))}</div></div></div></div>
+    <div><div class="aih">&#129302; AI Justification</div>
+      <div class="ai">${esc(get(r,"AI_Justification") || DEFAULT_AI)}</div></div>
+  </div>`;
+}
+
+function apply() {
+  const q = $("q").value.trim().toLowerCase(), type = $("type").value, min = parseFloat($("risk").value);
+  view = rows.filter(x => (!q || x.hay.includes(q))
+                       && (!type || get(x.r, "Fraud_Type") === type)
+                       && num(get(x.r, "Risk_Score")) >= min).map(x => x.r);
+  view.sort(SORTS[$("sort").value]);
+  page = 0;
+  draw();
+}
+
+function draw() {
+  const pages = Math.max(1, Math.ceil(view.length / PAGE));
+  page = Math.min(page, pages - 1);
+  const slice = view.slice(page * PAGE, (page + 1) * PAGE);
+  $("grid").innerHTML = slice.length ? slice.map(card).join("") : `<div class="empty">No cases match these filters.</div>`;
+  $("count").textContent = `${view.length.toLocaleString()} of ${rows.length.toLocaleString()} cases`;
+  $("page").textContent = `Page ${page + 1} of ${pages}`;
+  $("prev").disabled = page === 0;
+  $("next").disabled = page >= pages - 1;
+}
+
+let t;
+$("q").addEventListener("input", () => { clearTimeout(t); t = setTimeout(apply, 120); });
+["type", "risk", "sort"].forEach(id => $(id).addEventListener("change", apply));
+$("prev").addEventListener("click", () => { page--; draw(); });
+$("next").addEventListener("click", () => { page++; draw(); });
+apply();
+</script>
+</body></html>
+"""
@@ -0,0 +1,146 @@
+"""
+chat_context.py — Cached, token-budgeted system prompt for the Chat page
+────────────────────────────────────────────────────────────────────────
+The assistant needs a picture of the investigation queue, not the queue
+itself.  ChatContextBuilder keeps one compact summary per user (counts,
+value, mix by fraud type and status, and pre-rendered one-line case
+digests of the highest-risk cases) and rebuilds it only when the backend's
+frauds_version() changes or CHAT_CONTEXT_TTL_S passes.  system_prompt()
+then packs as many case lines as fit the token budget, so prompt size
+stays flat as the queue grows.  Given the user's question, the cases a
+per-user FraudIndex (retrieval.py) finds most relevant are packed first.
+Summaries and indexes are kept for the CHAT_CONTEXT_USERS most recently
+active users; an evicted user's are rebuilt on their next question.
+
+  ctx    = ChatContextBuilder(sb, token_budget=1200)
+  prompt = ctx.system_prompt(uid, question="why is hospital 500012 flagged?")
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from llm_runner import estimate_tokens
+from retrieval import FraudIndex
+
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1200"))
+CHAT_RETRIEVE_K     = int(os.getenv("CHAT_RETRIEVE_K", "5"))
+CHAT_CONTEXT_USERS  = int(os.getenv("CHAT_CONTEXT_USERS", "200"))
+CHAT_CONTEXT_TTL_S  = 600       # also catch changes made by other processes
+DIGEST_CASES        = 50        # pre-rendered highest-risk cases per user
+JUSTIFICATION_CHARS = 160
+
+PERSONA = "You are the MedShield AI Forensic Auditor. Answer accurately and clinically."
+
+
+def _crore(amount: float) -> str:
+    return f"₹{amount / 1e7:.2f} Cr" if amount >= 1e7 else f"₹{amount / 1e5:.2f} L"
+
+
+def case_line(row: dict) -> str:
+    """One compact, prompt-friendly line with only the fields the assistant needs."""
+    parts = [str(row.get("PatientID", "?")), str(row.get("Fraud_Type", "") or "Anomalous Pattern")]
+    amt = pd.to_numeric(row.get("Final_Billed_Amount"), errors="coerce")
+    if pd.notna(amt):
+        parts.append(f"₹{amt:,.0f}")
+    risk = pd.to_numeric(row.get("Risk_Score"), errors="coerce")
+    if pd.notna(risk):
+        parts.append(f"risk {risk:.2f}")
+    for label, col in (("Dx", "Primary_Diagnosis"), ("Hospital", "Hospital_PIN"), ("Status", "Investigation_Status")):
+        val = row.get(col)
+        if val is not None and pd.notna(val) and str(val).strip():
+            parts.append(f"{label}: {str(val).strip()}")
+    why = str(row.get("AI_Justification", "") or "").strip().replace("\n", " ")
+    if why:
+        parts.append("why: " + (why[:JUSTIFICATION_CHARS] + "…" if len(why) > JUSTIFICATION_CHARS else why))
+    return " | ".join(parts)
+
+
+def summarize_frauds(frauds_df: pd.DataFrame) -> dict:
+    """Queue totals plus digests of the top DIGEST_CASES cases by risk."""
+    if frauds_df is None or frauds_df.empty:
+        return {"cases": 0, "total_amount": 0.0, "by_type": {}, "by_status": {}, "digests": []}
+    amount = pd.to_numeric(frauds_df.get("Final_Billed_Amount", pd.Series(dtype=float)), errors="coerce")
+    status = frauds_df.get("Investigation_Status", pd.Series("Pending", index=frauds_df.index)).fillna("Pending")
+    top    = (frauds_df.sort_values("Risk_Score", ascending=False) if "Risk_Score" in frauds_df.columns
+              else frauds_df).head(DIGEST_CASES)
+    return {
+        "cases":        int(len(frauds_df)),
+        "total_amount": float(amount.sum()),
+        "by_type":      frauds_df["Fraud_Type"].value_counts().to_dict() if "Fraud_Type" in frauds_df.columns else {},
+        "by_status":    status.value_counts().to_dict(),
+        "digests":      [case_line(r) for r in top.to_dict("records")],
+    }
+
+
+def render_prompt(summary: dict, token_budget: int = CHAT_CONTEXT_TOKENS, extra_lines: list = ()) -> str:
+    """Header + case lines (extra_lines, e.g. retrieved cases, first) until the token budget is used."""
+    if not summary["cases"]:
+        return PERSONA + " No fraud cases in queue."
+    header = (
+        f"{PERSONA} The current audit queue has {summary['cases']:,} cases with a total suspicious "
+        f"value of {_crore(summary['total_amount'])}. "
+        f"By fraud type: {', '.join(f'{k} {v}' for k, v in summary['by_type'].items())}. "
+        f"By status: {', '.join(f'{k} {v}' for k, v in summary['by_status'].items())}.\n"
+        "Cases (PatientID | type | amount | risk | details):"
+    )
+    used, lines = estimate_tokens(header), []
+    for line in dict.fromkeys([*extra_lines, *summary["digests"]]):
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return header + "\n" + "\n".join(lines)
+
+
+class ChatContextBuilder:
+    def __init__(self, backend, token_budget: int = CHAT_CONTEXT_TOKENS, max_users: int = None):
+        self.backend      = backend
+        self.token_budget = token_budget
+        self.max_users    = CHAT_CONTEXT_USERS if max_users is None else max_users
+        self._users       = OrderedDict()   # uid → [FraudIndex, (frauds_version, built_at, summary)], LRU first
+        self._lock        = threading.Lock()
+
+    def _entry(self, user_id: str) -> list:
+        """The user's index and cached summary (evicted together, so they always agree)."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = [FraudIndex(), None]
+            self._users.move_to_end(user_id)
+            while self.max_users > 0 and len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return entry
+
+    def _index(self, user_id: str) -> FraudIndex:
+        return self._entry(user_id)[0]
+
+    def summary(self, user_id: str) -> dict:
+        """Compact queue summary, refetched only after detected_frauds changed."""
+        version = self.backend.frauds_version()
+        entry   = self._entry(user_id)
+        hit     = entry[1]
+        if hit and hit[0] == version and time.time() - hit[1] < CHAT_CONTEXT_TTL_S:
+            return hit[2]
+        frauds  = self.backend.fetch_detected_frauds(user_id=user_id)
+        summary = summarize_frauds(frauds)
+        entry[0].sync(frauds)                       # re-indexes only new / changed cases
+        entry[1] = (version, time.time(), summary)
+        return summary
+
+    def index_frauds(self, user_id: str, frauds_df) -> int:
+        """Add freshly upserted cases to the retrieval index right away."""
+        return self._index(user_id).upsert(frauds_df)
+
+    def retrieve(self, user_id: str, question: str, k: int = CHAT_RETRIEVE_K) -> list:
+        self.summary(user_id)
+        return self._index(user_id).search(question, k)
+
+    def system_prompt(self, user_id: str, question: str = None) -> str:
+        summary = self.summary(user_id)
+        extra   = [case_line(c) for c in self._index(user_id).search(question, CHAT_RETRIEVE_K)] if question else []
+        return render_prompt(summary, self.token_budget, extra)
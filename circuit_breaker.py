@@ -0,0 +1,154 @@
+"""
+circuit_breaker.py — Fast-fail guard for remote calls on the render path
+────────────────────────────────────────────────────────────────────────
+A CircuitBreaker runs each remote request under a latency budget.  After
+`failure_threshold` consecutive failures (errors or budget overruns) it
+OPENS: further calls fail immediately with CircuitOpenError instead of
+waiting for the client timeout, and a background thread probes the service
+every `reset_timeout` seconds (doubling up to `max_reset_timeout`).  The
+first successful probe CLOSES the breaker and fires the on_recover hooks.
+
+  breaker = CircuitBreaker("supabase", probe=lambda: client.table("claims").select("PatientID").limit(1).execute())
+  resp    = breaker.run(query.execute, budget=5.0)
+
+Callers that swallow errors can still tell a degraded call apart with
+breaker.begin() / breaker.failed_in_call() (thread-local).  Pass
+`is_failure` to count only outages: an error it rejects (a 4xx, a schema
+error) is re-raised to the caller without tripping the breaker or marking
+the call degraded — the service answered.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+CLOSED, OPEN = "closed", "open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the remote service while the breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3,
+                 reset_timeout: float = 30.0, max_reset_timeout: float = 300.0,
+                 probe=None, max_workers: int = 8, is_failure=None):
+        self.name              = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probe             = probe
+        self.is_failure        = is_failure or (lambda e: True)
+        self.state             = CLOSED
+        self.failures          = 0
+        self.opened_at         = None
+        self.stats             = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "opens": 0}
+        self._lock       = threading.Lock()
+        self._local      = threading.local()
+        self._hooks      = []
+        self._prober     = None
+        self._pool       = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-call")
+        self._probe_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-probe-call")
+
+    # ── state ────────────────────────────────────────────────
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def on_recover(self, *hooks) -> None:
+        """Register callables run (in the probe thread) when the breaker closes again."""
+        self._hooks.extend(hooks)
+
+    def begin(self) -> None:
+        self._local.failed = False
+
+    def degrade(self) -> None:
+        """Flag the current call as degraded without counting it as a service failure."""
+        self._local.failed = True
+
+    def failed_in_call(self) -> bool:
+        return getattr(self._local, "failed", False)
+
+    def snapshot(self) -> dict:
+        return {"name": self.name, "state": self.state, "consecutive_failures": self.failures,
+                "opened_at": self.opened_at, **self.stats}
+
+    # ── calls ────────────────────────────────────────────────
+    def run(self, fn, *args, budget: float = None, **kwargs):
+        """Call fn(*args, **kwargs), failing fast when open or slower than `budget` seconds."""
+        if self.state == OPEN:
+            self._count("rejected")
+            self._local.failed = True
+            raise CircuitOpenError(f"[{self.name}] circuit open — serving degraded data")
+        self._count("calls")
+        try:
+            if budget:
+                future = self._pool.submit(fn, *args, **kwargs)
+                try:
+                    result = future.result(timeout=budget)
+                except FutureTimeout:
+                    self._count("timeouts")
+                    raise TimeoutError(f"[{self.name}] call exceeded {budget:.1f}s budget")
+            else:
+                result = fn(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        self._record_success()
+        return result
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def _record_failure(self) -> None:
+        self._local.failed = True
+        with self._lock:
+            self.stats["failures"] += 1
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.failure_threshold:
+                self.state     = OPEN
+                self.opened_at = time.time()
+                self.stats["opens"] += 1
+                print(f"[{self.name}] circuit OPEN after {self.failures} consecutive failures")
+                self._start_prober()
+
+    # ── recovery ─────────────────────────────────────────────
+    def _start_prober(self) -> None:
+        if self._prober is not None and self._prober.is_alive():
+            return
+        self._prober = threading.Thread(target=self._probe_loop, name=f"{self.name}-probe", daemon=True)
+        self._prober.start()
+
+    def _probe_loop(self) -> None:
+        """Probes run on their own one-worker pool: during an outage the call pool
+        fills with requests stuck until the client timeout, and a probe queued
+        behind them would delay recovery.  A probe that overran is awaited again
+        on the next round instead of stacking another one behind it."""
+        wait, pending = self.reset_timeout, None
+        while True:
+            time.sleep(wait)
+            try:
+                if self.probe is not None:
+                    if pending is None or pending.done():
+                        pending = self._probe_pool.submit(self.probe)
+                    pending.result(timeout=max(self.reset_timeout, 1.0))
+            except Exception:
+                wait = min(wait * 2, self.max_reset_timeout)
+                continue
+            with self._lock:
+                self.state, self.failures, self.opened_at = CLOSED, 0, None
+            print(f"[{self.name}] circuit CLOSED — service recovered")
+            for hook in self._hooks:
+                try:
+                    hook()
+                except Exception as e:
+                    print(f"[{self.name}] recover hook error: {e}")
+            return
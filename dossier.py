@@ -0,0 +1,268 @@
+"""
+dossier.py — Background PDF audit dossiers with a content-hash cache
+────────────────────────────────────────────────────────────────────
+Builds one PDF per hospital (Hospital_PIN) or per case from detected_frauds
+rows.  Rendering runs in a small worker pool so the Streamlit script never
+waits on it, and every PDF is stored under the SHA-256 of the exact case
+content it was built from: asking again for an unchanged hospital or case
+returns the cached file, and any edit (status, explanation, amount …)
+produces a new hash and therefore a fresh render.
+
+  svc   = DossierService()
+  jobs  = [svc.request(label, cases) for label, cases in group_cases(frauds_df, "hospital").items()]
+
+  # or straight from the queue, page by page, without holding all of it:
+  index_groups(iter_frauds(sb, uid), "hospital")             → {"Hospital 500014": 12, ...}
+  collect_groups(iter_frauds(sb, uid), "hospital", picks)    → {label: case records} for picks only
+  svc.status(jobs[0])  → "pending" | "ready" | "failed"
+  svc.path(jobs[0])    → .dossier_cache/<hash>.pdf once ready
+
+Every edit leaves the previous PDF behind, so files unused for
+DOSSIER_TTL_DAYS are pruned when the service starts (and every
+PRUNE_EVERY renders), then the least recently used beyond DOSSIER_MAX_FILES.
+
+Needs fpdf2 (pip install fpdf2); without it dossier_available() is False
+and the Report page hides the feature.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import importlib.util
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+DOSSIER_DIR       = os.getenv("DOSSIER_DIR", ".dossier_cache")
+DOSSIER_WORKERS   = int(os.getenv("DOSSIER_WORKERS", "2"))
+DOSSIER_TTL_DAYS  = float(os.getenv("DOSSIER_TTL_DAYS", "7"))
+DOSSIER_MAX_FILES = int(os.getenv("DOSSIER_MAX_FILES", "2000"))
+PRUNE_EVERY       = 100        # renders between cache prunes
+RENDER_VERSION    = "1"        # bump when the layout changes to invalidate old files
+
+DOSSIER_FIELDS = ("PatientID", "Hospital_PIN", "Age", "Primary_Diagnosis", "Final_Billed_Amount",
+                  "Risk_Score", "Fraud_Type", "Investigation_Status", "AI_Justification")
+SCOPES = {"hospital": "Hospital_PIN", "case": "PatientID"}
+
+
+def dossier_available() -> bool:
+    return importlib.util.find_spec("fpdf") is not None      # imported only when a PDF is rendered
+
+
+# ═══════════════════════════════════════════════════════════════
+#  GROUPING & HASHING
+# ═══════════════════════════════════════════════════════════════
+def _records(cases) -> list:
+    """Dossier fields of each case, nulls as None, in PatientID order."""
+    if not isinstance(cases, pd.DataFrame):
+        return sorted(cases, key=lambda r: str(r.get("PatientID")))
+    cols = [c for c in DOSSIER_FIELDS if c in cases.columns]
+    df   = cases[cols].astype(object).where(cases[cols].notna(), None)
+    return sorted(df.to_dict("records"), key=lambda r: str(r.get("PatientID")))
+
+
+def _label(rec: dict, scope: str) -> str:
+    v   = rec.get(SCOPES[scope])
+    key = ("Unknown" if v is None else
+           str(int(v)) if isinstance(v, float) and v.is_integer() else str(v))
+    return ("Hospital " if scope == "hospital" else "Case ") + key
+
+
+def group_cases(frauds_df: pd.DataFrame, scope: str = "hospital") -> dict:
+    """{label: case records} — one entry per hospital PIN or per PatientID."""
+    if frauds_df is None or frauds_df.empty:
+        return {}
+    groups = {}
+    for rec in _records(frauds_df):                 # one pandas pass, then plain dicts
+        groups.setdefault(_label(rec, scope), []).append(rec)
+    return dict(sorted(groups.items()))
+
+
+def index_groups(chunks, scope: str = "hospital") -> dict:
+    """{label: case count} over pages of the queue; the cases themselves are not kept."""
+    counts = {}
+    for chunk in chunks:
+        for rec in _records(chunk):
+            label = _label(rec, scope)
+            counts[label] = counts.get(label, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def collect_groups(chunks, scope: str, labels) -> dict:
+    """group_cases() restricted to `labels`, keeping only those cases while paging."""
+    wanted, groups = set(labels), {}
+    for chunk in chunks:
+        for rec in _records(chunk):
+            label = _label(rec, scope)
+            if label in wanted:
+                groups.setdefault(label, []).append(rec)
+    return dict(sorted(groups.items()))
+
+
+def content_hash(label: str, cases) -> str:
+    payload = json.dumps([RENDER_VERSION, label, _records(cases)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════
+#  RENDERING
+# ═══════════════════════════════════════════════════════════════
+def _pdf_text(value) -> str:
+    """Core PDF fonts are Latin-1 only: spell out the rupee sign, drop the rest."""
+    text = "" if value is None else str(value)
+    return text.replace("₹", "Rs. ").encode("latin-1", "ignore").decode("latin-1").strip()
+
+
+def _num(value, default=0.0) -> float:
+    v = pd.to_numeric(value, errors="coerce")
+    return default if pd.isna(v) else float(v)
+
+
+def render_pdf(label: str, cases) -> bytes:
+    from fpdf import FPDF
+    records = sorted(_records(cases), key=lambda r: -_num(r.get("Risk_Score")))
+    total   = sum(_num(r.get("Final_Billed_Amount")) for r in records)
+    avg     = sum(_num(r.get("Risk_Score")) for r in records) / max(1, len(records))
+    by_type = pd.Series([r.get("Fraud_Type") or "Anomalous Pattern" for r in records]).value_counts()
+
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.set_text_color(20, 83, 45)
+    pdf.cell(0, 10, _pdf_text(f"MedShield Audit Dossier - {label}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 9)
+    pdf.set_text_color(107, 114, 128)
+    pdf.cell(0, 6, f"Generated {datetime.now():%d %b %Y %H:%M}", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(3)
+
+    pdf.set_font("Helvetica", "B", 11)
+    pdf.set_text_color(17, 24, 39)
+    pdf.cell(0, 7, "Summary", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 10)
+    for line in (f"Flagged cases: {len(records):,}",
+                 f"Suspicious value: Rs. {total:,.0f}",
+                 f"Average risk: {avg * 100:.0f}%",
+                 "By fraud type: " + ", ".join(f"{k} ({v})" for k, v in by_type.items())):
+        pdf.multi_cell(0, 6, _pdf_text(line), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    for r in records:
+        pdf.set_draw_color(220, 38, 38)
+        pdf.set_font("Helvetica", "B", 11)
+        pdf.set_text_color(20, 83, 45)
+        pdf.cell(0, 7, _pdf_text(f"{r.get('PatientID', '-')}  |  {r.get('Fraud_Type') or 'Anomalous Pattern'}  |  "
+                                 f"{_num(r.get('Risk_Score')) * 100:.0f}% risk"),
+                 border="B", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("Helvetica", "", 9)
+        pdf.set_text_color(55, 65, 81)
+        pdf.multi_cell(0, 5, _pdf_text(
+            f"Diagnosis: {r.get('Primary_Diagnosis') or '-'}   Age: {r.get('Age') or '-'}   "
+            f"Amount: Rs. {_num(r.get('Final_Billed_Amount')):,.0f}   Hospital: {r.get('Hospital_PIN') or '-'}   "
+            f"Status: {r.get('Investigation_Status') or 'Pending'}"), new_x="LMARGIN", new_y="NEXT")
+        why = _pdf_text(r.get("AI_Justification"))
+        if why:
+            pdf.set_text_color(17, 24, 39)
+            pdf.multi_cell(0, 5, "Analysis: " + why, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(3)
+    return bytes(pdf.output())
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SERVICE
+# ═══════════════════════════════════════════════════════════════
+class DossierService:
+    def __init__(self, cache_dir: str = DOSSIER_DIR, workers: int = DOSSIER_WORKERS,
+                 ttl_days: float = None, max_files: int = None):
+        self.cache_dir = cache_dir
+        self.ttl       = (DOSSIER_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_files = DOSSIER_MAX_FILES if max_files is None else max_files
+        self._pool     = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dossier")
+        self._lock     = threading.Lock()
+        self._jobs     = {}        # hash → Future (in flight or failed)
+        self.stats     = {"rendered": 0, "cached": 0, "failed": 0, "pruned": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.prune()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.pdf")
+
+    def request(self, label: str, cases) -> str:
+        """Queue a dossier unless an identical one is cached or already rendering; returns its hash."""
+        digest = content_hash(label, cases)
+        with self._lock:
+            if os.path.exists(self.path(digest)):
+                self._touch(digest)
+                self.stats["cached"] += 1
+                return digest
+            fut = self._jobs.get(digest)
+            if fut is None or (fut.done() and fut.exception() is not None):
+                self._jobs[digest] = self._pool.submit(self._render, digest, label, list(_records(cases)))
+        return digest
+
+    def status(self, digest: str) -> str:
+        if os.path.exists(self.path(digest)):
+            return "ready"
+        with self._lock:
+            fut = self._jobs.get(digest)
+        if fut is None:
+            return "missing"
+        return "failed" if fut.done() and fut.exception() is not None else "pending"
+
+    def _render(self, digest: str, label: str, cases) -> None:
+        try:
+            data = render_pdf(label, cases)
+            tmp  = self.path(digest) + ".part"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(digest))          # readers never see half a file
+            with self._lock:
+                self.stats["rendered"] += 1
+                self._jobs.pop(digest, None)
+                due = self.stats["rendered"] % PRUNE_EVERY == 0
+            if due:
+                self.prune()
+        except Exception as e:
+            print(f"[Dossier] render error for {label}: {e}")
+            with self._lock:
+                self.stats["failed"] += 1
+            raise
+
+    def _touch(self, digest: str) -> None:
+        try:
+            os.utime(self.path(digest))                 # mtime doubles as last use
+        except OSError:
+            pass
+
+    def prune(self) -> int:
+        """Delete PDFs unused for longer than the TTL, then the least recently used
+        beyond max_files (and leftovers of interrupted renders)."""
+        now, pdfs, stale = time.time(), [], []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if name.endswith(".pdf"):
+                pdfs.append((mtime, path))
+            elif name.endswith(".part") and now - mtime > 3600:   # a render that died mid-write
+                stale.append(path)
+        pdfs.sort(reverse=True)                          # most recently used first
+        stale += [p for i, (m, p) in enumerate(pdfs)
+                  if (self.ttl > 0 and now - m > self.ttl) or (self.max_files > 0 and i >= self.max_files)]
+        removed = 0
+        for path in stale:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self.stats["pruned"] += removed
+        if removed:
+            print(f"[Dossier] pruned {removed} cached PDFs")
+        return removed
@@ -0,0 +1,116 @@
+"""
+enrichment.py — Background LLM enrichment of flagged claims
+───────────────────────────────────────────────────────────
+run_pipeline() fills AI_Justification with template text so the dashboard
+never waits on the model.  EnrichmentQueue replaces that text afterwards:
+a single daemon worker takes submitted flagged claims, explains them in
+batches through ExplanationRunner + ExplanationCache, writes each batch to
+detected_frauds (backend.update_ai_justifications) and keeps the new text
+in memory so the Report page can overlay it on already loaded cards.
+
+  queue = EnrichmentQueue(runner, backend, cache)
+  queue.submit(fraud_df, user_id, cost_col)      # returns immediately
+  queue.status(user_id)   → {"queued", "done", "failed", "running", "version"}
+  queue.texts(user_id)    → {PatientID: enriched text}
+
+Only the newest ENRICH_TEXTS_MAX texts per user are kept for that overlay;
+older ones are already in detected_frauds and come back with the next page
+load.
+"""
+
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from llm_runner import build_claim_prompt
+from explain_cache import explain_rows
+
+ENRICH_BATCH_SIZE = int(os.getenv("AI_ENRICH_BATCH", "25"))
+ENRICH_TEXTS_MAX  = int(os.getenv("AI_ENRICH_TEXTS_MAX", "2000"))
+
+
+class EnrichmentQueue:
+    def __init__(self, runner, backend, cache=None, batch_size: int = ENRICH_BATCH_SIZE,
+                 max_texts: int = ENRICH_TEXTS_MAX):
+        self.runner     = runner
+        self.backend    = backend
+        self.cache      = cache
+        self.batch_size = max(1, batch_size)
+        self.max_texts  = max(1, max_texts)
+        self._jobs      = queue.Queue()
+        self._lock      = threading.Lock()
+        self._status    = {}      # uid → counters
+        self._texts     = {}      # uid → OrderedDict {PatientID: text}, newest last
+        self._pending   = {}      # uid → PatientIDs queued or in flight
+        self._worker    = None
+
+    # ── producer side (Streamlit script thread) ──────────────
+    def submit(self, fraud_df, user_id: str, cost_col: str = "Final_Billed_Amount") -> int:
+        """Queue flagged claims not yet enriched for this user; returns how many were queued."""
+        if fraud_df is None or fraud_df.empty or "PatientID" not in fraud_df.columns:
+            return 0
+        uid  = str(user_id or "")
+        with self._lock:
+            done    = self._texts.setdefault(uid, OrderedDict())
+            pending = self._pending.setdefault(uid, set())
+            rows    = [r for r in fraud_df.to_dict("records")
+                       if str(r["PatientID"]) not in done and str(r["PatientID"]) not in pending]
+            if not rows:
+                return 0
+            pending.update(str(r["PatientID"]) for r in rows)
+            st = self._status.setdefault(uid, {"queued": 0, "done": 0, "failed": 0, "running": False, "version": 0})
+            st["queued"] += len(rows)
+            st["running"] = True
+        for i in range(0, len(rows), self.batch_size):
+            self._jobs.put((uid, cost_col, rows[i:i + self.batch_size]))
+        self._ensure_worker()
+        return len(rows)
+
+    def status(self, user_id: str) -> dict:
+        with self._lock:
+            return dict(self._status.get(str(user_id or ""),
+                                         {"queued": 0, "done": 0, "failed": 0, "running": False, "version": 0}))
+
+    def texts(self, user_id: str) -> dict:
+        with self._lock:
+            return dict(self._texts.get(str(user_id or ""), {}))
+
+    # ── worker ───────────────────────────────────────────────
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._loop, name="ai-enrichment", daemon=True)
+            self._worker.start()
+
+    def _loop(self) -> None:
+        while True:
+            uid, cost_col, rows = self._jobs.get()
+            with self._lock:
+                self._status[uid]["running"] = True
+            try:
+                self._enrich(uid, cost_col, rows)
+            except Exception as e:
+                print(f"[Enrichment] batch error: {e}")
+                with self._lock:
+                    self._status[uid]["failed"] += len(rows)
+            finally:
+                with self._lock:
+                    self._pending[uid].difference_update(str(r["PatientID"]) for r in rows)
+                    self._status[uid]["running"] = bool(self._pending[uid])     # this user's work only
+                self._jobs.task_done()
+
+    def _enrich(self, uid: str, cost_col: str, rows: list) -> None:
+        texts = explain_rows(rows, build_claim_prompt, self.runner, self.cache,
+                             cost_col=cost_col, progress=lambda done, total: None)
+        good  = {str(r["PatientID"]): t for r, t in zip(rows, texts) if t and t != self.runner.fallback}
+        if good:
+            self.backend.update_ai_justifications(good, user_id=uid or None)
+        with self._lock:
+            st   = self._status[uid]
+            kept = self._texts[uid]
+            kept.update(good)
+            while len(kept) > self.max_texts:
+                kept.popitem(last=False)
+            st["done"]    += len(good)
+            st["failed"]  += len(rows) - len(good)
+            st["version"] += 1
@@ -0,0 +1,190 @@
+"""
+explain_cache.py — Persistent LLM explanation cache keyed by claim signature
+────────────────────────────────────────────────────────────────────────────
+The explanation prompt only depends on Age, Diagnosis, billed cost, package
+rate, length of stay and Fraud_Type, and many flagged claims are near
+duplicates.  claim_signature() normalises those fields into buckets
+(age decade, cost on a log scale, cost/package ratio, LOS band) so similar
+claims share one cached explanation across runs.
+
+  cache = ExplanationCache()                       # EXPLAIN_CACHE_PATH
+  texts = explain_rows(rows, build_prompt, runner, cache)
+  cache.metrics()  → {"hits", "misses", "hit_rate", "entries", "evicted"}
+
+Entries expire after EXPLAIN_CACHE_TTL_DAYS and the least recently used are
+evicted beyond EXPLAIN_CACHE_MAX_ENTRIES.
+"""
+
+import os
+import math
+import time
+import hashlib
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EXPLAIN_CACHE_PATH = os.getenv("EXPLAIN_CACHE_PATH", "explain_cache.db")
+CACHE_TTL_DAYS     = float(os.getenv("EXPLAIN_CACHE_TTL_DAYS", "30"))
+CACHE_MAX_ENTRIES  = int(os.getenv("EXPLAIN_CACHE_MAX_ENTRIES", "50000"))
+
+LOS_BANDS = ((0, "0"), (1, "1"), (2, "2"), (5, "3-5"), (10, "6-10"), (30, "11-30"))
+
+
+# ══════════════════════════════════════════════════════════════
+#  SIGNATURE
+# ══════════════════════════════════════════════════════════════
+def _num(v, default=0.0) -> float:
+    try:
+        f = float(v)
+        return default if math.isnan(f) else f
+    except (TypeError, ValueError):
+        return default
+
+
+def _cost_bucket(cost: float) -> str:
+    """Log-scale bucket, ~12% wide: ₹48,000 and ₹52,000 share a key, ₹48,000 and ₹80,000 don't."""
+    return "0" if cost <= 0 else str(round(math.log(cost, 1.12)))
+
+
+def _ratio_bucket(cost: float, rate: float) -> str:
+    if rate <= 0:
+        return "no-package"
+    return str(min(round(cost / rate * 4) / 4, 10.0))          # 0.25 steps, capped at 10×
+
+
+def _los_bucket(los: float) -> str:
+    for upper, label in LOS_BANDS:
+        if los <= upper:
+            return label
+    return "30+"
+
+
+def claim_signature(row, cost_col: str = "Final_Billed_Amount",
+                    rate_col: str = "Base_Package_Rate") -> str:
+    """Normalised, human-readable key for everything the explanation prompt depends on."""
+    cost, rate = _num(row.get(cost_col)), _num(row.get(rate_col))
+    age        = int(_num(row.get("Age"), -1))
+    return "|".join([
+        f"age{age // 10 * 10}" if age >= 0 else "age?",
+        str(row.get("Primary_Diagnosis", "") or "").strip().lower(),
+        f"cost{_cost_bucket(cost)}",
+        f"ratio{_ratio_bucket(cost, rate)}",
+        f"los{_los_bucket(_num(row.get('LOS')))}",
+        str(row.get("Fraud_Type", "") or "").strip().lower(),
+    ])
+
+
+# ══════════════════════════════════════════════════════════════
+#  CACHE
+# ══════════════════════════════════════════════════════════════
+class ExplanationCache:
+    def __init__(self, path: str = None, ttl_days: float = None, max_entries: int = None):
+        self.path        = path or EXPLAIN_CACHE_PATH
+        self.ttl         = (CACHE_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.stats       = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+        self._lock       = threading.Lock()
+        self._db         = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute("pragma journal_mode=wal")
+            self._db.execute("""
+                create table if not exists explanations (
+                    key        text primary key,
+                    signature  text,
+                    model      text,
+                    text       text not null,
+                    created_at real not null,
+                    last_used  real not null,
+                    hits       integer default 0
+                )""")
+            self._db.execute("create index if not exists idx_expl_last_used on explanations (last_used)")
+
+    @staticmethod
+    def key(signature: str, model: str = "") -> str:
+        return hashlib.sha1(f"{model}\x1f{signature}".encode()).hexdigest()
+
+    def get(self, signature: str, model: str = ""):
+        """Cached text for this signature, or None (expired entries count as misses)."""
+        k, now = self.key(signature, model), time.time()
+        with self._lock:
+            row = self._db.execute("select text, created_at from explanations where key = ?", (k,)).fetchone()
+            if row and (self.ttl <= 0 or now - row[1] < self.ttl):
+                with self._db:
+                    self._db.execute("update explanations set last_used = ?, hits = hits + 1 where key = ?", (now, k))
+                self.stats["hits"] += 1
+                return row[0]
+            self.stats["misses"] += 1
+            return None
+
+    def get_many(self, signatures, model: str = "") -> dict:
+        """{signature: text} for every signature that hits."""
+        out = {}
+        for sig in dict.fromkeys(signatures):
+            text = self.get(sig, model)
+            if text is not None:
+                out[sig] = text
+        return out
+
+    def put(self, signature: str, text: str, model: str = "") -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "insert into explanations (key, signature, model, text, created_at, last_used) "
+                "values (?,?,?,?,?,?) on conflict(key) do update set "
+                "text = excluded.text, created_at = excluded.created_at, last_used = excluded.last_used",
+                (self.key(signature, model), signature, model, text, now, now))
+            self.stats["writes"] += 1
+        if self.stats["writes"] % 500 == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least-recently-used ones beyond max_entries."""
+        with self._lock, self._db:
+            n = 0
+            if self.ttl > 0:
+                n += self._db.execute("delete from explanations where created_at < ?",
+                                      (time.time() - self.ttl,)).rowcount
+            if self.max_entries > 0:
+                n += self._db.execute(
+                    "delete from explanations where key in (select key from explanations "
+                    "order by last_used desc limit -1 offset ?)", (self.max_entries,)).rowcount
+            self.stats["evicted"] += n
+            return n
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("select count(*) from explanations").fetchone()[0]
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "entries": len(self),
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
+
+
+# ══════════════════════════════════════════════════════════════
+#  CACHED BATCH EXPLAIN
+# ══════════════════════════════════════════════════════════════
+def explain_rows(rows: list, build_prompt, runner, cache: ExplanationCache = None,
+                 cost_col: str = "Final_Billed_Amount", progress=None) -> list:
+    """
+    Explanation per row (dicts), calling the LLM once per signature not yet cached.
+    Failed calls (runner.fallback) are returned but never cached.
+    """
+    sigs = [claim_signature(r, cost_col) for r in rows]
+    if cache is None:
+        return runner.run([build_prompt(r, cost_col) for r in rows], progress)
+    known   = cache.get_many(sigs, runner.model)
+    pending = {}
+    for sig, row in zip(sigs, rows):
+        if sig not in known and sig not in pending:
+            pending[sig] = row
+    if pending:
+        texts = runner.run([build_prompt(r, cost_col) for r in pending.values()], progress)
+        for sig, text in zip(pending, texts):
+            known[sig] = text
+            if runner.client and text != runner.fallback:
+                cache.put(sig, text, runner.model)
+    return [known[s] for s in sigs]
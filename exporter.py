@@ -0,0 +1,227 @@
+"""
+exporter.py — Chunked, multi-format export of the investigation queue
+─────────────────────────────────────────────────────────────────────
+Streams detected_frauds from the storage backend page by page (keyset
+pagination, see scan_detected_frauds_page), strips emoji and other
+characters Excel mangles with one precompiled translation table, and
+appends each chunk to a temp file — so neither the whole table nor the
+whole output file has to be held in memory.  Pages are read uncached and a
+failed page raises, so an export is either complete or an error — never a
+silently truncated file.
+
+  res = export_frauds(sb, uid, "XLSX", fraud_type="Up-coding")
+  res → {"path", "format", "file_name", "mime", "rows", "bytes", "seconds"}
+
+Formats: CSV and JSONL always; Parquet needs pyarrow, XLSX needs xlsxwriter or
+openpyxl (available_formats() lists what this install can write).
+"""
+
+import os
+import time
+import tempfile
+import importlib.util
+from datetime import datetime
+
+import pandas as pd
+
+# Optional writers are looked up here but imported only when that format is written.
+_HAS = {m: importlib.util.find_spec(m) is not None for m in ("pyarrow", "xlsxwriter", "openpyxl")}
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))   # Supabase caps pages at SUPABASE_MAX_ROWS
+XLSX_MAX_ROWS     = 1_048_575          # sheet limit minus the header row
+
+FORMATS = {
+    "CSV":     (".csv",     "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "XLSX":    (".xlsx",    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "JSONL":   (".jsonl",   "application/x-ndjson"),
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  TEXT SANITIZING
+# ═══════════════════════════════════════════════════════════════
+class _KeepTable(dict):
+    """str.translate table: keeps ASCII, Devanagari and ₹, deletes everything else.
+    Entries are computed once per distinct code point and then served from the dict."""
+
+    def __missing__(self, cp: int):
+        keep = cp < 0x80 or 0x0900 <= cp <= 0x097F or cp == 0x20B9
+        self[cp] = cp if keep else None
+        return self[cp]
+
+
+SANITIZE_TABLE = _KeepTable()
+
+
+def sanitize_text(text: str) -> str:
+    return text.translate(SANITIZE_TABLE)
+
+
+def sanitize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip unsupported characters from every text column (nulls stay null).
+    Each distinct value is translated once — fraud types, statuses and
+    template explanations repeat across thousands of rows."""
+    df = df.copy()
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        codes, uniques = pd.factorize(df[col])
+        clean = pd.Index(uniques).astype(str).str.translate(SANITIZE_TABLE)
+        out   = pd.Series(clean.take(codes), index=df.index, dtype=object)
+        df[col] = out.where(codes >= 0, None)
+    return df
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SOURCE
+# ═══════════════════════════════════════════════════════════════
+def iter_frauds(backend, user_id: str = None, fraud_type: str = None, status: str = None,
+                chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Yield the (filtered) queue in risk order, chunk_rows at a time."""
+    cursor = None
+    while True:
+        page, cursor = backend.scan_detected_frauds_page(user_id=user_id, page_size=chunk_rows, cursor=cursor,
+                                                         fraud_type=fraud_type, status=status)
+        if not page.empty:
+            yield page
+        if cursor is None:
+            return
+
+
+# ═══════════════════════════════════════════════════════════════
+#  WRITERS  (each consumes an iterator of DataFrames)
+# ═══════════════════════════════════════════════════════════════
+def available_formats() -> list:
+    out = ["CSV", "JSONL"]
+    if _HAS["pyarrow"]:
+        out.append("Parquet")
+    if _HAS["xlsxwriter"] or _HAS["openpyxl"]:
+        out.append("XLSX")
+    return out
+
+
+def _write_csv(chunks, path: str) -> int:
+    rows = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:      # BOM once, for Excel
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=rows == 0)
+            rows += len(chunk)
+    return rows
+
+
+def _write_jsonl(chunks, path: str) -> int:
+    rows = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            if len(chunk):
+                text = chunk.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+                f.write(text if text.endswith("\n") else text + "\n")
+            rows += len(chunk)
+    return rows
+
+
+def _write_parquet(chunks, path: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    rows, writer, schema = 0, None, None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # all-null columns in the first chunk get a string type, not "null"
+                schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+                writer = pq.ParquetWriter(path, schema)
+            table = pa.Table.from_pandas(chunk.reindex(columns=schema.names), schema=schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+def _xlsx_cell(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _write_xlsx(chunks, path: str) -> int:
+    rows, columns = 0, None
+    if _HAS["xlsxwriter"]:
+        import xlsxwriter
+        book  = xlsxwriter.Workbook(path, {"constant_memory": True, "nan_inf_to_errors": True})
+        sheet = book.add_worksheet("Audit Export")
+        write_row = lambda r, values: sheet.write_row(r, 0, values)
+    else:
+        import openpyxl
+        book  = openpyxl.Workbook(write_only=True)
+        sheet = book.create_sheet("Audit Export")
+        write_row = lambda r, values: sheet.append(values)
+    try:
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+                write_row(0, columns)
+            for rec in chunk.reindex(columns=columns).itertuples(index=False, name=None):
+                if rows >= XLSX_MAX_ROWS:
+                    print(f"[Export] XLSX truncated at {XLSX_MAX_ROWS:,} rows (sheet limit)")
+                    return rows
+                rows += 1
+                write_row(rows, [_xlsx_cell(v) for v in rec])
+    finally:
+        if _HAS["xlsxwriter"]:
+            book.close()
+        else:
+            book.save(path)
+    return rows
+
+
+WRITERS = {"CSV": _write_csv, "JSONL": _write_jsonl, "Parquet": _write_parquet, "XLSX": _write_xlsx}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  ENTRY POINTS
+# ═══════════════════════════════════════════════════════════════
+def write_export(chunks, fmt: str = "CSV", path: str = None) -> dict:
+    """Sanitize and write chunks to `path` (a new temp file by default); logs time and size.
+    If reading or writing fails the partial file is removed and the error re-raised."""
+    if fmt not in available_formats():
+        raise ValueError(f"[Export] format {fmt!r} not available (have {available_formats()})")
+    ext, mime = FORMATS[fmt]
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="fraud_export_", suffix=ext)
+        os.close(fd)
+    t0 = time.perf_counter()
+    try:
+        rows = WRITERS[fmt]((sanitize_frame(c) for c in chunks), path)
+    except Exception:
+        discard({"path": path})
+        raise
+    secs = time.perf_counter() - t0
+    size = os.path.getsize(path)
+    print(f"[Export] {fmt}: {rows:,} rows, {size / 1e6:.2f} MB in {secs:.2f}s → {path}")
+    return {
+        "path":      path,
+        "format":    fmt,
+        "file_name": f"Fraud_Audit_Export_{datetime.now().strftime('%Y%m%d_%H%M')}{ext}",
+        "mime":      mime,
+        "rows":      rows,
+        "bytes":     size,
+        "seconds":   secs,
+    }
+
+
+def export_frauds(backend, user_id: str = None, fmt: str = "CSV", fraud_type: str = None,
+                  status: str = None, chunk_rows: int = EXPORT_CHUNK_ROWS) -> dict:
+    return write_export(iter_frauds(backend, user_id, fraud_type, status, chunk_rows), fmt)
+
+
+def discard(result: dict) -> None:
+    """Remove an export's temp file (e.g. when a newer export replaces it)."""
+    try:
+        if result and result.get("path"):
+            os.remove(result["path"])
+    except OSError:
+        pass
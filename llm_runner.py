@@ -0,0 +1,276 @@
+"""
+llm_runner.py — Concurrent, rate-limited LLM explanation runner
+───────────────────────────────────────────────────────────────
+Generates one short explanation per prompt with a fixed-size worker pool
+(the concurrency bound), a sliding one-minute request / token budget, and
+retries with exponential backoff + full jitter on rate-limit and transient
+errors.  Output order always matches input order.
+
+  runner = ExplanationRunner(client, concurrency=8, rpm=500, tpm=200_000)
+  texts  = runner.run([build_claim_prompt(r) for r in rows])   # prints progress
+
+ChatStream wraps a streamed chat completion for the Chat page: text deltas
+as they arrive, a total and an idle timeout, cancellation via close(), and
+time-to-first-token / total latency.
+
+Every request first takes a token from the process-wide "openai" bucket
+(rate_limit.py), so batch runs, enrichment and chat share one quota.
+
+Works with any OpenAI-compatible endpoint; point OPENAI_BASE_URL at
+tools/fake_openai.py to exercise it locally without spending tokens.
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from rate_limit import limits, RateLimitTimeout
+
+SYSTEM_PROMPT = "You are a government health insurance fraud auditor."
+FALLBACK_TEXT = "AI explanation unavailable"
+
+# Errors worth another attempt; anything else (bad request, auth) fails fast.
+RETRYABLE = ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError")
+
+
+def build_claim_prompt(row, cost_col: str = "Final_Billed_Amount") -> str:
+    """The one-sentence audit prompt for a flagged claim (row: dict or Series)."""
+    return f"""
+    You are auditing an Ayushman Bharat claim.
+
+    Age: {row.get('Age')}
+    Diagnosis: {row.get('Primary_Diagnosis')}
+    Cost: ₹{row.get(cost_col)}
+    Package Rate: {row.get('Base_Package_Rate')}
+    Length of Stay: {row.get('LOS')} days
+    Fraud Type: {row.get('Fraud_Type')}
+    Don't use emojis.
+    Don't include hospital/patient IDs.
+    Just give the core reason in one simple sentence.
+    Explain briefly why this claim looks suspicious.
+    """
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size (~4 chars / token) used to reserve budget before a call."""
+    return max(1, len(text) // 4)
+
+
+class RateBudget:
+    """Sliding 60 s window capping requests and tokens per minute across threads."""
+
+    def __init__(self, rpm: int, tpm: int, window: float = 60.0):
+        self.rpm, self.tpm, self.window = rpm, tpm, window
+        self._events = deque()            # [timestamp, tokens]
+        self._tokens = 0
+        self._lock   = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= self.window:
+            self._tokens -= self._events.popleft()[1]
+
+    def acquire(self, tokens: int) -> list:
+        """Block until one request of `tokens` fits the budget; returns the ledger entry."""
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                if len(self._events) < self.rpm and self._tokens + tokens <= self.tpm:
+                    entry = [now, tokens]
+                    self._events.append(entry)
+                    self._tokens += tokens
+                    return entry
+                wait = self.window - (now - self._events[0][0]) if self._events else 0.05
+            time.sleep(min(max(wait, 0.01), 1.0))
+
+    def settle(self, entry: list, actual_tokens: int) -> None:
+        """Replace the reserved estimate with the usage the API reported."""
+        with self._lock:
+            if any(e is entry for e in self._events):
+                self._tokens += actual_tokens - entry[1]
+            entry[1] = actual_tokens
+
+
+class ExplanationRunner:
+    def __init__(self, client, model: str = "gpt-4o-mini",
+                 concurrency: int = 8, rpm: int = 500, tpm: int = 200_000,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_cap: float = 30.0,
+                 max_tokens: int = 80, temperature: float = 0.3,
+                 system_prompt: str = SYSTEM_PROMPT, fallback: str = FALLBACK_TEXT):
+        self.client        = client
+        self.model         = model
+        self.concurrency   = max(1, concurrency)
+        self.budget        = RateBudget(rpm, tpm)
+        self.max_retries   = max_retries
+        self.backoff_base  = backoff_base
+        self.backoff_cap   = backoff_cap
+        self.max_tokens    = max_tokens
+        self.temperature   = temperature
+        self.system_prompt = system_prompt
+        self.fallback      = fallback
+        self.stats         = {"requests": 0, "retries": 0, "failures": 0, "tokens": 0}
+        self._stats_lock   = threading.Lock()
+
+    @classmethod
+    def from_env(cls, client, **overrides):
+        """Build a runner from LLM_MODEL / LLM_CONCURRENCY / LLM_RPM / LLM_TPM / LLM_MAX_RETRIES."""
+        cfg = {
+            "model":       os.getenv("LLM_MODEL", "gpt-4o-mini"),
+            "concurrency": int(os.getenv("LLM_CONCURRENCY", "8")),
+            "rpm":         int(os.getenv("LLM_RPM", "500")),
+            "tpm":         int(os.getenv("LLM_TPM", "200000")),
+            "max_retries": int(os.getenv("LLM_MAX_RETRIES", "5")),
+        }
+        cfg.update(overrides)
+        return cls(client, **cfg)
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _backoff(self, attempt: int, err: Exception) -> float:
+        """Server Retry-After if given, else full-jitter exponential backoff."""
+        headers = getattr(getattr(err, "response", None), "headers", None) or {}
+        try:
+            return min(float(headers.get("retry-after")), self.backoff_cap)
+        except (TypeError, ValueError):
+            return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    # ── single call ──────────────────────────────────────────
+    def explain_one(self, prompt: str) -> str:
+        if not self.client:
+            return "AI disabled (no API key)"
+        reserve = estimate_tokens(self.system_prompt + prompt) + self.max_tokens
+        for attempt in range(self.max_retries + 1):
+            entry = self.budget.acquire(reserve)
+            self._count("requests")
+            try:
+                limits.acquire("openai")         # shared with every other session / worker
+                r = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": self.system_prompt},
+                        {"role": "user",   "content": prompt},
+                    ],
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                )
+                used = getattr(getattr(r, "usage", None), "total_tokens", None) or reserve
+                self.budget.settle(entry, used)
+                self._count("tokens", used)
+                return r.choices[0].message.content.strip()
+            except Exception as e:
+                if type(e).__name__ not in RETRYABLE or attempt == self.max_retries:
+                    print(f"[LLM] explanation failed: {type(e).__name__}: {e}")
+                    break
+                self._count("retries")
+                time.sleep(self._backoff(attempt, e))
+        self._count("failures")
+        return self.fallback
+
+    # ── batch ────────────────────────────────────────────────
+    def run(self, prompts: list, progress=None) -> list:
+        """Explain every prompt concurrently; progress(done, total) is called after each one."""
+        total   = len(prompts)
+        results = [self.fallback] * total
+        if not total:
+            return results
+        report = progress or _print_progress(total)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="llm") as pool:
+            futures = {pool.submit(self.explain_one, p): i for i, p in enumerate(prompts)}
+            for done, fut in enumerate(as_completed(futures), start=1):
+                results[futures[fut]] = fut.result()
+                report(done, total)
+        return results
+
+
+def _print_progress(total: int, every: float = 0.05):
+    """Default progress reporter: one line roughly every 5 % with throughput."""
+    t0, step = time.perf_counter(), max(1, int(total * every))
+
+    def report(done: int, total: int) -> None:
+        if done % step and done != total:
+            return
+        elapsed = time.perf_counter() - t0
+        print(f"   {done}/{total} explanations  ({done / max(elapsed, 1e-9):.1f}/s, {elapsed:.0f}s)")
+    return report
+
+
+# ══════════════════════════════════════════════════════════════
+#  STREAMING CHAT
+# ══════════════════════════════════════════════════════════════
+class ChatStream:
+    """
+    Iterate the text deltas of a streamed chat completion.
+
+    Stops on its own after `timeout` seconds in total or `idle_timeout`
+    seconds without a chunk; close() cancels it from the consumer side.
+    Afterwards .text, .status ("ok" | "timeout" | "cancelled" | "busy" | "error"),
+    .ttft (seconds to first token) and .total (seconds) describe the call.
+    """
+
+    def __init__(self, client, messages: list, model: str = "gpt-4", temperature: float = 0.7,
+                 timeout: float = 60.0, idle_timeout: float = 20.0):
+        self.client       = client
+        self.messages     = messages
+        self.model        = model
+        self.temperature  = temperature
+        self.timeout      = timeout
+        self.idle_timeout = idle_timeout
+        self.text, self.status, self.error = "", "ok", None
+        self.ttft = self.total = None
+        self._resp = None
+        self._t0   = None
+
+    def __iter__(self):
+        self._t0 = time.perf_counter()
+        try:
+            limits.acquire("openai")
+            self._resp = self.client.chat.completions.create(
+                model=self.model, messages=self.messages, temperature=self.temperature,
+                stream=True, timeout=self.idle_timeout)
+            for chunk in self._resp:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self._t0
+                self.text += delta
+                yield delta
+                if time.perf_counter() - self._t0 > self.timeout:
+                    self.status = "timeout"
+                    break
+        except GeneratorExit:
+            self.status = "cancelled"
+            raise
+        except RateLimitTimeout as e:
+            self.status, self.error = "busy", str(e)
+        except Exception as e:
+            self.status = "timeout" if "Timeout" in type(e).__name__ else "error"
+            self.error  = str(e)
+        finally:
+            self._finish()
+
+    def close(self) -> None:
+        """Cancel an in-flight stream (safe to call more than once)."""
+        if self.total is None:
+            self.status = "cancelled" if self.status == "ok" else self.status
+            self._finish()
+
+    def _finish(self) -> None:
+        if self._resp is not None:
+            try:
+                self._resp.close()
+            except Exception:
+                pass
+            self._resp = None
+        if self.total is None and self._t0 is not None:
+            self.total = time.perf_counter() - self._t0
+
+    def metrics(self) -> dict:
+        return {"status": self.status, "ttft_s": None if self.ttft is None else round(self.ttft, 3),
+                "total_s": None if self.total is None else round(self.total, 3), "chars": len(self.text)}
@@ -0,0 +1,754 @@
+"""
+local_db.py — Embedded SQLite backend for Ayushman Bharat Fraud Detection
+─────────────────────────────────────────────────────────────────────────
+Drop-in stand-in for supabase_db.py: every function the dashboard calls on
+the hosted client exists here with the same name, arguments and return
+shape, so offline mode, local demos and I/O benchmarks need no network.
+
+Select it with  DB_BACKEND=sqlite  (see storage.py).  The database file is
+LOCAL_DB_PATH (default: ayushman_local.db) and is created on first use.
+
+Key functions:
+  insert_new_rows_only(df, ...)      → Insert fresh rows, SKIP duplicates
+  fetch_data_from_supabase()         → pd.DataFrame (all claims)
+  get_db_stats()                     → cumulative counts + last-updated date
+  bump_daily_rollup(rollup)          → add ingest counts to the daily rollup
+  get_trend_data(n_days, ...)        → daily Flagged / Total from the rollup
+  log_upload_session(...)            → record each upload in upload_sessions
+  get_upload_history(uid, limit)     → list of past uploads with date + counts
+  upsert_audit_log(...)              → write one audit event
+  fetch_audit_log(uid, limit)        → read audit events
+  upsert_detected_frauds(df, ...)    → upsert flagged claims
+  update_ai_justifications(texts)    → write background LLM explanations
+  fetch_detected_frauds(user_id)     → investigation queue, highest risk first
+  fetch_detected_frauds_page(...)    → one keyset page of the investigation queue
+  frauds_version()                   → change counter for detected_frauds
+  get_detected_frauds_summary(...)   → report totals via SQL aggregate
+  update_claim_status(pid, status)   → investigation status on both tables
+  update_claims_status_bulk(ids, s)  → one status for many claims, one audit entry
+
+Claims carry whatever columns the uploaded CSV has, so unknown columns are
+added to the table on the fly (SQLite is dynamically typed).
+"""
+
+import os
+import math
+import uuid
+import hashlib
+import secrets
+import sqlite3
+import threading
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from rollups import ALL_STATES, ROLLUP_COLUMNS, trend_window, to_trend_frame
+
+load_dotenv()
+
+BACKEND_LABEL = "SQLite"
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", "ayushman_local.db")
+
+_SCHEMA = """
+create table if not exists claims (
+    "PatientID"            text primary key,
+    "Age"                  integer,
+    "Final_Billed_Amount"  real,
+    "Fraud_Flag"           integer default 0,
+    "Risk_Score"           real    default 0,
+    "Fraud_Type"           text    default '',
+    "AI_Justification"     text    default '',
+    "Risk score per claim" real    default 0,
+    "Investigation_Status" text,
+    "user_id"              text,
+    "uploaded_at"          text,
+    "updated_at"           text
+);
+create index if not exists idx_claims_user      on claims ("user_id");
+create index if not exists idx_claims_user_flag on claims ("user_id", "Fraud_Flag");
+
+create table if not exists upload_sessions (
+    id             integer primary key autoincrement,
+    uid            text,
+    user_id        text,
+    filename       text,
+    total_rows     integer default 0,
+    new_rows       integer default 0,
+    skipped_rows   integer default 0,
+    fraud_detected integer default 0,
+    suspicious_amt real    default 0,
+    uploaded_at    text
+);
+create index if not exists idx_sessions_user on upload_sessions (user_id, uploaded_at desc);
+create index if not exists idx_sessions_uid  on upload_sessions (uid, uploaded_at desc);
+
+create table if not exists audit_log (
+    id          integer primary key autoincrement,
+    uid         text,
+    user_id     text,
+    action      text,
+    description text,
+    patient_id  text,
+    fraud_type  text,
+    amount      real,
+    created_at  text
+);
+create index if not exists idx_audit_user on audit_log (user_id, created_at desc);
+create index if not exists idx_audit_uid  on audit_log (uid, created_at desc);
+
+create table if not exists detected_frauds (
+    "PatientID"            text primary key,
+    "Hospital_PIN"         text,
+    "Age"                  integer,
+    "Primary_Diagnosis"    text default '',
+    "Final_Billed_Amount"  real,
+    "Fraud_Type"           text default 'Anomalous',
+    "AI_Justification"     text default '',
+    "Risk_Score"           real default 0,
+    "Investigation_Status" text default 'Pending',
+    "user_id"              text,
+    "detected_at"          text
+);
+create index if not exists idx_frauds_user_risk on detected_frauds ("user_id", "Risk_Score" desc, "PatientID");
+create index if not exists idx_frauds_risk      on detected_frauds ("Risk_Score" desc, "PatientID");
+
+create table if not exists claim_daily_rollup (
+    day         text,
+    uid         text default '',
+    "State"     text default 'ALL',
+    claims      integer default 0,
+    flagged     integer default 0,
+    flagged_amt real    default 0,
+    primary key (uid, "State", day)
+) without rowid;
+
+create table if not exists users (
+    id            text primary key,
+    email         text unique,
+    password_hash text,
+    salt          text,
+    created_at    text
+);
+"""
+
+# Created after "updated_at" is ensured, so files from before the column still open.
+_TRIGGERS = """
+create trigger if not exists claims_touch after update on claims
+begin
+    update claims set "updated_at" = strftime('%Y-%m-%dT%H:%M:%f', 'now') where rowid = new.rowid;
+end;
+"""
+
+_local       = threading.local()
+_schema_lock = threading.Lock()
+_schema_done = set()
+_columns     = {}          # table -> set of known column names
+
+
+# ══════════════════════════════════════════════════════════════
+#  CONNECTION
+# ══════════════════════════════════════════════════════════════
+def _conn() -> sqlite3.Connection:
+    """One connection per thread (Streamlit runs each session in its own thread)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == LOCAL_DB_PATH:
+        return conn
+    conn = sqlite3.connect(LOCAL_DB_PATH, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("pragma journal_mode=wal")
+    conn.execute("pragma synchronous=normal")
+    with _schema_lock:
+        if LOCAL_DB_PATH not in _schema_done:
+            conn.executescript(_SCHEMA)
+            _columns.clear()
+            _ensure_columns(conn, "claims", ["updated_at"])
+            conn.executescript(_TRIGGERS)
+            _schema_done.add(LOCAL_DB_PATH)
+    _local.conn, _local.path = conn, LOCAL_DB_PATH
+    return conn
+
+
+def is_configured() -> bool:
+    return True
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _q(name: str) -> str:
+    """Quote an identifier (claim columns contain spaces)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _ensure_columns(conn, table: str, cols) -> None:
+    known = _columns.get(table)
+    if known is None:
+        known = {r["name"] for r in conn.execute(f"pragma table_info({_q(table)})")}
+        _columns[table] = known
+    for col in cols:
+        if col not in known:
+            conn.execute(f"alter table {_q(table)} add column {_q(col)}")
+            known.add(col)
+
+
+def _rows(df: pd.DataFrame) -> list[tuple]:
+    """DataFrame → list of tuples of plain Python values (NaN/NaT → None)."""
+    columns = []
+    for col in df.columns:
+        values = df[col].tolist()
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            values = [v.isoformat() if pd.notna(v) else None for v in values]
+        else:
+            values = [_safe_value(v) for v in values]
+        columns.append(values)
+    return list(zip(*columns))
+
+
+def _safe_value(v):
+    if v is None:
+        return None
+    if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.isoformat() if pd.notna(v) else None
+    if v is pd.NaT:
+        return None
+    if isinstance(v, (int, float, str, bytes)):
+        return v
+    return str(v)
+
+
+def _write(df: pd.DataFrame, table: str, key: str = None,
+           mode: str = "insert", chunk_size: int = 500) -> int:
+    """
+    Bulk write `df` into `table`.
+      mode="insert" → rows whose key already exists are ignored
+      mode="upsert" → rows whose key already exists are updated in place
+    """
+    if df.empty:
+        return 0
+    conn = _conn()
+    cols = list(df.columns)
+    with conn:
+        _ensure_columns(conn, table, cols)
+        col_sql = ", ".join(_q(c) for c in cols)
+        marks   = ", ".join("?" for _ in cols)
+        updates = ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in cols if c != key)
+        if mode == "upsert" and key and updates:
+            sql = (f"insert into {_q(table)} ({col_sql}) values ({marks}) "
+                   f"on conflict({_q(key)}) do update set {updates}")
+        else:
+            sql = f"insert or ignore into {_q(table)} ({col_sql}) values ({marks})"
+        rows = _rows(df)
+        for i in range(0, len(rows), chunk_size):
+            conn.executemany(sql, rows[i:i + chunk_size])
+    return len(df)
+
+
+# ══════════════════════════════════════════════════════════════
+#  AUTH  (local accounts, PBKDF2-hashed)
+# ══════════════════════════════════════════════════════════════
+def _hash(password: str, salt: str) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), 200_000).hex()
+
+
+def _auth_response(user):
+    return SimpleNamespace(user=user, session=None)
+
+
+def sign_up(email, password):
+    conn = _conn()
+    salt = secrets.token_hex(16)
+    uid  = str(uuid.uuid4())
+    try:
+        with conn:
+            conn.execute("insert into users (id, email, password_hash, salt, created_at) values (?,?,?,?,?)",
+                         (uid, email.strip().lower(), _hash(password, salt), salt, _now()))
+    except sqlite3.IntegrityError:
+        raise Exception("User already registered")
+    return _auth_response(SimpleNamespace(id=uid, email=email.strip().lower()))
+
+
+def sign_in(email, password):
+    row = _conn().execute("select * from users where email = ?", (email.strip().lower(),)).fetchone()
+    if row is None or not secrets.compare_digest(row["password_hash"], _hash(password, row["salt"])):
+        raise Exception("Invalid login credentials")
+    return _auth_response(SimpleNamespace(id=row["id"], email=row["email"]))
+
+
+def sign_out():
+    pass
+
+
+def send_password_reset_email(email):
+    raise Exception("Password reset is not available with the local database backend.")
+
+
+def get_current_user():
+    """Always None: one process serves every browser session, so there is no
+    "current" user here — sessions are recovered from the ?s= link (session_store)."""
+    return None
+
+
+def recover_session(access_token, refresh_token):
+    return None
+
+
+# ══════════════════════════════════════════════════════════════
+#  FETCH ALL CLAIMS
+# ══════════════════════════════════════════════════════════════
+def fetch_data_from_supabase(table: str = "claims",
+                             page_size: int = 1000,
+                             user_id: str = None) -> pd.DataFrame:
+    """Return all claims (optionally for one user) as a DataFrame."""
+    sql, args = f"select * from {_q(table)}", ()
+    if user_id:
+        sql, args = sql + " where user_id = ?", (user_id,)
+    df = pd.read_sql_query(sql, _conn(), params=args)
+    return df.dropna(axis=1, how="all") if not df.empty else pd.DataFrame()
+
+
+def claims_fingerprint(table: str = "claims", user_id: str = None) -> str:
+    """Row count, newest uploaded_at and newest updated_at (same shape as supabase_db.claims_fingerprint)."""
+    conn = _conn()
+    _ensure_columns(conn, table, ["updated_at"])
+    sql, args = f"select count(*), max(uploaded_at), max(updated_at) from {_q(table)}", ()
+    if user_id:
+        sql, args = sql + " where user_id = ?", (user_id,)
+    n, last, edit = conn.execute(sql, args).fetchone()
+    return f"{n}:{last}:{edit}"
+
+
+# ══════════════════════════════════════════════════════════════
+#  INSERT NEW ROWS ONLY  (skip duplicates)
+# ══════════════════════════════════════════════════════════════
+def insert_new_rows_only(df: pd.DataFrame,
+                         table: str = "claims",
+                         conflict_col: str = "PatientID",
+                         chunk_size: int = 200,
+                         user_id: str = None) -> dict:
+    """
+    Insert rows from `df` whose `conflict_col` is not in the table yet.
+    Same return shape as supabase_db.insert_new_rows_only.
+    """
+    result = {"total": len(df), "new": 0, "skipped": 0, "new_keys": [], "error": None}
+    try:
+        conn = _conn()
+        new_df = df.copy()
+        if conflict_col in df.columns:
+            keys = df[conflict_col].astype(str)
+            existing = set()
+            uniq = keys.unique().tolist()
+            for i in range(0, len(uniq), 900):      # stay under SQLite's bound-variable limit
+                part = uniq[i:i + 900]
+                marks = ",".join("?" for _ in part)
+                existing.update(r[0] for r in conn.execute(
+                    f"select {_q(conflict_col)} from {_q(table)} where {_q(conflict_col)} in ({marks})", part))
+            mask   = ~keys.isin(existing)
+            new_df = df[mask].copy()
+            result["skipped"] = int((~mask).sum())
+        if user_id:
+            new_df["user_id"] = user_id
+        if "uploaded_at" not in new_df.columns:
+            new_df["uploaded_at"] = _now()
+        result["new"] = len(new_df)
+        result["new_keys"] = new_df[conflict_col].astype(str).tolist() if conflict_col in new_df.columns else []
+        _write(new_df, table, key=conflict_col, mode="insert", chunk_size=chunk_size)
+    except Exception as e:
+        result["error"] = str(e)[:400]
+    return result
+
+
+# ══════════════════════════════════════════════════════════════
+#  CUMULATIVE DATABASE STATS
+# ══════════════════════════════════════════════════════════════
+def get_db_stats(table: str = "claims",
+                 sessions_table: str = "upload_sessions",
+                 cost_col: str = None,
+                 user_id: str = None) -> dict:
+    default = {"total_claims": 0, "total_fraud": 0,
+               "suspicious_amt": 0.0, "last_updated": None,
+               "total_uploads": 0, "error": None}
+    try:
+        conn  = _conn()
+        where = " where user_id = ?" if user_id else ""
+        args  = (user_id,) if user_id else ()
+        _ensure_columns(conn, table, [])
+        if not cost_col:
+            known    = _columns.get(table, set())
+            cost_col = ("Final_Billed_Amount" if "Final_Billed_Amount" in known else
+                        "TreatmentCost"       if "TreatmentCost"       in known else None)
+        amt_sql = f"coalesce(sum(case when \"Fraud_Flag\" = 1 then {_q(cost_col)} end), 0)" if cost_col else "0"
+        total, fraud, amt = conn.execute(
+            f"select count(*), coalesce(sum(\"Fraud_Flag\" = 1), 0), {amt_sql} from {_q(table)}{where}",
+            args).fetchone()
+        uploads, last_ts = conn.execute(
+            f"select count(*), max(uploaded_at) from {_q(sessions_table)}{where}", args).fetchone()
+        last_dt = None
+        if last_ts:
+            try:
+                last_dt = datetime.fromisoformat(last_ts.replace("Z", "+00:00")).strftime("%d %b %Y")
+            except ValueError:
+                last_dt = last_ts[:10]
+        return {
+            "total_claims":   int(total),
+            "total_fraud":    int(fraud),
+            "suspicious_amt": float(amt),
+            "last_updated":   last_dt or "Never",
+            "total_uploads":  int(uploads),
+            "error":          None,
+        }
+    except Exception as e:
+        default["error"] = str(e)[:300]
+        return default
+
+
+def get_user_activity_stats(uid):
+    try:
+        row = _conn().execute(
+            "select coalesce(sum(total_rows), 0), coalesce(sum(fraud_detected), 0) "
+            "from upload_sessions where user_id = ? or uid = ?", (uid, uid)).fetchone()
+        return int(row[0]), int(row[1])
+    except Exception as e:
+        print(f"[LocalDB] get_user_activity_stats error: {e}")
+        return 0, 0
+
+
+# ══════════════════════════════════════════════════════════════
+#  DAILY ROLLUP
+# ══════════════════════════════════════════════════════════════
+def bump_daily_rollup(rollup: pd.DataFrame, table: str = "claim_daily_rollup") -> bool:
+    """Add rollup rows onto the stored per-day counts."""
+    if rollup is None or rollup.empty:
+        return True
+    try:
+        conn = _conn()
+        with conn:
+            conn.executemany(
+                f'insert into {_q(table)} (day, uid, "State", claims, flagged, flagged_amt) values (?,?,?,?,?,?) '
+                f'on conflict (uid, "State", day) do update set '
+                f'claims = claims + excluded.claims, flagged = flagged + excluded.flagged, '
+                f'flagged_amt = flagged_amt + excluded.flagged_amt',
+                _rows(rollup[ROLLUP_COLUMNS]))
+        return True
+    except Exception as e:
+        print(f"[LocalDB] bump_daily_rollup error: {e}")
+        return False
+
+
+def get_trend_data(n_days: int = 30, user_id: str = None, state: str = None,
+                   table: str = "claim_daily_rollup") -> pd.DataFrame:
+    """Daily Flagged / Total / Suspicious for the last n_days (one primary-key range scan)."""
+    start, end = trend_window(n_days)
+    try:
+        rows = _conn().execute(
+            f'select day, claims, flagged, flagged_amt from {_q(table)} '
+            f'where uid = ? and "State" = ? and day between ? and ? order by day',
+            (str(user_id or ""), state or ALL_STATES, start, end)).fetchall()
+        return to_trend_frame([tuple(r) for r in rows], start, end)
+    except Exception as e:
+        print(f"[LocalDB] get_trend_data error: {e}")
+        return pd.DataFrame()
+
+
+# ══════════════════════════════════════════════════════════════
+#  UPLOAD SESSION LOG
+# ══════════════════════════════════════════════════════════════
+def log_upload_session(uid: str, filename: str,
+                       total_rows: int, new_rows: int,
+                       skipped_rows: int, fraud_detected: int,
+                       suspicious_amt: float = 0.0) -> bool:
+    try:
+        conn = _conn()
+        with conn:
+            conn.execute(
+                "insert into upload_sessions (uid, user_id, filename, total_rows, new_rows, skipped_rows, "
+                "fraud_detected, suspicious_amt, uploaded_at) values (?,?,?,?,?,?,?,?,?)",
+                (uid, uid if len(str(uid or "")) > 20 else None, filename, int(total_rows), int(new_rows),
+                 int(skipped_rows), int(fraud_detected), float(suspicious_amt), _now()))
+        return True
+    except Exception as e:
+        print(f"[LocalDB] log_upload_session error: {e}")
+        return False
+
+
+def get_upload_history(uid: str = None, limit: int = 10) -> list[dict]:
+    try:
+        sql, args = "select * from upload_sessions", ()
+        if uid:
+            sql, args = sql + " where uid = ?", (uid,)
+        rows = _conn().execute(sql + " order by uploaded_at desc limit ?", (*args, int(limit))).fetchall()
+        result = []
+        for row in map(dict, rows):
+            ts_raw = row.get("uploaded_at") or ""
+            try:
+                date_lbl = datetime.fromisoformat(ts_raw.replace("Z", "+00:00")).strftime("%d %b %Y, %I:%M %p")
+            except ValueError:
+                date_lbl = ts_raw[:16]
+            result.append({**row, "date_label": date_lbl})
+        return result
+    except Exception as e:
+        print(f"[LocalDB] get_upload_history error: {e}")
+        return []
+
+
+# ══════════════════════════════════════════════════════════════
+#  AUDIT LOG
+# ══════════════════════════════════════════════════════════════
+def upsert_audit_log(uid: str, action: str, description: str,
+                     patient_id: str = "", fraud_type: str = "",
+                     amount: float = 0.0) -> bool:
+    try:
+        conn = _conn()
+        with conn:
+            conn.execute(
+                "insert into audit_log (uid, user_id, action, description, patient_id, fraud_type, amount, created_at) "
+                "values (?,?,?,?,?,?,?,?)",
+                (uid, uid if len(str(uid or "")) > 20 else None, action, description,
+                 patient_id or "", fraud_type or "", float(amount or 0), _now()))
+        return True
+    except Exception as e:
+        print(f"[LocalDB] audit_log error: {e}")
+        return False
+
+
+def fetch_audit_log(uid: str, limit: int = 20) -> list[dict]:
+    try:
+        rows = _conn().execute(
+            "select * from audit_log where user_id = ? or uid = ? order by created_at desc limit ?",
+            (uid, uid, int(limit))).fetchall()
+        now_ts = datetime.now(timezone.utc)
+        result = []
+        for row in map(dict, rows):
+            try:
+                ts   = datetime.fromisoformat((row.get("created_at") or "").replace("Z", "+00:00"))
+                diff = int((now_ts - ts).total_seconds())
+                ago  = (f"{diff}S AGO"       if diff < 60
+                        else f"{diff//60}M AGO"   if diff < 3600
+                        else f"{diff//3600}H AGO" if diff < 86400
+                        else f"{diff//86400}D AGO")
+            except Exception:
+                ago = "JUST NOW"
+            result.append({
+                "action":      row.get("action") or "Activity",
+                "description": row.get("description") or "",
+                "patient_id":  row.get("patient_id") or "",
+                "fraud_type":  row.get("fraud_type") or "",
+                "amount":      row.get("amount") or 0,
+                "ago":         ago,
+            })
+        return result
+    except Exception as e:
+        print(f"[LocalDB] fetch_audit_log error: {e}")
+        return []
+
+
+# ══════════════════════════════════════════════════════════════
+#  SAVE PROCESSED RESULTS  (upsert — updates existing rows)
+# ══════════════════════════════════════════════════════════════
+def save_fraud_results_to_supabase(df: pd.DataFrame,
+                                   table: str = "claims",
+                                   chunk_size: int = 200,
+                                   on_conflict: str = "PatientID",
+                                   user_id: str = None) -> tuple[bool, str]:
+    try:
+        out = df.copy()
+        if user_id:
+            out["user_id"] = user_id
+        _write(out, table, key=on_conflict, mode="upsert", chunk_size=chunk_size)
+        return True, f"✅ Saved {len(df):,} processed records locally."
+    except Exception as e:
+        return False, f"❌ Could not save results: {str(e)[:300]}"
+
+
+def sync_local_csv_to_supabase(csv_path: str, user_id: str = None) -> tuple[bool, str]:
+    try:
+        if not os.path.exists(csv_path):
+            return False, f"File not found: {csv_path}"
+        df = pd.read_csv(csv_path)
+        if df.empty:
+            return False, "CSV file is empty."
+        res = insert_new_rows_only(df, user_id=user_id)
+        if res.get("error"):
+            return False, f"Sync error: {res['error']}"
+        return True, f"✅ Sync Complete: {res['new']} new rows added, {res['skipped']} skipped."
+    except Exception as e:
+        return False, f"❌ Sync failed: {str(e)}"
+
+
+# ══════════════════════════════════════════════════════════════
+#  DETECTED FRAUDS REPOSITORY
+# ══════════════════════════════════════════════════════════════
+FRAUD_COLS = ["PatientID", "Hospital_PIN", "Age", "Primary_Diagnosis", "Final_Billed_Amount",
+              "Fraud_Type", "AI_Justification", "Risk_Score", "user_id"]
+
+
+_frauds_version = 0
+
+
+def frauds_version() -> int:
+    """Bumped whenever this process changes detected_frauds (for derived caches)."""
+    return _frauds_version
+
+
+def _frauds_changed() -> None:
+    global _frauds_version
+    _frauds_version += 1
+
+
+def upsert_detected_frauds(df: pd.DataFrame, user_id: str = None) -> dict:
+    if df.empty:
+        return {"new_count": 0, "status": "empty"}
+    out = df.copy()
+    if user_id:
+        out["user_id"] = user_id
+    out = out[[c for c in FRAUD_COLS if c in out.columns]].copy()
+    out["detected_at"] = _now()
+    try:
+        _write(out, "detected_frauds", key="PatientID", mode="upsert")
+        _frauds_changed()
+        return {"status": "success", "count": len(out)}
+    except Exception as e:
+        print(f"[LocalDB] upsert_detected_frauds error: {e}")
+        return {"status": "error", "error": str(e)}
+
+
+def update_ai_justifications(texts: dict, user_id: str = None) -> dict:
+    if not texts:
+        return {"status": "empty", "updated": 0}
+    sql  = 'update detected_frauds set "AI_Justification" = ? where "PatientID" = ?'
+    rows = [(text, str(pid)) for pid, text in texts.items()]
+    if user_id:
+        sql, rows = sql + " and user_id = ?", [r + (user_id,) for r in rows]
+    try:
+        conn = _conn()
+        with conn:
+            updated = sum(conn.execute(sql, r).rowcount for r in rows)
+        _frauds_changed()
+        return {"status": "success", "updated": updated}
+    except Exception as e:
+        print(f"[LocalDB] update_ai_justifications error: {e}")
+        return {"status": "error", "updated": 0, "error": str(e)}
+
+
+def fetch_detected_frauds(user_id: str = None) -> pd.DataFrame:
+    try:
+        sql, args = "select * from detected_frauds", ()
+        if user_id:
+            sql, args = sql + " where user_id = ?", (user_id,)
+        return pd.read_sql_query(sql + ' order by "Risk_Score" desc, "PatientID"', _conn(), params=args)
+    except Exception as e:
+        print(f"[LocalDB] fetch_detected_frauds error: {e}")
+        return pd.DataFrame()
+
+
+def _frauds_where(user_id=None, fraud_type=None, status=None):
+    clauses, args = [], []
+    for col, val in (("user_id", user_id), ("Fraud_Type", fraud_type), ("Investigation_Status", status)):
+        if val:
+            clauses.append(f"{_q(col)} = ?")
+            args.append(val)
+    return clauses, args
+
+
+def _frauds_page(user_id, page_size, cursor, fraud_type, status) -> pd.DataFrame:
+    clauses, args = _frauds_where(user_id, fraud_type, status)
+    if cursor:
+        clauses.append('("Risk_Score" < ? or ("Risk_Score" = ? and "PatientID" > ?))')
+        args += [float(cursor[0]), float(cursor[0]), str(cursor[1])]
+    where = f" where {' and '.join(clauses)}" if clauses else ""
+    return pd.read_sql_query(
+        f'select * from detected_frauds{where} order by "Risk_Score" desc, "PatientID" limit ?',
+        _conn(), params=(*args, int(page_size)))
+
+
+def fetch_detected_frauds_page(user_id: str = None,
+                               page_size: int = 30,
+                               cursor: tuple = None,
+                               fraud_type: str = None,
+                               status: str = None) -> tuple[pd.DataFrame, tuple]:
+    """Keyset page ordered by Risk_Score desc, PatientID (served by idx_frauds_user_risk)."""
+    try:
+        page = _frauds_page(user_id, page_size, cursor, fraud_type, status)
+    except Exception as e:
+        print(f"[LocalDB] fetch_detected_frauds_page error: {e}")
+        return pd.DataFrame(), None
+    if len(page) < page_size:
+        return page, None
+    last = page.iloc[-1]
+    return page, (float(last["Risk_Score"] or 0), str(last["PatientID"]))
+
+
+def scan_detected_frauds_page(user_id: str = None,
+                              page_size: int = 1000,
+                              cursor: tuple = None,
+                              fraud_type: str = None,
+                              status: str = None) -> tuple[pd.DataFrame, tuple]:
+    """Export variant of fetch_detected_frauds_page: errors raise instead of ending the scan."""
+    page = _frauds_page(user_id, page_size, cursor, fraud_type, status)
+    if len(page) < page_size:
+        return page, None
+    last = page.iloc[-1]
+    return page, (float(last["Risk_Score"] or 0), str(last["PatientID"]))
+
+
+def get_detected_frauds_summary(user_id: str = None,
+                                fraud_type: str = None,
+                                status: str = None) -> dict:
+    summary = {"cases": 0, "total_amount": 0.0, "avg_risk": 0.0, "by_type": {}}
+    try:
+        conn = _conn()
+        clauses, args = _frauds_where(user_id, fraud_type, status)
+        where = f" where {' and '.join(clauses)}" if clauses else ""
+        cases, amt, risk = conn.execute(
+            f'select count(*), coalesce(sum("Final_Billed_Amount"), 0), coalesce(avg("Risk_Score"), 0) '
+            f'from detected_frauds{where}', args).fetchone()
+        by_type = conn.execute(
+            f'select "Fraud_Type", count(*) from detected_frauds{where} group by 1 order by 2 desc', args).fetchall()
+        summary.update({"cases": int(cases), "total_amount": float(amt), "avg_risk": float(risk),
+                        "by_type": {str(t): int(n) for t, n in by_type}})
+    except Exception as e:
+        print(f"[LocalDB] get_detected_frauds_summary error: {e}")
+    return summary
+
+
+def update_claim_status(patient_id: str, status: str, user_id: str = None) -> bool:
+    return update_claims_status_bulk([patient_id], status, user_id=user_id)["status"] == "success"
+
+
+def _status_audit_text(ids: list, status: str) -> str:
+    if len(ids) == 1:
+        return f"Status for Patient {ids[0]} changed to '{status}'."
+    shown = ", ".join(ids[:10]) + (f" (+{len(ids) - 10} more)" if len(ids) > 10 else "")
+    return f"Status for {len(ids)} patients changed to '{status}': {shown}."
+
+
+def update_claims_status_bulk(patient_ids: list, status: str, user_id: str = None) -> dict:
+    ids = list(dict.fromkeys(str(p) for p in patient_ids if p is not None and str(p)))
+    if not ids:
+        return {"status": "success", "updated": 0, "error": None}
+    try:
+        conn, changed = _conn(), set()
+        with conn:
+            for table in ("claims", "detected_frauds"):
+                _ensure_columns(conn, table, ["Investigation_Status"])
+                for i in range(0, len(ids), 900):
+                    chunk = ids[i:i + 900]
+                    marks = ",".join("?" for _ in chunk)
+                    changed.update(str(r[0]) for r in conn.execute(
+                        f'update {table} set "Investigation_Status" = ? where "PatientID" in ({marks}) returning "PatientID"',
+                        (status, *chunk)).fetchall())
+        _frauds_changed()
+        upsert_audit_log(
+            uid=user_id,
+            action="Status Update",
+            description=_status_audit_text(ids, status),
+            patient_id=",".join(ids)
+        )
+        return {"status": "success", "updated": len(changed), "error": None}
+    except Exception as e:
+        print(f"[LocalDB] update_claims_status_bulk error: {e}")
+        return {"status": "error", "updated": 0, "error": str(e)[:300]}
@@ -1,164 +1,329 @@
-import pandas as pd
-import numpy as np
+"""
+main.py — Batch fraud scoring for claim files
+─────────────────────────────────────────────
+Scores one or more claim CSVs (or every *.csv in a directory) with the
+hybrid pipeline — rule engine, IsolationForest, risk fusion, fraud type and,
+optionally, an AI explanation per flagged claim — and writes one scored file
+per input.  Files run in parallel; large files are read and written in
+chunks, so a nightly run over the whole claims warehouse needs memory for
+one chunk per worker, not for the warehouse.
+
+  python main.py                                        # ayushman_claims.csv → scored/
+  python main.py warehouse/ --format parquet --workers 4
+  python main.py a.csv b.csv --no-explain --chunk-rows 200000 --summary run.json
+
+Per-hospital and per-patient aggregates always cover the whole file (first
+pass); the forest is fitted on up to --fit-rows sampled claims and then
+scores every chunk (second pass).  Files no larger than --fit-rows score
+exactly as in one piece.
+
+A JSON run summary goes to stdout (or --summary), progress to stderr.
+Exit codes: 0 every file scored · 1 some files failed · 2 bad arguments.
+"""
+
 import os
-from sklearn.ensemble import IsolationForest
-from openai import OpenAI
+import sys
+import json
+import glob
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
+from pandas.tseries.api import guess_datetime_format
+
+from llm_runner import ExplanationRunner, build_claim_prompt
+from explain_cache import ExplanationCache, explain_rows
+from exporter import FORMATS, WRITERS, available_formats
 
 load_dotenv()
 
-# ============================================================
-# API SETUP
-# ============================================================
-API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=API_KEY) if API_KEY else None
+DEFAULT_INPUT = "ayushman_claims.csv"
+FEATURES      = ["Final_Billed_Amount", "Cost_to_Package", "LOS", "PreAuth_Delay",
+                 "Hospital_Avg_Cost", "Patient_Claim_Count", "Age"]
+REQUIRED      = ["TransactionID", "PatientID", "Hospital_PIN", "Age", "Final_Billed_Amount",
+                 "Base_Package_Rate", "Admission_Timestamp", "Discharge_Timestamp",
+                 "PreAuth_Request_Date", "PreAuth_Approval_Date"]
+DATE_COLS     = ["Admission_Timestamp", "Discharge_Timestamp", "PreAuth_Request_Date", "PreAuth_Approval_Date"]
+FORMAT_NAMES  = {"csv": "CSV", "parquet": "Parquet", "jsonl": "JSONL"}
+
+
+def log(msg: str) -> None:
+    print(f"[Batch] {msg}", file=sys.stderr, flush=True)
+
 
 # ============================================================
-# LOAD DATA
+# READING
 # ============================================================
-print("📂 Loading dataset...")
-df = pd.read_csv("ayushman_claims.csv")
-print(f"✅ Loaded {len(df)} rows\n")
+def read_chunks(path: str, chunk_rows: int = 0):
+    """The file in chunk_rows pieces (whole when chunk_rows <= 0)."""
+    if chunk_rows <= 0:
+        yield pd.read_csv(path)
+        return
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def find_inputs(paths: list) -> list:
+    files = []
+    for p in paths:
+        files.extend(sorted(glob.glob(os.path.join(p, "*.csv"))) if os.path.isdir(p) else [p])
+    return list(dict.fromkeys(files))
+
 
 # ============================================================
-# FEATURE ENGINEERING
+# PASS 1 — WHOLE-FILE AGGREGATES + FIT SAMPLE
 # ============================================================
-print("⚙️ Creating advanced fraud signals...")
+class FileStats:
+    """Per-hospital and per-patient aggregates of one file, plus a uniform sample of its rows."""
 
-df["Admission_Timestamp"] = pd.to_datetime(df["Admission_Timestamp"], errors="coerce")
-df["Discharge_Timestamp"] = pd.to_datetime(df["Discharge_Timestamp"], errors="coerce")
-df["PreAuth_Request_Date"] = pd.to_datetime(df["PreAuth_Request_Date"], errors="coerce")
-df["PreAuth_Approval_Date"] = pd.to_datetime(df["PreAuth_Approval_Date"], errors="coerce")
+    def __init__(self, fit_rows: int, seed: int = 42):
+        self.rows        = 0
+        self.hosp_sum    = pd.Series(dtype=float)
+        self.hosp_n      = pd.Series(dtype=float)
+        self.claims      = pd.Series(dtype=float)        # TransactionIDs per patient
+        self.pairs       = pd.DataFrame(columns=["PatientID", "Hospital_PIN"])
+        self.fit_rows    = fit_rows
+        self.sample      = None
+        self.date_fmts   = {}                           # column → format inferred from its first value
+        self._rng        = np.random.default_rng(seed)
 
-df["LOS"] = (df["Discharge_Timestamp"] - df["Admission_Timestamp"]).dt.days
-df["PreAuth_Delay"] = (df["PreAuth_Approval_Date"] - df["PreAuth_Request_Date"]).dt.days
-df["Cost_to_Package"] = df["Final_Billed_Amount"] / df["Base_Package_Rate"].replace(0,1)
+    def add(self, chunk: pd.DataFrame) -> None:
+        missing = [c for c in REQUIRED if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"missing columns: {', '.join(missing)}")
+        for col in DATE_COLS:
+            first = chunk[col].dropna()
+            if col not in self.date_fmts and len(first):
+                # what pd.to_datetime would infer for the whole file, so every chunk parses alike
+                self.date_fmts[col] = guess_datetime_format(str(first.iloc[0]))
+        self.rows    += len(chunk)
+        cost          = chunk.groupby("Hospital_PIN")["Final_Billed_Amount"]
+        self.hosp_sum = self.hosp_sum.add(cost.sum(), fill_value=0)
+        self.hosp_n   = self.hosp_n.add(cost.count(), fill_value=0)
+        self.claims   = self.claims.add(chunk.groupby("PatientID")["TransactionID"].count(), fill_value=0)
+        self.pairs    = pd.concat([self.pairs, chunk[["PatientID", "Hospital_PIN"]]]).drop_duplicates()
+        # Bottom-k of a random key per row = a uniform sample without knowing the row count up front
+        keyed       = chunk.assign(_u=self._rng.random(len(chunk)))
+        self.sample = keyed if self.sample is None else pd.concat([self.sample, keyed])
+        if len(self.sample) > self.fit_rows:
+            self.sample = self.sample.nsmallest(self.fit_rows, "_u")
 
-hospital_avg = df.groupby("Hospital_PIN")["Final_Billed_Amount"].mean()
-df["Hospital_Avg_Cost"] = df["Hospital_PIN"].map(hospital_avg)
+    @property
+    def hospital_avg(self) -> pd.Series:
+        return self.hosp_sum / self.hosp_n
+
+    @property
+    def multi_hospital(self) -> set:
+        n = self.pairs.groupby("PatientID")["Hospital_PIN"].nunique()
+        return set(n[n > 1].index)
 
-patient_claims = df.groupby("PatientID")["TransactionID"].count()
-df["Patient_Claim_Count"] = df["PatientID"].map(patient_claims)
 
 # ============================================================
-# PHASE 1 — RULE ENGINE
+# FEATURES, RULES, SCORING
 # ============================================================
-print("🧠 Applying fraud rules...")
-df["Rule_Fraud"] = 0
+def add_features(df: pd.DataFrame, stats: FileStats) -> pd.DataFrame:
+    for col in DATE_COLS:
+        df[col] = pd.to_datetime(df[col], errors="coerce", format=stats.date_fmts.get(col))
+    df["LOS"]                 = (df["Discharge_Timestamp"] - df["Admission_Timestamp"]).dt.days
+    df["PreAuth_Delay"]       = (df["PreAuth_Approval_Date"] - df["PreAuth_Request_Date"]).dt.days
+    df["Cost_to_Package"]     = df["Final_Billed_Amount"] / df["Base_Package_Rate"].replace(0, 1)
+    df["Hospital_Avg_Cost"]   = df["Hospital_PIN"].map(stats.hospital_avg)
+    df["Patient_Claim_Count"] = df["PatientID"].map(stats.claims)
+    return df
 
-df.loc[df["Base_Package_Rate"] == 0, "Rule_Fraud"] = 1
-df.loc[df["Cost_to_Package"] > 2.5, "Rule_Fraud"] = 1
-df.loc[df["LOS"] <= 0, "Rule_Fraud"] = 1
 
-multi_hospital = df.groupby("PatientID")["Hospital_PIN"].nunique()
-suspicious_ids = multi_hospital[multi_hospital > 1].index
-df.loc[df["PatientID"].isin(suspicious_ids), "Rule_Fraud"] = 1
+def fit_model(stats: FileStats, contamination: float, n_estimators: int):
+    from sklearn.ensemble import IsolationForest
+    sample = add_features(stats.sample.drop(columns="_u").sort_index(), stats)      # file order
+    model  = IsolationForest(contamination=contamination, n_estimators=n_estimators, random_state=42)
+    return model.fit(sample[FEATURES].fillna(0).to_numpy())
 
-# ============================================================
-# PHASE 2 — MACHINE LEARNING
-# ============================================================
-print("🤖 Running ML anomaly detection...")
-
-features = df[[
-    "Final_Billed_Amount",
-    "Cost_to_Package",
-    "LOS",
-    "PreAuth_Delay",
-    "Hospital_Avg_Cost",
-    "Patient_Claim_Count",
-    "Age"
-]].fillna(0)
-
-model = IsolationForest(
-    contamination=0.12,
-    n_estimators=200,
-    random_state=42
-)
-
-df["ML_Anomaly"] = model.fit_predict(features)
 
-# ============================================================
-# PHASE 3 — RISK SCORE FUSION
-# ============================================================
-df["Risk_Score"] = (
-    df["Rule_Fraud"] * 0.5 +
-    (df["ML_Anomaly"] == -1).astype(int) * 0.4 +
-    (df["Cost_to_Package"] > 2).astype(int) * 0.1
-)
+def score_chunk(df: pd.DataFrame, stats: FileStats, model, multi_hospital: set) -> pd.DataFrame:
+    df = add_features(df, stats)
+
+    # PHASE 1 — RULE ENGINE
+    df["Rule_Fraud"] = 0
+    df.loc[df["Base_Package_Rate"] == 0, "Rule_Fraud"] = 1
+    df.loc[df["Cost_to_Package"] > 2.5, "Rule_Fraud"] = 1
+    df.loc[df["LOS"] <= 0, "Rule_Fraud"] = 1
+    df.loc[df["PatientID"].isin(multi_hospital), "Rule_Fraud"] = 1
+
+    # PHASE 2 — MACHINE LEARNING
+    df["ML_Anomaly"] = model.predict(df[FEATURES].fillna(0).to_numpy())
+
+    # PHASE 3 — RISK SCORE FUSION
+    df["Risk_Score"] = (
+        df["Rule_Fraud"] * 0.5 +
+        (df["ML_Anomaly"] == -1).astype(int) * 0.4 +
+        (df["Cost_to_Package"] > 2).astype(int) * 0.1
+    )
+    df["Fraud_Flag"] = (df["Risk_Score"] > 0.5).astype(int)
+
+    # FRAUD TYPE CLASSIFICATION (first matching rule wins)
+    df["Fraud_Type"] = np.select(
+        [df["Base_Package_Rate"] == 0, df["Cost_to_Package"] > 2.5,
+         df["Patient_Claim_Count"] > 2, df["LOS"] <= 0],
+        ["Ghost Billing", "Upcoding", "Identity Misuse", "Fake Admission"],
+        default="Anomalous Pattern")
+    return df
 
-df["Fraud_Flag"] = (df["Risk_Score"] > 0.5).astype(int)
 
 # ============================================================
-# FRAUD TYPE CLASSIFICATION
+# PHASE 4 — AI EXPLANATION AGENT
 # ============================================================
-def classify(row):
-    if row["Base_Package_Rate"] == 0:
-        return "Ghost Billing"
-    elif row["Cost_to_Package"] > 2.5:
-        return "Upcoding"
-    elif row["Patient_Claim_Count"] > 2:
-        return "Identity Misuse"
-    elif row["LOS"] <= 0:
-        return "Fake Admission"
-    else:
-        return "Anomalous Pattern"
+class Explainer:
+    """One runner + cache shared by every worker, so LLM_RPM / LLM_TPM hold for the whole run."""
+
+    def __init__(self):
+        from openai import OpenAI
+        # Retries are handled by ExplanationRunner (with jitter), not the SDK
+        client      = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.runner = ExplanationRunner.from_env(client)
+        self.cache  = ExplanationCache()
+
+    def explain(self, df: pd.DataFrame) -> pd.Series:
+        out     = pd.Series("", index=df.index, dtype=object)
+        flagged = df[df["Fraud_Flag"] == 1]
+        if not flagged.empty:
+            out[flagged.index] = explain_rows(flagged.to_dict("records"), build_claim_prompt,
+                                              self.runner, self.cache, progress=self._progress)
+        return out
+
+    @staticmethod
+    def _progress(done: int, total: int) -> None:
+        if done == total:                      # stdout carries the JSON summary
+            log(f"{total:,} explanations generated")
+
+    def summary(self) -> dict:
+        return {**self.runner.stats, "cache": self.cache.metrics()}
 
-df["Fraud_Type"] = df.apply(classify, axis=1)
 
 # ============================================================
-# PHASE 4 — AI EXPLANATION AGENT
+# ONE FILE
 # ============================================================
-def ai_explain(row):
-    if not client:
-        return "AI disabled (no API key)"
-
-    prompt = f"""
-    You are auditing an Ayushman Bharat claim.
-
-    Age: {row['Age']}
-    Diagnosis: {row['Primary_Diagnosis']}
-    Cost: ₹{row['Final_Billed_Amount']}
-    Package Rate: {row['Base_Package_Rate']}
-    Length of Stay: {row['LOS']} days
-    Fraud Type: {row['Fraud_Type']}
-    Don't use emojis.
-    Don't include hospital/patient IDs.
-    Just give the core reason in one simple sentence.
-    Explain briefly why this claim looks suspicious.
-    """
+def output_path(src: str, out_dir: str, fmt: str, taken: set) -> str:
+    stem, ext = os.path.splitext(os.path.basename(src))[0], FORMATS[FORMAT_NAMES[fmt]][0]
+    path, n   = os.path.join(out_dir, f"{stem}_scored{ext}"), 1
+    while path in taken:
+        n   += 1
+        path = os.path.join(out_dir, f"{stem}_{n}_scored{ext}")
+    taken.add(path)
+    return path
+
 
+def score_file(src: str, dst: str, args, explainer: Explainer = None) -> dict:
+    t0  = time.perf_counter()
+    res = {"input": src, "output": dst, "status": "ok", "rows": 0, "flagged": 0,
+           "suspicious": 0.0, "chunks": 0, "seconds": 0.0, "error": None}
+    tmp = dst + ".part"
     try:
-        r = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role":"system","content":"You are a government health insurance fraud auditor."},
-                {"role":"user","content":prompt}
-            ],
-            max_tokens=80,
-            temperature=0.3
-        )
-        return r.choices[0].message.content.strip()
-    except:
-        return "AI explanation unavailable"
-
-fraud_cases = df[df["Fraud_Flag"] == 1].copy()
-
-print("🧾 Generating AI explanations...")
-fraud_cases["AI_Justification"] = fraud_cases.apply(ai_explain, axis=1)
+        # One read when the file fits in a chunk, two otherwise
+        whole  = [pd.read_csv(src)] if args.chunk_rows <= 0 else None
+        stats  = FileStats(args.fit_rows)
+        for chunk in whole or read_chunks(src, args.chunk_rows):
+            stats.add(chunk)
+        if stats.rows == 0:
+            raise ValueError("no rows")
+        model = fit_model(stats, args.contamination, args.n_estimators)
+        multi = stats.multi_hospital
+
+        def scored():
+            for chunk in whole or read_chunks(src, args.chunk_rows):
+                df = score_chunk(chunk, stats, model, multi)
+                df["AI_Justification"] = explainer.explain(df) if explainer else ""
+                flagged          = df["Fraud_Flag"] == 1
+                res["rows"]       += len(df)
+                res["flagged"]    += int(flagged.sum())
+                res["suspicious"] += float(df.loc[flagged, "Final_Billed_Amount"].sum())
+                res["chunks"]     += 1
+                yield df[flagged] if args.flagged_only else df
+
+        WRITERS[FORMAT_NAMES[args.format]](scored(), tmp)
+        os.replace(tmp, dst)
+    except Exception as e:
+        res.update(status="failed", error=f"{type(e).__name__}: {e}"[:300], output=None)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    res["seconds"] = round(time.perf_counter() - t0, 2)
+    log(f"{os.path.basename(src)}: {res['status']} — {res['rows']:,} rows, {res['flagged']:,} flagged "
+        f"in {res['seconds']:.1f}s" + (f" ({res['error']})" if res["error"] else ""))
+    return res
+
 
 # ============================================================
-# OUTPUT
+# CLI
 # ============================================================
-cols = [
-    "TransactionID","PatientID","Hospital_PIN",
-    "Fraud_Type","Final_Billed_Amount",
-    "Risk_Score","AI_Justification"
-]
-
-print("\n🚨 FINAL FRAUD REPORT\n")
-print(fraud_cases[cols].to_string(index=False))
-
-print("\n📊 SUMMARY")
-print(f"Total Claims: {len(df)}")
-print(f"Frauds Detected: {len(fraud_cases)}")
-print("Method: Hybrid Rules + Behavioral ML + AI Explanation")
\ No newline at end of file
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="*", default=[DEFAULT_INPUT], help="CSV files or directories of *.csv")
+    ap.add_argument("--out", default="scored", help="output directory (default: scored/)")
+    ap.add_argument("--format", choices=list(FORMAT_NAMES), default="csv")
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="files scored in parallel")
+    ap.add_argument("--chunk-rows", type=int, default=0, help="rows per read/write chunk; 0 = whole file")
+    ap.add_argument("--fit-rows", type=int, default=200_000, help="max claims sampled to fit the forest")
+    ap.add_argument("--contamination", type=float, default=0.12)
+    ap.add_argument("--n-estimators", type=int, default=200)
+    ap.add_argument("--flagged-only", action="store_true", help="write flagged claims only")
+    ap.add_argument("--explain", action=argparse.BooleanOptionalAction, default=None,
+                    help="AI explanation per flagged claim (default: on when OPENAI_API_KEY is set)")
+    ap.add_argument("--summary", help="write the JSON run summary here instead of stdout")
+    return ap.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    fmt  = FORMAT_NAMES[args.format]
+    if fmt not in available_formats():
+        log(f"format {args.format} needs pyarrow (pip install pyarrow)")
+        return 2
+    files = find_inputs(args.inputs)
+    if not files:
+        log("no input files")
+        return 2
+    if args.explain is None:
+        args.explain = bool(os.getenv("OPENAI_API_KEY"))
+    elif args.explain and not os.getenv("OPENAI_API_KEY"):
+        log("--explain needs OPENAI_API_KEY")
+        return 2
+
+    os.makedirs(args.out, exist_ok=True)
+    explainer = Explainer() if args.explain else None
+    taken     = set()
+    jobs      = [(src, output_path(src, args.out, args.format, taken)) for src in files]
+    log(f"scoring {len(files)} file(s) with {args.workers} worker(s), explanations {'on' if explainer else 'off'}")
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = list(pool.map(lambda j: score_file(j[0], j[1], args, explainer), jobs))
+
+    failed  = [r for r in results if r["status"] != "ok"]
+    summary = {
+        "started_at":  time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - (time.perf_counter() - t0))),
+        "seconds":     round(time.perf_counter() - t0, 2),
+        "format":      args.format,
+        "explain":     bool(explainer),
+        "files":       len(results),
+        "failed":      len(failed),
+        "rows":        sum(r["rows"] for r in results),
+        "flagged":     sum(r["flagged"] for r in results),
+        "suspicious":  round(sum(r["suspicious"] for r in results), 2),
+        "llm":         explainer.summary() if explainer else None,
+        "results":     results,
+    }
+    text = json.dumps(summary, indent=2, default=str)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    log(f"done: {summary['rows']:,} rows, {summary['flagged']:,} flagged, "
+        f"{len(failed)} failed file(s) in {summary['seconds']:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+pipeline_jobs.py — Background jobs with per-stage progress
+──────────────────────────────────────────────────────────
+Runs long pipelines (the CSV upload: scoring, the storage write phases and
+the dashboard refetch) on a small thread pool instead of the Streamlit
+script thread.  A job reports each stage it enters; the page only polls
+job.snapshot(), so the user can keep navigating and a rerun, or coming
+back to the page later, picks the same job up again by its id.
+
+  runner = JobRunner(max_workers=2)
+  job_id = runner.submit(upload_job, raw, stages=UPLOAD_STAGES, user_id=uid, label="claims.csv")
+
+  def upload_job(job, raw):
+      job.stage("score");  ...                      # moves progress to that stage's start
+      job.stage("save", "Saving 1,204 claims")      # optional detail text
+      return {"rows": len(raw)}                     # becomes job.result
+
+  runner.get(job_id).snapshot()
+    → {"id", "label", "status", "stage", "message", "progress", "elapsed_s", "stage_times", "error"}
+  runner.get(job_id).take_result()                  # hand the result over, once
+
+Stages are (key, label, weight); progress is the weight completed so far.
+The runner is shared by every session, so results (scored frames) are not
+kept: the session takes them with take_result(), and a result nobody
+collected within RESULT_TTL_S is dropped; only the job's status remains.
+"""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+KEEP_JOBS    = 50       # finished jobs remembered per runner
+RESULT_TTL_S = 900      # uncollected results are dropped after this long
+
+
+class Job:
+    def __init__(self, stages: list, user_id: str = None, label: str = ""):
+        self.id          = uuid.uuid4().hex[:12]
+        self.user_id     = user_id
+        self.label       = label
+        self.stages      = stages
+        self.status      = "queued"            # queued | running | done | failed
+        self.stage_key   = None
+        self.message     = "Queued…"
+        self.result      = None
+        self.error       = None
+        self.created     = time.time()
+        self.started     = None
+        self.finished    = None
+        self.stage_times = OrderedDict()       # stage key → seconds spent
+        self._stage_t0   = None
+        self._lock       = threading.Lock()
+        self._total      = sum(w for _, _, w in stages) or 1
+
+    # ── called from the worker ───────────────────────────────
+    def stage(self, key: str, message: str = None) -> None:
+        """Enter stage `key`; the previous stage is closed and timed."""
+        label = next(l for k, l, _ in self.stages if k == key)
+        with self._lock:
+            self._close_stage()
+            self.stage_key = key
+            self.message   = message or label
+            self._stage_t0 = time.perf_counter()
+
+    def _close_stage(self) -> None:
+        if self.stage_key is not None and self._stage_t0 is not None:
+            self.stage_times[self.stage_key] = round(time.perf_counter() - self._stage_t0, 3)
+
+    # ── read side ────────────────────────────────────────────
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def progress(self) -> float:
+        """0..1 — weight of the stages already finished."""
+        if self.status == "done":
+            return 1.0
+        finished = 0
+        for key, _, weight in self.stages:
+            if key == self.stage_key:
+                break
+            finished += weight
+        else:
+            finished = 0 if self.stage_key is None else finished
+        return min(1.0, finished / self._total)
+
+    def take_result(self):
+        """The job's result, released from the job (None if already taken or expired)."""
+        with self._lock:
+            result, self.result = self.result, None
+            return result
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            end = self.finished or time.time()
+            return {
+                "id":          self.id,
+                "label":       self.label,
+                "status":      self.status,
+                "stage":       self.stage_key,
+                "message":     self.message,
+                "progress":    self.progress(),
+                "elapsed_s":   round(end - (self.started or end), 2),
+                "stage_times": dict(self.stage_times),
+                "error":       self.error,
+            }
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self._jobs = OrderedDict()             # id → Job, oldest first
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, stages: list, user_id: str = None, label: str = "", **kwargs) -> str:
+        """Run fn(job, *args, **kwargs) in the pool; returns the job id."""
+        job = Job(stages, user_id, label)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str):
+        with self._lock:
+            self._trim()
+            return self._jobs.get(job_id)
+
+    def jobs(self, user_id: str = None) -> list:
+        """Jobs (newest first), optionally only one user's."""
+        with self._lock:
+            return [j for j in reversed(self._jobs.values()) if user_id is None or j.user_id == user_id]
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        job.status, job.started = "running", time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            with job._lock:
+                job._close_stage()
+                job.status, job.message = "done", "Complete"
+        except Exception as e:
+            print(f"[Jobs] {job.label or job.id} failed in stage {job.stage_key}: {e}")
+            with job._lock:
+                job._close_stage()
+                job.status, job.error, job.message = "failed", str(e), f"Failed: {e}"
+        finally:
+            job.finished = time.time()
+
+    def _trim(self) -> None:
+        finished = [k for k, j in self._jobs.items() if j.done]
+        for k in finished[:max(0, len(finished) - KEEP_JOBS)]:
+            del self._jobs[k]
+        now = time.time()
+        for job in self._jobs.values():
+            if job.result is not None and job.finished and now - job.finished > RESULT_TTL_S:
+                job.take_result()
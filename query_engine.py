@@ -0,0 +1,307 @@
+"""
+query_engine.py — Exact answers to aggregate chat questions, without the LLM
+────────────────────────────────────────────────────────────────────────────
+parse_question() recognises common count / sum / average / top-N / group-by
+questions and compiles them to a Query of column filters; run_query()
+evaluates it with vectorised pandas masks on the loaded claims frame.
+
+  answer_question("total suspicious amount for Up-coding in Nizamabad", df, "Final_Billed_Amount")
+  → Answer(text="₹2.90 L (₹290,237) across 4 flagged Up-coding claims in District Nizamabad.", ...)
+
+Filter values (fraud type, state, district, diagnosis, hospital PIN, status,
+gender, …) are matched against the values present in the frame, plus the
+app's fixed fraud-type and investigation-status labels (KNOWN_VALUES), so a
+label with no claims yet answers 0 instead of being dropped.  Anything that is not a recognised aggregate — or carries a
+condition the parser cannot turn into a filter (a place or value the data
+does not contain, a patient ID, "over 50000", "age above 60") — returns None
+and goes to the LLM rather than answering for the unfiltered table.
+"""
+
+import re
+import time
+import weakref
+import threading
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Columns whose values can be named in a question, and how to describe them.
+FILTER_COLUMNS = {
+    "Fraud_Type":           "",
+    "State":                "State",
+    "District":             "District",
+    "Primary_Diagnosis":    "Diagnosis",
+    "Hospital_PIN":         "Hospital",
+    "Investigation_Status": "Status",
+    "Gender":               "Gender",
+    "Treatment_Type":       "Treatment",
+    "Severity_Level":       "Severity",
+    "Rural_Urban_Flag":     "Area",
+    "Payment_Status":       "Payment",
+}
+GROUP_WORDS = {
+    "type": "Fraud_Type", "fraud type": "Fraud_Type", "category": "Fraud_Type",
+    "state": "State", "district": "District", "city": "District",
+    "diagnosis": "Primary_Diagnosis", "disease": "Primary_Diagnosis",
+    "hospital": "Hospital_PIN", "status": "Investigation_Status", "gender": "Gender",
+}
+GROUP_WORDS_LABEL = {"Fraud_Type": "fraud type", "Primary_Diagnosis": "diagnosis", "Hospital_PIN": "hospital",
+                     "Investigation_Status": "status", "State": "state", "District": "district", "Gender": "gender"}
+DATE_COLUMNS = ("Claim_Submission_Date", "Admission_Timestamp", "uploaded_at")
+OPEN_ENDED   = re.compile(r"\b(why|explain|how (does|do|can|should)|what should|recommend|suggest|describe|summari[sz]e)\b")
+FRAUD_WORDS  = re.compile(r"\b(fraud\w*|suspicious|flagged|anomal\w*|risky|cases?)\b")
+PLACE_HINT   = re.compile(r"\b(?:in|at|from)\s+(?:(?:the|district|state|city|hospital)\s+)?([a-z]{3,})\b")
+NOT_PLACES   = {"the", "this", "that", "these", "last", "past", "total", "all", "each", "every", "our", "my",
+                "any", "district", "districts", "state", "states", "city", "hospital", "hospitals",
+                "claims", "claim", "cases", "case", "fraud", "frauds", "data", "dataset", "table", "queue",
+                "rupees", "inr", "least", "most", "general", "percent", "percentage", "which", "what"}
+COMPARISON   = re.compile(r"\b(?:over|above|below|under|exceed\w*|between|(?:more|less|greater|fewer|older|younger)"
+                          r" than|at (?:least|most))\s*(?:₹|rs\.?|inr)?\s*\d|[<>≤≥]=?\s*₹?\s*\d")
+TIME_PHRASE  = re.compile(r"\b(?:today|yesterday|this (?:week|month|year)|(?:last|past)\s+(?:\d+\s+)?(?:days?|weeks?|months?))\b")
+TOP_N        = re.compile(r"\b(?:top|highest|largest|biggest|riskiest)\s+\d+\b")
+KNOWN_VALUES = {
+    "Fraud_Type":           ["Ghost Billing", "Up-coding", "Upcoding", "Fake Admission", "Identity Misuse",
+                             "Anomalous Pattern"],
+    "Investigation_Status": ["Pending", "Under Investigation", "Confirmed Fraud", "Cleared"],
+}
+# Words an aggregate question is made of; anything else left after filter
+# matching is a condition the parser did not understand.
+QUESTION_WORDS = set("""
+    how many much number no of count total sum average avg mean what whats s is are was were be been
+    the a an for in at from on to by per each every across with and or all any overall so far
+    show me give tell list find get our my this that these those there have has do does did please
+    which who whose currently now detected identified reported submitted uploaded recorded
+    claim claims case cases suspicious flagged flag risky risk score scores amount amounts value values
+    billed bill billing money cost costs rupees inr rs payout payouts patient patients record records
+    data dataset table queue rows top highest largest biggest most expensive riskiest
+    percentage percent share rate ratio age type types category categories state states district
+    districts city cities diagnosis diagnoses disease diseases hospital hospitals status statuses
+    gender genders
+""".split())
+
+
+@dataclass
+class Query:
+    metric:   str                                  # count | sum | mean | top | rate
+    target:   str = None                           # column aggregated (amount / risk / age)
+    filters:  dict = field(default_factory=dict)   # column → value
+    flagged:  bool = False
+    since:    pd.Timestamp = None
+    period:   str = ""
+    group_by: str = None
+    top_n:    int = 5
+
+
+@dataclass
+class Answer:
+    text:       str
+    query:      Query
+    table:      pd.DataFrame = None
+    elapsed_ms: float = 0.0
+
+
+def _norm(s) -> str:
+    return re.sub(r"[^a-z0-9]+", "", str(s).lower())
+
+
+def _vocabulary(df: pd.DataFrame) -> dict:
+    """normalised value → (column, value) for every filterable value in the frame,
+    then the KNOWN_VALUES labels it does not contain (those match no rows)."""
+    vocab = {}
+    for col in FILTER_COLUMNS:
+        if col not in df.columns:
+            continue
+        for val in [*df[col].dropna().unique(), *KNOWN_VALUES.get(col, [])]:
+            key = _norm(val)
+            if len(key) >= 3 and key not in {"none", "nan", "na"}:
+                vocab.setdefault(key, (col, val))
+    return vocab
+
+
+def _time_window(q: str):
+    now   = pd.Timestamp.now().normalize()
+    rules = [
+        (r"\btoday\b",      lambda m: (now, "today")),
+        (r"\byesterday\b",  lambda m: (now - pd.Timedelta(days=1), "since yesterday")),
+        (r"\bthis week\b",  lambda m: (now - pd.Timedelta(days=now.weekday()), "this week")),
+        (r"\bthis month\b", lambda m: (now.replace(day=1), "this month")),
+        (r"\bthis year\b",  lambda m: (now.replace(month=1, day=1), "this year")),
+        (r"\b(?:last|past)\s+(\d+)\s+days?\b",   lambda m: (now - pd.Timedelta(days=int(m.group(1))), f"in the last {m.group(1)} days")),
+        (r"\b(?:last|past)\s+(\d+)\s+weeks?\b",  lambda m: (now - pd.Timedelta(weeks=int(m.group(1))), f"in the last {m.group(1)} weeks")),
+        (r"\b(?:last|past)\s+(\d+)\s+months?\b", lambda m: (now - pd.DateOffset(months=int(m.group(1))), f"in the last {m.group(1)} months")),
+        (r"\b(?:last|past) week\b",  lambda m: (now - pd.Timedelta(days=7), "in the last 7 days")),
+        (r"\b(?:last|past) month\b", lambda m: (now - pd.DateOffset(months=1), "in the last month")),
+    ]
+    for pattern, build in rules:
+        m = re.search(pattern, q)
+        if m:
+            return build(m)
+    return None, ""
+
+
+def parse_question(question: str, df: pd.DataFrame, vocab: dict = None):
+    """Question → Query, or None when it is open-ended / not answerable from the frame."""
+    q = question.lower().strip()
+    if not q or OPEN_ENDED.search(q):
+        return None
+
+    amount = re.search(r"\b(amount|value|billed|money|cost|rupees|₹|inr|payout|sum)\b|₹", q)
+    if re.search(r"\b(how many|number of|count|no\. of)\b", q):
+        query = Query("count")
+    elif re.search(r"\b(total|sum)\b", q) and amount:
+        query = Query("sum", "amount")
+    elif re.search(r"\b(average|avg|mean)\b", q):
+        target = "risk" if "risk" in q else "age" if re.search(r"\bage\b", q) else "amount"
+        query  = Query("mean", target)
+    elif m := re.search(r"\b(top|highest|largest|biggest|most expensive|riskiest)\s*(\d+)?", q):
+        query = Query("top", "risk" if "risk" in q else "amount", top_n=int(m.group(2) or 5))
+    elif re.search(r"\b(percentage|percent|share|rate)\b", q) and FRAUD_WORDS.search(q):
+        query = Query("rate")
+    else:
+        return None
+
+    # ── filters: any known value named in the question ──
+    vocab = vocab if vocab is not None else _vocabulary(df)
+    qn    = " " + " ".join(re.findall(r"[a-z0-9]+", q)) + " "
+    words = set(qn.split())
+    rest  = qn                                      # what no filter / window / top-N accounts for
+    for key, (col, val) in vocab.items():
+        spaced = " ".join(re.findall(r"[a-z0-9]+", str(val).lower()))
+        if f" {spaced} " in qn or key in words:
+            query.filters.setdefault(col, val)
+            rest = rest.replace(f" {spaced} ", "  ").replace(f" {key} ", "  ")
+
+    # A condition that didn't become a filter must not be silently ignored:
+    # answering for the whole table would be confidently wrong.
+    rest = TOP_N.sub(" ", TIME_PHRASE.sub(" ", rest))
+    if COMPARISON.search(q) or re.search(r"\d", rest):
+        return None
+    if any(place not in NOT_PLACES for place in PLACE_HINT.findall(rest)):
+        return None
+    if any(w not in QUESTION_WORDS and not FRAUD_WORDS.fullmatch(w) for w in rest.split()):
+        return None
+
+    query.flagged = bool(FRAUD_WORDS.search(q) or "Fraud_Type" in query.filters) and query.metric != "rate"
+    query.since, query.period = _time_window(q)
+
+    g = re.search(r"\b(?:by|per|each|every|across)\s+(fraud type|[a-z]+)", q)
+    if g and g.group(1) in GROUP_WORDS and GROUP_WORDS[g.group(1)] in df.columns:
+        query.group_by = GROUP_WORDS[g.group(1)]
+    return query
+
+
+def _fmt_inr(x: float) -> str:
+    if abs(x) >= 1e7:
+        return f"₹{x / 1e7:.2f} Cr (₹{x:,.0f})"
+    if abs(x) >= 1e5:
+        return f"₹{x / 1e5:.2f} L (₹{x:,.0f})"
+    return f"₹{x:,.0f}"
+
+
+def _describe(query: Query, n: int) -> str:
+    parts = [f"{n:,}"]
+    if query.flagged:
+        parts.append("flagged")
+    if "Fraud_Type" in query.filters:
+        parts.append(str(query.filters["Fraud_Type"]))
+    parts.append("claim" if n == 1 else "claims")
+    for col, val in query.filters.items():
+        if col != "Fraud_Type":
+            parts.append(f"in {FILTER_COLUMNS[col]} {val}" if col in ("State", "District") else f"with {FILTER_COLUMNS[col]} {val}")
+    if query.period:
+        parts.append(query.period)
+    return " ".join(parts)
+
+
+def run_query(query: Query, df: pd.DataFrame, cost_col: str = None, dates: pd.Series = None) -> Answer:
+    mask = pd.Series(True, index=df.index)
+    for col, val in query.filters.items():
+        mask &= df[col] == val
+    if query.flagged and "Fraud_Flag" in df.columns:
+        mask &= df["Fraud_Flag"] == 1
+    if query.since is not None and dates is not None:
+        mask &= dates >= query.since
+    sub = df[mask]
+    n   = len(sub)
+
+    target = {"amount": cost_col, "risk": "Risk_Score", "age": "Age"}.get(query.target)
+    values = pd.to_numeric(sub[target], errors="coerce") if target and target in sub.columns else None
+    fmt    = _fmt_inr if query.target == "amount" else (lambda v: f"{v:.2f}" if query.target == "risk" else f"{v:.1f}")
+
+    if query.metric in ("sum", "mean") and values is None:
+        return None
+    if query.group_by:
+        keys = sub[query.group_by]
+        grouped = (values.groupby(keys).agg(query.metric) if query.metric in ("sum", "mean")
+                   else keys.value_counts())
+        grouped = grouped.sort_values(ascending=False).head(10)
+        label   = {"count": "claims", "sum": "total", "mean": "average"}.get(query.metric, "claims")
+        body    = " · ".join(f"{k}: {fmt(v) if query.metric in ('sum', 'mean') else f'{v:,}'}" for k, v in grouped.items())
+        text    = f"{label.capitalize()} by {GROUP_WORDS_LABEL.get(query.group_by, query.group_by)} for {_describe(query, n)}: {body or 'none'}."
+        return Answer(text, query, grouped.rename(label).reset_index())
+
+    if query.metric == "count":
+        text = f"{_describe(query, n)}."
+        text = text[0].upper() + text[1:]
+    elif query.metric == "sum":
+        text = f"{fmt(values.sum())} across {_describe(query, n)}."
+    elif query.metric == "mean":
+        text = (f"Average {query.target} is {fmt(values.mean())} over {_describe(query, n)}." if n
+                else f"No {_describe(query, n)}.")
+    elif query.metric == "rate":
+        base    = n
+        flagged = int((sub["Fraud_Flag"] == 1).sum()) if "Fraud_Flag" in sub.columns else 0
+        text    = f"{flagged:,} of {base:,} claims flagged ({flagged / base:.1%})." if base else "No matching claims."
+    else:  # top
+        col  = target if target in sub.columns else cost_col
+        top  = sub.sort_values(col, ascending=False).head(query.top_n)
+        rows = [f"{r.get('PatientID', '?')} ({fmt(float(r[col]))}"
+                + (f", {r['Fraud_Type']}" if "Fraud_Type" in r and r.get("Fraud_Flag", 0) == 1 else "") + ")"
+                for _, r in top.iterrows()]
+        text = f"Top {len(rows)} by {query.target} among {_describe(query, n)}: " + ("; ".join(rows) or "none") + "."
+        return Answer(text, query, top)
+    return Answer(text, query)
+
+
+class QueryEngine:
+    """Caches the value vocabulary and parsed claim dates per loaded frame."""
+
+    def __init__(self):
+        self._frame = lambda: None        # weakref to the frame the caches belong to
+        self._vocab = {}
+        self._dates = None
+        self._lock  = threading.Lock()
+
+    def _prepare(self, df: pd.DataFrame):
+        with self._lock:
+            if self._frame() is not df:
+                dates = None
+                for col in DATE_COLUMNS:
+                    if col in df.columns:
+                        d = pd.to_datetime(df[col], errors="coerce", format="mixed")
+                        if getattr(d.dt, "tz", None) is not None:
+                            d = d.dt.tz_convert(None)
+                        dates = d if dates is None else dates.fillna(d)
+                self._vocab, self._dates, self._frame = _vocabulary(df), dates, weakref.ref(df)
+            return self._vocab, self._dates
+
+    def answer(self, question: str, df: pd.DataFrame, cost_col: str = None):
+        """Answer if the question is a recognised aggregate over df, else None."""
+        if df is None or df.empty:
+            return None
+        t0 = time.perf_counter()
+        vocab, dates = self._prepare(df)
+        query = parse_question(question, df, vocab)
+        if query is None or (query.since is not None and dates is None):
+            return None
+        ans = run_query(query, df, cost_col, dates)
+        if ans is not None:
+            ans.elapsed_ms = (time.perf_counter() - t0) * 1000
+        return ans
+
+
+_engine = QueryEngine()
+
+
+def answer_question(question: str, df: pd.DataFrame, cost_col: str = None):
+    return _engine.answer(question, df, cost_col)
@@ -0,0 +1,168 @@
+"""
+rate_limit.py — Process-wide token-bucket limits for shared API quotas
+──────────────────────────────────────────────────────────────────────
+One Limiter per process (shared by every Streamlit session and background
+worker) holds, for each named limit, a global bucket plus one bucket per
+user.  acquire() takes a token from both, WAITING in line up to `timeout`
+seconds when either is empty instead of rejecting outright, and raises
+RateLimitTimeout only when the wait would exceed it.
+
+  limits.acquire("openai")                 # user from limits.set_user(uid)
+  limits.acquire("supabase", user="bulk-import", timeout=2)
+  limits.metrics()  → [{"limit", "acquired", "waited", "avg_wait_ms", "max_wait_ms", "timeouts", "queued"}, ...]
+
+Limits (requests per minute, burst = bucket size):
+  OPENAI_RPM / OPENAI_USER_RPM            default 500 / 20
+  SUPABASE_RPM / SUPABASE_USER_RPM        default 3000 / 600
+  RATE_LIMIT_WAIT_S                       default 10   (max queueing time)
+"""
+
+import os
+import time
+import threading
+
+RATE_LIMIT_WAIT_S = float(os.getenv("RATE_LIMIT_WAIT_S", "10"))
+IDLE_BUCKET_S     = 600           # drop per-user buckets untouched this long
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a token could not be obtained within the queueing timeout."""
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, capacity: float):
+        self.rate     = rate_per_s
+        self.capacity = capacity
+        self.tokens   = capacity
+        self.updated  = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+
+class _Limit:
+    def __init__(self, name: str, rpm: float, user_rpm: float, burst: float = None, user_burst: float = None):
+        self.name       = name
+        self.user_rpm   = user_rpm
+        self.user_burst = user_burst or max(1.0, user_rpm / 6)
+        self.bucket     = TokenBucket(rpm / 60.0, burst or max(1.0, rpm / 6))
+        self.users      = {}
+        self.cond       = threading.Condition()
+        self.stats      = {"acquired": 0, "waited": 0, "wait_s": 0.0, "max_wait_s": 0.0, "timeouts": 0, "queued": 0}
+
+    def _user_bucket(self, user: str):
+        if user is None or self.user_rpm <= 0:
+            return None
+        b = self.users.get(user)
+        if b is None:
+            b = self.users[user] = TokenBucket(self.user_rpm / 60.0, self.user_burst)
+        return b
+
+    def _prune(self, now: float) -> None:
+        if len(self.users) > 256:
+            for u in [u for u, b in self.users.items() if now - b.updated > IDLE_BUCKET_S]:
+                del self.users[u]
+
+
+class Limiter:
+    def __init__(self):
+        self._limits = {}
+        self._lock   = threading.Lock()
+        self._local  = threading.local()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._limits
+
+    # ── configuration ────────────────────────────────────────
+    def configure(self, name: str, rpm: float, user_rpm: float = 0,
+                  burst: float = None, user_burst: float = None) -> None:
+        with self._lock:
+            self._limits[name] = _Limit(name, rpm, user_rpm, burst, user_burst)
+
+    def set_user(self, user) -> None:
+        """Default user for acquire() calls made from this thread (one Streamlit session)."""
+        self._local.user = str(user) if user else None
+
+    def current_user(self):
+        return getattr(self._local, "user", None)
+
+    # ── acquire ──────────────────────────────────────────────
+    def acquire(self, name: str, user=None, cost: float = 1.0, timeout: float = None) -> float:
+        """Block until a token is free in the global and the user's bucket; returns seconds waited."""
+        limit = self._limits.get(name)
+        if limit is None:
+            return 0.0
+        user     = str(user) if user is not None else self.current_user()
+        timeout  = RATE_LIMIT_WAIT_S if timeout is None else timeout
+        start    = time.monotonic()
+        deadline = start + timeout
+        with limit.cond:
+            limit.stats["queued"] += 1
+            try:
+                while True:
+                    now   = time.monotonic()
+                    ub    = limit._user_bucket(user)
+                    wait  = max(limit.bucket.wait_time(cost, now), ub.wait_time(cost, now) if ub else 0.0)
+                    if wait <= 0:
+                        limit.bucket.take(cost)
+                        if ub:
+                            ub.take(cost)
+                        break
+                    if now + wait > deadline:
+                        limit.stats["timeouts"] += 1
+                        raise RateLimitTimeout(
+                            f"[RateLimit] {name}: no capacity within {timeout:.1f}s"
+                            + (f" for user {user[:8]}" if user else ""))
+                    limit.cond.wait(min(wait, deadline - now))
+            finally:
+                limit.stats["queued"] -= 1
+            waited = time.monotonic() - start
+            limit.stats["acquired"] += 1
+            if waited > 0.001:
+                limit.stats["waited"] += 1
+                limit.stats["wait_s"] += waited
+                limit.stats["max_wait_s"] = max(limit.stats["max_wait_s"], waited)
+            limit._prune(now)
+            limit.cond.notify()
+        return waited
+
+    def try_acquire(self, name: str, user=None, cost: float = 1.0) -> bool:
+        """Non-blocking variant for UI throttles: True if a token was taken."""
+        try:
+            self.acquire(name, user=user, cost=cost, timeout=0)
+            return True
+        except RateLimitTimeout:
+            return False
+
+    # ── metrics ──────────────────────────────────────────────
+    def metrics(self) -> list:
+        out = []
+        for name, limit in sorted(self._limits.items()):
+            s = dict(limit.stats)
+            out.append({
+                "limit":        name,
+                "rpm":          round(limit.bucket.rate * 60),
+                "user_rpm":     limit.user_rpm,
+                "acquired":     s["acquired"],
+                "waited":       s["waited"],
+                "avg_wait_ms":  round(s["wait_s"] / s["waited"] * 1000, 1) if s["waited"] else 0.0,
+                "max_wait_ms":  round(s["max_wait_s"] * 1000, 1),
+                "timeouts":     s["timeouts"],
+                "queued":       s["queued"],
+                "active_users": len(limit.users),
+            })
+        return out
+
+
+limits = Limiter()
+limits.configure("openai",   float(os.getenv("OPENAI_RPM", "500")),    float(os.getenv("OPENAI_USER_RPM", "20")))
+limits.configure("supabase", float(os.getenv("SUPABASE_RPM", "3000")), float(os.getenv("SUPABASE_USER_RPM", "600")))
@@ -0,0 +1,170 @@
+"""
+retrieval.py — In-process retrieval index over detected fraud cases
+───────────────────────────────────────────────────────────────────
+Lets the chat assistant ground a question in the few cases it is about
+instead of the whole table:
+
+  • TF-IDF (inverted index, cosine-normalised) over Primary_Diagnosis,
+    Fraud_Type and AI_Justification text
+  • exact-match indexes on PatientID, Hospital_PIN and Fraud_Type
+
+  index = FraudIndex()
+  index.upsert(frauds_df)                     # only new / changed rows are re-indexed
+  index.search("why is P0042 flagged?", k=5)  → list of case dicts
+
+Exact hits (an ID, PIN or fraud type named in the question) rank first;
+TF-IDF similarity orders the rest.  IDF is computed at query time, so
+adding documents never requires a rebuild.
+"""
+
+import re
+import math
+import hashlib
+import threading
+from collections import defaultdict, Counter
+
+TEXT_FIELDS   = ("Primary_Diagnosis", "Fraud_Type", "AI_Justification")
+STORED_FIELDS = ("PatientID", "Hospital_PIN", "Age", "Primary_Diagnosis", "Final_Billed_Amount",
+                 "Fraud_Type", "Risk_Score", "Investigation_Status", "AI_Justification")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were
+with why what which who how many much show me list all any case cases claim claims patient
+hospital fraud frauds flagged about tell give
+""".split())
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN.findall(str(text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _key(value) -> str:
+    """Normalised exact-match key (500001.0 and '500001' both → '500001')."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            value = int(value)
+    return str(value).strip().upper()
+
+
+class FraudIndex:
+    def __init__(self):
+        self._docs      = {}                      # PatientID → stored fields
+        self._digest    = {}                      # PatientID → content hash
+        self._tf        = {}                      # PatientID → {term: weight}
+        self._norm      = {}                      # PatientID → |tf-idf vector| (lazy)
+        self._postings  = defaultdict(set)        # term → PatientIDs
+        self._hospital  = defaultdict(set)        # Hospital_PIN → PatientIDs
+        self._ftype     = defaultdict(set)        # fraud type (lower) → PatientIDs
+        self._lock      = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ── maintenance ──────────────────────────────────────────
+    def upsert(self, frauds) -> int:
+        """Index new rows and re-index changed ones; returns how many were (re)indexed."""
+        records = frauds.to_dict("records") if hasattr(frauds, "to_dict") else list(frauds)
+        changed = 0
+        with self._lock:
+            for rec in records:
+                pid = _key(rec.get("PatientID"))
+                if not pid:
+                    continue
+                doc    = {f: rec.get(f) for f in STORED_FIELDS if f in rec}
+                digest = hashlib.md5(repr(sorted(doc.items(), key=lambda kv: kv[0])).encode()).hexdigest()
+                if self._digest.get(pid) == digest:
+                    continue
+                self._remove(pid)
+                self._add(pid, doc, digest)
+                changed += 1
+            if changed:
+                self._norm.clear()
+        return changed
+
+    def sync(self, frauds_df) -> int:
+        """Make the index match a full snapshot: upsert its rows, drop cases no longer present."""
+        changed = self.upsert(frauds_df)
+        keep    = {_key(p) for p in frauds_df["PatientID"]} if "PatientID" in frauds_df.columns else set()
+        with self._lock:
+            gone = [pid for pid in self._docs if pid not in keep]
+            for pid in gone:
+                self._remove(pid)
+            if gone:
+                self._norm.clear()
+        return changed + len(gone)
+
+    def _add(self, pid: str, doc: dict, digest: str) -> None:
+        terms = Counter(t for f in TEXT_FIELDS for t in tokenize(doc.get(f)))
+        self._docs[pid], self._digest[pid] = doc, digest
+        self._tf[pid] = {t: 1 + math.log(n) for t, n in terms.items()}
+        for t in terms:
+            self._postings[t].add(pid)
+        if doc.get("Hospital_PIN") is not None:
+            self._hospital[_key(doc["Hospital_PIN"])].add(pid)
+        if doc.get("Fraud_Type"):
+            self._ftype[str(doc["Fraud_Type"]).strip().lower()].add(pid)
+
+    def _remove(self, pid: str) -> None:
+        doc = self._docs.pop(pid, None)
+        if doc is None:
+            return
+        for t in self._tf.pop(pid, {}):
+            self._postings[t].discard(pid)
+            if not self._postings[t]:
+                del self._postings[t]
+        self._hospital[_key(doc.get("Hospital_PIN"))].discard(pid)
+        self._ftype[str(doc.get("Fraud_Type", "")).strip().lower()].discard(pid)
+        self._digest.pop(pid, None)
+
+    # ── query ────────────────────────────────────────────────
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._docs)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _doc_norm(self, pid: str) -> float:
+        n = self._norm.get(pid)
+        if n is None:
+            n = math.sqrt(sum((w * self._idf(t)) ** 2 for t, w in self._tf[pid].items())) or 1.0
+            self._norm[pid] = n
+        return n
+
+    def exact_matches(self, question: str) -> set:
+        """PatientIDs named directly (ID, hospital PIN or fraud type) in the question."""
+        with self._lock:
+            hits  = set()
+            words = {_key(w) for w in re.findall(r"[A-Za-z0-9_\-]+", question)}
+            for w in words:
+                if w in self._docs:
+                    hits.add(w)
+                hits |= self._hospital.get(w, set())
+            q = " " + " ".join(_TOKEN.findall(question.lower())) + " "
+            for ftype, pids in self._ftype.items():
+                if ftype and f" {' '.join(_TOKEN.findall(ftype))} " in q:
+                    hits |= pids
+            return hits
+
+    def search(self, question: str, k: int = 5) -> list:
+        """Top-k case dicts for the question: exact matches first, then TF-IDF cosine."""
+        with self._lock:
+            if not self._docs:
+                return []
+            exact  = self.exact_matches(question)
+            qterms = Counter(tokenize(question))
+            qvec   = {t: (1 + math.log(n)) * self._idf(t) for t, n in qterms.items() if t in self._postings}
+            scores = defaultdict(float)
+            for t, qw in qvec.items():
+                idf = self._idf(t)
+                for pid in self._postings[t]:
+                    scores[pid] += qw * self._tf[pid][t] * idf
+            qnorm = math.sqrt(sum(w * w for w in qvec.values())) or 1.0
+            for pid in scores:
+                scores[pid] /= qnorm * self._doc_norm(pid)
+            for pid in exact:
+                scores[pid] += 1.0
+            risk = lambda p: float(self._docs[p].get("Risk_Score") or 0)
+            ranked = sorted(scores, key=lambda p: (scores[p], risk(p)), reverse=True)
+            return [dict(self._docs[p]) for p in ranked[:k] if scores[p] > 0]
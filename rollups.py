@@ -0,0 +1,71 @@
+"""
+rollups.py — Daily claim / fraud rollups built at ingest time
+──────────────────────────────────────────────────────────────
+build_daily_rollup(df, ...) turns a scored batch of NEW claims into one row
+per (day, uid, State) with claim, flag and suspicious-amount counts, plus a
+State = "ALL" row per day so the dashboard's trend chart is a single range
+read on (uid, State, day) for any window.  The storage backends add these
+counts onto what is already stored (see bump_daily_rollup).
+"""
+
+import pandas as pd
+from datetime import datetime, timezone
+
+ALL_STATES = "ALL"
+TS_COLUMNS = ("Claim_Submission_Date", "Admission_Timestamp", "Discharge_Timestamp", "uploaded_at")
+ROLLUP_COLUMNS = ["day", "uid", "State", "claims", "flagged", "flagged_amt"]
+
+
+def claim_days(df: pd.DataFrame) -> pd.Series:
+    """ISO day of each claim, from the first usable timestamp column (else today)."""
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    days  = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    for col in TS_COLUMNS:
+        if col in df.columns:
+            ts = pd.to_datetime(df[col], errors="coerce", format="mixed")
+            if getattr(ts.dt, "tz", None) is not None:
+                ts = ts.dt.tz_convert(None)
+            days = days.fillna(ts)
+    return days.dt.strftime("%Y-%m-%d").fillna(today)
+
+
+def build_daily_rollup(df: pd.DataFrame, cost_col: str = None,
+                       uid: str = None, by_state: bool = True) -> pd.DataFrame:
+    """Aggregate a scored claims batch into ROLLUP_COLUMNS rows."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    flagged = (df["Fraud_Flag"] == 1) if "Fraud_Flag" in df.columns else pd.Series(False, index=df.index)
+    amount  = pd.to_numeric(df[cost_col], errors="coerce").fillna(0) if cost_col and cost_col in df.columns else 0.0
+    base = pd.DataFrame({
+        "day":         claim_days(df),
+        "State":       df["State"].fillna("Unknown").astype(str) if by_state and "State" in df.columns else ALL_STATES,
+        "claims":      1,
+        "flagged":     flagged.astype(int),
+        "flagged_amt": amount * flagged.astype(int),
+    })
+    totals = base.assign(State=ALL_STATES).groupby(["day", "State"], as_index=False)[["claims", "flagged", "flagged_amt"]].sum()
+    parts  = [totals]
+    if by_state and "State" in df.columns:
+        parts.append(base.groupby(["day", "State"], as_index=False)[["claims", "flagged", "flagged_amt"]].sum())
+    out = pd.concat(parts, ignore_index=True)
+    out["uid"] = str(uid or "")
+    out["flagged_amt"] = out["flagged_amt"].astype(float).round(2)
+    return out[ROLLUP_COLUMNS]
+
+
+def trend_window(n_days: int) -> tuple[str, str]:
+    """(start, end) ISO days covering the last n_days including today."""
+    end = pd.Timestamp.now(tz="UTC").normalize()
+    return (end - pd.Timedelta(days=max(n_days, 1) - 1)).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def to_trend_frame(rows, start: str, end: str) -> pd.DataFrame:
+    """Rollup rows → continuous daily frame with Date, Flagged, Total, Suspicious."""
+    idx = pd.date_range(start, end, freq="D")
+    df  = pd.DataFrame(rows, columns=["day", "claims", "flagged", "flagged_amt"]) if len(rows) else \
+          pd.DataFrame(columns=["day", "claims", "flagged", "flagged_amt"])
+    df["day"] = pd.to_datetime(df["day"])
+    df = (df.groupby("day")[["claims", "flagged", "flagged_amt"]].sum()
+            .reindex(idx, fill_value=0).rename_axis("Date").reset_index())
+    df.columns = ["Date", "Total", "Flagged", "Suspicious"]
+    return df[["Date", "Flagged", "Total", "Suspicious"]]
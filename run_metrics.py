@@ -0,0 +1,53 @@
+"""
+run_metrics.py — Rolling timings of script and fragment runs
+────────────────────────────────────────────────────────────
+Records how long each region of the dashboard takes per run — the full
+app.py script, or a single fragment (chat, report, settings, …) when only
+that fragment reruns — so the cost of an interaction can be compared with
+the cost of a full rerun.
+
+  metrics = RunMetrics()
+  with metrics.timed("chat"):
+      ...
+  metrics.summary()  → [{"region", "runs", "avg_ms", "p50_ms", "p95_ms", "p99_ms"}, ...]
+"""
+
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+FULL_SCRIPT = "full script"
+
+
+class RunMetrics:
+    def __init__(self, window: int = 200):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock    = threading.Lock()
+
+    def record(self, region: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[region].append(seconds)
+
+    @contextmanager
+    def timed(self, region: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(region, time.perf_counter() - t0)
+
+    def summary(self) -> list:
+        with self._lock:
+            items = {k: sorted(v) for k, v in self._samples.items() if v}
+        out = []
+        for region, s in sorted(items.items(), key=lambda kv: kv[0] != FULL_SCRIPT):
+            out.append({
+                "region": region,
+                "runs":   len(s),
+                "avg_ms": round(sum(s) / len(s) * 1000, 1),
+                "p50_ms": round(s[len(s) // 2] * 1000, 1),
+                "p95_ms": round(s[min(len(s) - 1, int(len(s) * .95))] * 1000, 1),
+                "p99_ms": round(s[min(len(s) - 1, int(len(s) * .99))] * 1000, 1),
+            })
+        return out
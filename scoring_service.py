@@ -0,0 +1,350 @@
+"""
+scoring_service.py — Real-time claim scoring over HTTP
+──────────────────────────────────────────────────────
+Scores claims at pre-authorization time with the same rules, features and
+IsolationForest as the batch CLI (main.py), but keeps everything in memory:
+the fitted forest, the aggregate feature store (average cost per hospital,
+claims and hospitals per patient) and the date formats of the reference
+data.  A request only builds a handful of floats per claim and runs one
+forest prediction for the whole batch — no DataFrame, no refit.  The forest
+is flattened into numpy arrays (CompiledForest) so that prediction walks all
+trees at once instead of looping over them in Python.
+
+  python scoring_service.py --data ayushman_claims.csv --port 8095
+  python scoring_service.py --save model.pkl            # fit once, then exit
+  python scoring_service.py --model model.pkl           # start from a saved model
+
+  POST /score   {"PatientID": "P1", "Hospital_PIN": 500014, ...}        one claim
+                {"claims": [{...}, {...}]}                              up to SCORING_MAX_BATCH
+     → {"results": [{"PatientID", "Risk_Score", "Fraud_Flag", "Fraud_Type",
+                     "justification", "justification_source", "reasons"}], "latency_ms"}
+  GET  /health  → model facts        GET /metrics → p50 / p95 / p99 latency, request counts
+
+Justifications are an LLM explanation from explain_cache.db when a similar
+claim was explained before, otherwise a rule-based sentence — the service
+never calls the LLM on the request path.  The feature store is read-only:
+scored claims are not added to it until the model is rebuilt.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import pickle
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from main import FileStats, fit_model, read_chunks, DATE_COLS
+from explain_cache import ExplanationCache, claim_signature, EXPLAIN_CACHE_PATH
+from run_metrics import RunMetrics
+
+load_dotenv()
+
+SCORING_MAX_BATCH = int(os.getenv("SCORING_MAX_BATCH", "100"))
+LLM_MODEL         = os.getenv("LLM_MODEL", "gpt-4o-mini")      # key of cached explanations
+
+
+def _key(value) -> str:
+    """Store key for a PatientID / Hospital_PIN: 500014, 500014.0 and "500014" are one hospital."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _num(value, default=math.nan) -> float:
+    try:
+        f = float(value)
+        return default if math.isnan(f) else f
+    except (TypeError, ValueError):
+        return default
+
+
+# ═══════════════════════════════════════════════════════════════
+#  FOREST  (all trees in flat arrays, walked together)
+# ═══════════════════════════════════════════════════════════════
+class CompiledForest:
+    """IsolationForest.predict without the per-tree Python loop: scikit-learn
+    walks the 200 trees one after another (~15 ms for a single claim), here
+    every tree is advanced one level per numpy step, so a request costs
+    max-depth steps.  Gives the same labels as the fitted forest."""
+
+    def __init__(self, forest):
+        feature, threshold, left, right, path, roots, offset = [], [], [], [], [], [], 0
+        for i, (est, feats) in enumerate(zip(forest.estimators_, forest.estimators_features_)):
+            t = est.tree_
+            leaf = t.children_left == -1
+            roots.append(offset)
+            feature.append(np.where(leaf, 0, np.asarray(feats)[np.maximum(t.feature, 0)]))
+            threshold.append(t.threshold)
+            left.append(np.where(leaf, np.arange(t.node_count), t.children_left) + offset)
+            right.append(np.where(leaf, np.arange(t.node_count), t.children_right) + offset)
+            path.append(forest._decision_path_lengths[i] + forest._average_path_length_per_tree[i] - 1.0)
+            offset += t.node_count
+        self.feature   = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.left      = np.concatenate(left)                 # leaves point at themselves
+        self.right     = np.concatenate(right)
+        self.path      = np.concatenate(path)
+        self.roots     = np.asarray(roots)
+        self.depth     = max(est.tree_.max_depth for est in forest.estimators_)
+        self.norm      = len(forest.estimators_) * _average_path_length(forest._max_samples)
+        self.offset    = forest.offset_
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        X    = np.asarray(X, dtype=np.float32)                # trees compare in float32, like sklearn
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node    = np.where(go_left, self.left[node], self.right[node])
+        depths = self.path[node].sum(axis=1)
+        scores = 2 ** (-depths / self.norm) if self.norm else np.ones(len(X))
+        return -scores - self.offset
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def _average_path_length(n: int) -> float:
+    """Expected path length of an unsuccessful BST search over n points (Liu et al.)."""
+    if n <= 1:
+        return 0.0
+    if n == 2:
+        return 1.0
+    return 2.0 * (math.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+
+
+# ═══════════════════════════════════════════════════════════════
+#  MODEL  (forest + feature store, built once)
+# ═══════════════════════════════════════════════════════════════
+class ScoringModel:
+    def __init__(self, stats: FileStats, forest, source: str):
+        self.forest       = CompiledForest(forest)
+        pairs             = stats.pairs.dropna().map(_key)
+        self.hospital_avg = {_key(k): v for k, v in stats.hospital_avg.items()}
+        self.claims       = {_key(k): v for k, v in stats.claims.items()}
+        self.hospitals    = pairs.groupby("PatientID")["Hospital_PIN"].agg(set).to_dict()
+        self.date_fmts    = dict(stats.date_fmts)
+        self.info         = {"source": source, "rows": stats.rows, "hospitals": len(self.hospital_avg),
+                             "patients": len(self.claims), "fitted_at": datetime.now().isoformat(timespec="seconds")}
+
+    @classmethod
+    def build(cls, path: str, contamination: float = 0.12, n_estimators: int = 200,
+              chunk_rows: int = 0, fit_rows: int = 200_000) -> "ScoringModel":
+        t0    = time.perf_counter()
+        stats = FileStats(fit_rows)
+        for chunk in read_chunks(path, chunk_rows):
+            stats.add(chunk)
+        model = cls(stats, fit_model(stats, contamination, n_estimators), path)
+        print(f"[Scoring] model built from {stats.rows:,} claims in {time.perf_counter() - t0:.1f}s")
+        return model
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: str) -> "ScoringModel":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    # ── features ─────────────────────────────────────────────
+    def _date(self, value, col: str):
+        if value in (None, ""):
+            return None
+        fmt = self.date_fmts.get(col)
+        if fmt:                               # same as main.add_features: off-format dates are missing
+            try:
+                return datetime.strptime(str(value), fmt)
+            except ValueError:
+                return None
+        ts = pd.to_datetime(value, errors="coerce")
+        return None if pd.isna(ts) else ts.to_pydatetime()
+
+    def features(self, claims: list) -> tuple:
+        """Feature matrix (main.FEATURES order) plus the per-claim values the rules need.
+        Counts include the other claims of the same request, as a batch file would."""
+        in_request, seen_at = {}, {}
+        for c in claims:
+            pid = _key(c.get("PatientID"))
+            in_request[pid] = in_request.get(pid, 0) + 1
+            if c.get("Hospital_PIN") is not None:
+                seen_at.setdefault(pid, set()).add(_key(c.get("Hospital_PIN")))
+
+        X, facts = np.zeros((len(claims), 7)), []
+        for i, c in enumerate(claims):
+            d     = {col: self._date(c.get(col), col) for col in DATE_COLS}
+            los   = (d["Discharge_Timestamp"] - d["Admission_Timestamp"]).days \
+                    if d["Discharge_Timestamp"] and d["Admission_Timestamp"] else math.nan
+            delay = (d["PreAuth_Approval_Date"] - d["PreAuth_Request_Date"]).days \
+                    if d["PreAuth_Approval_Date"] and d["PreAuth_Request_Date"] else math.nan
+            cost  = _num(c.get("Final_Billed_Amount"))
+            rate  = _num(c.get("Base_Package_Rate"))
+            ratio = cost / (1 if rate == 0 else rate)
+            pid    = _key(c.get("PatientID"))
+            hosp   = self.hospital_avg.get(_key(c.get("Hospital_PIN")), cost)    # unseen hospital: its own claim
+            count  = self.claims.get(pid, 0) + in_request[pid]
+            n_hosp = len(self.hospitals.get(pid, set()) | seen_at.get(pid, set()))
+            X[i] = [cost, ratio, los, delay, hosp, count, _num(c.get("Age"))]
+            facts.append({"cost": cost, "rate": rate, "ratio": ratio, "los": los, "count": count, "n_hosp": n_hosp})
+        return np.nan_to_num(X, nan=0.0), facts
+
+    # ── scoring ──────────────────────────────────────────────
+    def score(self, claims: list, cache: ExplanationCache = None) -> list:
+        X, facts = self.features(claims)
+        anomaly  = self.forest.predict(X)
+        out = []
+        for c, f, ml in zip(claims, facts, anomaly):
+            reasons = []
+            if f["rate"] == 0:
+                reasons.append("the base package rate is ₹0")
+            if f["ratio"] > 2.5:
+                reasons.append(f"the bill is {f['ratio']:.1f}x the package rate (cap 2.5x)")
+            if f["los"] <= 0:
+                reasons.append(f"the length of stay is {f['los']:.0f} days")
+            if f["n_hosp"] > 1:
+                reasons.append(f"the patient has claims at {f['n_hosp']} hospitals")
+            rule = int(bool(reasons))
+            if ml == -1:
+                reasons.append("the cost, stay and pre-auth profile is anomalous for this population")
+            risk  = round(rule * 0.5 + (ml == -1) * 0.4 + (f["ratio"] > 2) * 0.1, 2)
+            ftype = ("Ghost Billing"     if f["rate"] == 0 else
+                     "Upcoding"          if f["ratio"] > 2.5 else
+                     "Identity Misuse"   if f["count"] > 2 else
+                     "Fake Admission"    if f["los"] <= 0 else
+                     "Anomalous Pattern")
+            flag = int(risk > 0.5)
+            text, source = "", "none"
+            if flag:
+                row = {**c, "LOS": f["los"], "Fraud_Type": ftype}
+                text = cache.get(claim_signature(row), LLM_MODEL) if cache is not None else None
+                source = "cache" if text else "rules"
+                text = text or f"{ftype}: " + "; ".join(reasons) + "."
+            out.append({"PatientID": c.get("PatientID"), "TransactionID": c.get("TransactionID"),
+                        "Risk_Score": risk, "Fraud_Flag": flag, "Fraud_Type": ftype,
+                        "ML_Anomaly": int(ml), "justification": text, "justification_source": source,
+                        "reasons": reasons})
+        return out
+
+
+# ═══════════════════════════════════════════════════════════════
+#  HTTP
+# ═══════════════════════════════════════════════════════════════
+class ScoringService:
+    def __init__(self, model: ScoringModel, cache: ExplanationCache = None):
+        self.model   = model
+        self.cache   = cache
+        self.metrics = RunMetrics(window=10_000)
+        self.counts  = {"requests": 0, "claims": 0, "errors": 0}
+        self.started = time.time()
+        self._lock   = threading.Lock()
+
+    def handle(self, body) -> dict:
+        claims = body.get("claims") if isinstance(body, dict) and "claims" in body else body
+        claims = claims if isinstance(claims, list) else [claims]
+        if not claims or not all(isinstance(c, dict) for c in claims):
+            raise ValueError("expected a claim object, a list of claims or {\"claims\": [...]}")
+        if len(claims) > SCORING_MAX_BATCH:
+            raise OverflowError(f"at most {SCORING_MAX_BATCH} claims per request")
+        t0 = time.perf_counter()
+        results = self.model.score(claims, self.cache)
+        elapsed = time.perf_counter() - t0
+        self.metrics.record("score", elapsed)
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts["claims"]   += len(claims)
+        return {"results": results, "latency_ms": round(elapsed * 1000, 2)}
+
+    def snapshot(self) -> dict:
+        up = time.time() - self.started
+        return {**self.counts, "uptime_s": round(up, 1), "claims_per_s": round(self.counts["claims"] / max(up, 1e-9), 1),
+                "latency": self.metrics.summary()}
+
+
+def make_handler(service: ScoringService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version        = "HTTP/1.1"   # keep-alive: a client reuses its connection
+        disable_nagle_algorithm = True         # headers and body go out as two writes; don't hold the second for an ACK
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code: int, body: dict) -> None:
+            data = json.dumps(body, default=str).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                return self._json(200, {"status": "ok", "model": service.model.info,
+                                        "explanation_cache": service.cache is not None})
+            if self.path == "/metrics":
+                return self._json(200, service.snapshot())
+            self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path != "/score":
+                return self._json(404, {"error": "not found"})
+            try:
+                self._json(200, service.handle(json.loads(raw or b"null")))
+            except OverflowError as e:
+                self._json(413, {"error": str(e)})
+            except (ValueError, TypeError) as e:
+                with service._lock:
+                    service.counts["errors"] += 1
+                self._json(400, {"error": str(e)})
+            except Exception as e:
+                with service._lock:
+                    service.counts["errors"] += 1
+                print(f"[Scoring] error: {e}")
+                self._json(500, {"error": "scoring failed"})
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--data", default="ayushman_claims.csv", help="reference claims the model is fitted on")
+    ap.add_argument("--model", help="load a model saved with --save instead of fitting")
+    ap.add_argument("--save", help="fit, write the model here and exit")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8095)
+    ap.add_argument("--contamination", type=float, default=0.12)
+    ap.add_argument("--n-estimators", type=int, default=200)
+    ap.add_argument("--chunk-rows", type=int, default=0, help="read the reference data in chunks")
+    args = ap.parse_args(argv)
+
+    model = (ScoringModel.load(args.model) if args.model else
+             ScoringModel.build(args.data, args.contamination, args.n_estimators, args.chunk_rows))
+    if args.save:
+        model.save(args.save)
+        print(f"[Scoring] model saved to {args.save}")
+        return 0
+
+    cache   = ExplanationCache() if os.path.exists(EXPLAIN_CACHE_PATH) else None
+    service = ScoringService(model, cache)
+    server  = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"[Scoring] serving on http://{args.host}:{args.port}  (POST /score, GET /health, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"[Scoring] {json.dumps(service.snapshot())}")
+    return 0
+
+
+if __name__ == "__main__":
+    import scoring_service                  # pickle --save models as scoring_service.*, not __main__.*
+    sys.exit(scoring_service.main())
@@ -0,0 +1,221 @@
+"""
+session_store.py — Bounded login-session store for the ?s= recovery link
+────────────────────────────────────────────────────────────────────────
+Maps the short session id in the dashboard URL to the signed-in user, so a
+browser refresh does not log the investigator out.  Entries expire after
+SESSION_TTL_HOURS without use, the least recently used are evicted beyond
+SESSION_MAX_ENTRIES, and expired ones are swept every SESSION_SWEEP_S.
+
+  store = open_store()                     # SESSION_STORE = memory | sqlite
+  sid   = new_session_id()
+  store.put(sid, {"uid": user.id, "email": user.email})
+  store.get(sid)    → {"uid", "email"} or None (unknown or expired)
+  store.delete(sid)
+  store.metrics()   → {"entries", "hits", "misses", "expired", "evicted"}
+
+MemorySessionStore is an OrderedDict (O(1) lookup and LRU move); the SQLite
+variant keeps sessions across restarts in SESSION_DB_PATH with the same
+limits.  Values must be JSON-serialisable.
+"""
+
+import os
+import json
+import time
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+
+SESSION_STORE       = os.getenv("SESSION_STORE", "memory")
+SESSION_DB_PATH     = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_TTL_HOURS   = float(os.getenv("SESSION_TTL_HOURS", "12"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_SWEEP_S     = float(os.getenv("SESSION_SWEEP_S", "300"))
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(12)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  IN-MEMORY
+# ═══════════════════════════════════════════════════════════════
+class MemorySessionStore:
+    def __init__(self, ttl_hours: float = None, max_entries: int = None, sweep_s: float = None):
+        self.ttl         = (SESSION_TTL_HOURS if ttl_hours is None else ttl_hours) * 3600
+        self.max_entries = SESSION_MAX_ENTRIES if max_entries is None else max_entries
+        self.sweep_s     = SESSION_SWEEP_S if sweep_s is None else sweep_s
+        self.stats       = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._lock       = threading.Lock()
+        self._last_sweep = time.time()
+        self._data       = OrderedDict()       # sid → (last_used, value), least recently used first
+
+    def _expired(self, last_used: float, now: float) -> bool:
+        return self.ttl > 0 and now - last_used >= self.ttl
+
+    def get(self, sid: str):
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            item = self._data.get(sid)
+            if item is None or self._expired(item[0], now):
+                if item is not None:
+                    del self._data[sid]
+                    self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._data[sid] = (now, item[1])
+            self._data.move_to_end(sid)
+            self.stats["hits"] += 1
+            return item[1]
+
+    def put(self, sid: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._data[sid] = (now, value)
+            self._data.move_to_end(sid)
+            while self.max_entries > 0 and len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evicted"] += 1
+            self._maybe_sweep(now)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def __contains__(self, sid) -> bool:
+        return self.get(sid) is not None
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep >= self.sweep_s:
+            self._sweep(now)
+
+    def _sweep(self, now: float) -> int:
+        """Drop expired sessions; the dict is in last-use order, so stop at the first live one."""
+        self._last_sweep, n = now, 0
+        while self._data:
+            sid, (last_used, _) = next(iter(self._data.items()))
+            if not self._expired(last_used, now):
+                break
+            del self._data[sid]
+            n += 1
+        self.stats["expired"] += n
+        return n
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def metrics(self) -> dict:
+        return {**self.stats, "entries": len(self), "backend": "memory"}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SQLITE (survives restarts)
+# ═══════════════════════════════════════════════════════════════
+class SQLiteSessionStore:
+    def __init__(self, path: str = None, ttl_hours: float = None, max_entries: int = None, sweep_s: float = None):
+        self.path        = path or SESSION_DB_PATH
+        self.ttl         = (SESSION_TTL_HOURS if ttl_hours is None else ttl_hours) * 3600
+        self.max_entries = SESSION_MAX_ENTRIES if max_entries is None else max_entries
+        self.sweep_s     = SESSION_SWEEP_S if sweep_s is None else sweep_s
+        self.stats       = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._lock       = threading.Lock()
+        self._last_sweep = 0.0                 # sweep once on the first call after a restart
+        self._db         = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute("pragma journal_mode=wal")
+            self._db.execute("""
+                create table if not exists sessions (
+                    sid        text primary key,
+                    value      text not null,
+                    created_at real not null,
+                    last_used  real not null
+                )""")
+            self._db.execute("create index if not exists idx_sessions_last_used on sessions (last_used)")
+
+    def get(self, sid: str):
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            row = self._db.execute("select value, last_used from sessions where sid = ?", (sid,)).fetchone()
+            if row is None or (self.ttl > 0 and now - row[1] >= self.ttl):
+                if row is not None:
+                    with self._db:
+                        self._db.execute("delete from sessions where sid = ?", (sid,))
+                    self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            with self._db:
+                self._db.execute("update sessions set last_used = ? where sid = ?", (now, sid))
+            self.stats["hits"] += 1
+            return json.loads(row[0])
+
+    def put(self, sid: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "insert into sessions (sid, value, created_at, last_used) values (?,?,?,?) "
+                    "on conflict(sid) do update set value = excluded.value, last_used = excluded.last_used",
+                    (sid, json.dumps(value), now, now))
+                self.stats["evicted"] += self._evict()        # bounded on every put, like the memory store
+            self._maybe_sweep(now)
+
+    def delete(self, sid: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("delete from sessions where sid = ?", (sid,))
+
+    def __contains__(self, sid) -> bool:
+        return self.get(sid) is not None
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep >= self.sweep_s:
+            self._sweep(now)
+
+    def _evict(self) -> int:
+        """Delete the least recently used sessions beyond max_entries (inside a transaction)."""
+        if self.max_entries <= 0:
+            return 0
+        excess = self._db.execute("select count(*) from sessions").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        return self._db.execute("delete from sessions where sid in (select sid from sessions "
+                                "order by last_used limit ?)", (excess,)).rowcount
+
+    def _sweep(self, now: float) -> int:
+        """Drop expired sessions, then the least recently used beyond max_entries."""
+        self._last_sweep = now
+        with self._db:
+            expired = 0
+            if self.ttl > 0:
+                expired = self._db.execute("delete from sessions where last_used < ?", (now - self.ttl,)).rowcount
+            evicted = self._evict()
+        self.stats["expired"] += expired
+        self.stats["evicted"] += evicted
+        return expired + evicted
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("select count(*) from sessions").fetchone()[0]
+
+    def metrics(self) -> dict:
+        return {**self.stats, "entries": len(self), "backend": "sqlite"}
+
+
+def open_store(kind: str = None):
+    """The store selected by SESSION_STORE ("memory" or "sqlite")."""
+    kind = (kind or SESSION_STORE).lower()
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind != "memory":
+        print(f"[Sessions] unknown SESSION_STORE={kind!r}, using memory")
+    return MemorySessionStore()
@@ -0,0 +1,147 @@
+"""
+snapshot.py — Disk snapshots of scored claims for warm restarts
+───────────────────────────────────────────────────────────────
+st.cache_data lives in process memory, so after a deploy or crash the first
+signed-in page view used to re-download every claim and refit the forest.
+A snapshot stores the scored frame (Parquet, pickle without pyarrow), the
+fitted model and a fingerprint of the source it was built from; on startup
+the dashboard asks the source for its current fingerprint (one cheap count
+query) and reuses the snapshot only if nothing changed.
+
+  snaps = ResultSnapshot()
+  key   = snaps.key("cloud:<uid>", {"contamination": .12, "n_estimators": 200, "pipeline": code_version(fn)})
+  snaps.load(key, fingerprint)              → {"df", "cost_col", "meta"} or None (missing / stale)
+  snaps.load_latest(key)                    → whatever snapshot is on disk (source unreachable)
+  snaps.save(key, fingerprint, df, cost_col, model)
+  snaps.load_model(key)                     → fitted estimator or None
+
+Each save writes new data files first and the <key>.json manifest last, so
+a crash mid-save leaves the previous snapshot intact.
+"""
+
+import os
+import json
+import time
+import uuid
+import pickle
+import hashlib
+import inspect
+import importlib.util
+
+import pandas as pd
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".pipeline_snapshot")
+SNAPSHOT_ON  = os.getenv("SNAPSHOT_ENABLED", "1") != "0"
+
+_HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def code_version(*fns) -> str:
+    """Short hash of the functions' source, so a changed pipeline invalidates old snapshots."""
+    src = "".join(inspect.getsource(fn) for fn in fns)
+    return hashlib.sha1(src.encode()).hexdigest()[:12]
+
+
+def file_fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return f"file:{st.st_size}:{st.st_mtime_ns}"
+
+
+class ResultSnapshot:
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.dir = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(scope: str, params: dict) -> str:
+        return hashlib.sha1(json.dumps([scope, params], sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _manifest(self, key: str):
+        try:
+            with open(self._path(f"{key}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ── read ─────────────────────────────────────────────────
+    def load(self, key: str, fingerprint: str):
+        meta = self._manifest(key)
+        if meta is None or meta.get("fingerprint") != fingerprint:
+            return None
+        return self._read(meta)
+
+    def load_latest(self, key: str):
+        """The current snapshot without checking it against the source."""
+        meta = self._manifest(key)
+        return self._read(meta) if meta is not None else None
+
+    def _read(self, meta: dict):
+        t0 = time.perf_counter()
+        try:
+            path = self._path(meta["frame"])
+            df   = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path)
+        except Exception as e:
+            print(f"[Snapshot] unreadable {meta['frame']}: {e}")
+            return None
+        if len(df) != meta.get("rows"):
+            return None
+        print(f"[Snapshot] warm start: {len(df):,} scored claims in {time.perf_counter() - t0:.2f}s")
+        return {"df": df, "cost_col": meta.get("cost_col"), "meta": meta}
+
+    def load_model(self, key: str):
+        meta = self._manifest(key)
+        if not meta or not meta.get("model"):
+            return None
+        with open(self._path(meta["model"]), "rb") as f:
+            return pickle.load(f)
+
+    # ── write ────────────────────────────────────────────────
+    def _write_frame(self, df: pd.DataFrame, stem: str) -> str:
+        if _HAS_ARROW:
+            try:
+                df.to_parquet(self._path(stem + ".parquet"), index=False)
+                return stem + ".parquet"
+            except Exception as e:                  # mixed-type object columns, etc.
+                print(f"[Snapshot] parquet failed ({e}); using pickle")
+        df.to_pickle(self._path(stem + ".pkl"))
+        return stem + ".pkl"
+
+    def save(self, key: str, fingerprint: str, df: pd.DataFrame, cost_col: str = None,
+             model=None, **extra) -> None:
+        t0, stem = time.perf_counter(), f"{key}-{uuid.uuid4().hex[:8]}"
+        old = self._manifest(key)
+        try:
+            meta = {"fingerprint": fingerprint, "rows": len(df), "cost_col": cost_col,
+                    "frame": self._write_frame(df.reset_index(drop=True), stem),
+                    "model": None, "created_at": time.time(), **extra}
+            if model is not None:
+                meta["model"] = stem + ".model.pkl"
+                with open(self._path(meta["model"]), "wb") as f:
+                    pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp = self._path(f"{key}.json.part")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp, self._path(f"{key}.json"))     # the snapshot switches over here
+        except Exception as e:
+            print(f"[Snapshot] save failed: {e}")
+            return
+        self._remove(old)
+        print(f"[Snapshot] saved {len(df):,} rows → {meta['frame']} in {time.perf_counter() - t0:.2f}s")
+
+    def _remove(self, meta) -> None:
+        for name in ((meta or {}).get("frame"), (meta or {}).get("model")):
+            if name:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    def discard(self, key: str) -> None:
+        self._remove(self._manifest(key))
+        try:
+            os.remove(self._path(f"{key}.json"))
+        except OSError:
+            pass
@@ -0,0 +1,68 @@
+"""
+storage.py — Storage backend selection for Ayushman Bharat Fraud Detection
+─────────────────────────────────────────────────────────────────────────
+The dashboard talks to its database through a module that exposes the
+functions listed in BACKEND_API.  Two implementations ship with the app:
+
+  DB_BACKEND=supabase   → supabase_db.py  (hosted Postgres, default)
+  DB_BACKEND=sqlite     → local_db.py     (embedded file, offline / benchmarks)
+
+Usage:
+  import storage
+  sb = storage.load_backend()        # honours $DB_BACKEND
+  sb.fetch_detected_frauds(user_id=uid)
+"""
+
+import os
+import importlib
+
+BACKENDS = {
+    "supabase": "supabase_db",
+    "sqlite":   "local_db",
+    "local":    "local_db",
+}
+
+# Every backend module must provide these callables.
+BACKEND_API = (
+    "is_configured",
+    "sign_up", "sign_in", "sign_out", "send_password_reset_email",
+    "get_current_user", "recover_session",
+    "fetch_data_from_supabase",
+    "claims_fingerprint",
+    "insert_new_rows_only",
+    "save_fraud_results_to_supabase",
+    "sync_local_csv_to_supabase",
+    "get_db_stats",
+    "get_user_activity_stats",
+    "get_trend_data",
+    "bump_daily_rollup",
+    "log_upload_session",
+    "get_upload_history",
+    "upsert_audit_log",
+    "fetch_audit_log",
+    "upsert_detected_frauds",
+    "update_ai_justifications",
+    "fetch_detected_frauds",
+    "fetch_detected_frauds_page",
+    "scan_detected_frauds_page",
+    "get_detected_frauds_summary",
+    "frauds_version",
+    "update_claim_status",
+    "update_claims_status_bulk",
+)
+
+
+def backend_name(name: str = None) -> str:
+    return (name or os.getenv("DB_BACKEND", "supabase")).strip().lower()
+
+
+def load_backend(name: str = None):
+    """Import and validate the configured backend module."""
+    name = backend_name(name)
+    if name not in BACKENDS:
+        raise ValueError(f"[Storage] Unknown DB_BACKEND '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    module  = importlib.import_module(BACKENDS[name])
+    missing = [fn for fn in BACKEND_API if not callable(getattr(module, fn, None))]
+    if missing:
+        raise RuntimeError(f"[Storage] Backend '{name}' is missing: {', '.join(missing)}")
+    return module
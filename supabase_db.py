@@ -4,11 +4,26 @@ supabase_db.py — Supabase integration for Ayushman Bharat Fraud Detection
 Key functions:
   insert_new_rows_only(df, ...)      → Insert fresh rows, SKIP duplicates
   fetch_data_from_supabase()         → pd.DataFrame (all claims)
+  claims_fingerprint(user_id=...)    → "count:newest uploaded_at:newest updated_at" change marker
   get_db_stats()                     → cumulative counts + last-updated date
+  bump_daily_rollup(rollup)          → add ingest counts to the daily rollup
+  get_trend_data(n_days, ...)        → daily Flagged / Total from the rollup
   log_upload_session(...)            → record each upload in upload_sessions
   get_upload_history(uid, limit)     → list of past uploads with date + counts
   upsert_audit_log(...)              → write one audit event
   fetch_audit_log(uid, limit)        → read audit events
+  update_ai_justifications(texts)    → write background LLM explanations
+  fetch_detected_frauds_page(...)    → one keyset page of the investigation queue
+  frauds_version()                   → change counter for detected_frauds
+  get_detected_frauds_summary(...)   → report totals via SQL aggregate
+  update_claims_status_bulk(ids, s)  → one status for many claims, one audit entry
+
+Every request runs through a shared CircuitBreaker (circuit_breaker.py)
+with a latency budget.  Once Supabase keeps failing, reads are answered
+immediately from the last good result (or the local SQLite mirror when
+SUPABASE_LOCAL_MIRROR=1) while a background probe waits for recovery.
+Tuning: SUPABASE_CALL_BUDGET_S (8), SUPABASE_KPI_BUDGET_S (3),
+SUPABASE_BREAKER_FAILURES (3), SUPABASE_BREAKER_RESET_S (30).
 
 Required Supabase SQL (run once in SQL Editor):
 ─────────────────────────────────────────────────
@@ -23,9 +38,18 @@ Required Supabase SQL (run once in SQL Editor):
       "AI_Justification"    text    default '',
       "Risk score per claim" float8  default 0,
       "user_id"             uuid    references auth.users,
-      "uploaded_at"         timestamptz default now()
+      "uploaded_at"         timestamptz default now(),
+      "updated_at"          timestamptz default now()
   );
 
+  -- Stamp every change (status, explanation, rescoring) so claims_fingerprint sees it
+  alter table claims add column if not exists "updated_at" timestamptz default now();
+  create index if not exists idx_claims_updated on claims ("updated_at" desc);
+  create or replace function touch_updated_at() returns trigger language plpgsql as $$
+  begin new."updated_at" = now(); return new; end $$;
+  drop trigger if exists claims_touch on claims;
+  create trigger claims_touch before update on claims for each row execute function touch_updated_at();
+
   -- Enable RLS (Allow all authenticated users to read for Global Dashboard)
   alter table claims enable row level security;
   create policy "Everyone can view claims" on claims for select using (true);
@@ -68,12 +92,14 @@ Required Supabase SQL (run once in SQL Editor):
   -- 4. Detected frauds table (Extracted after analysis)
   create table if not exists detected_frauds (
       "PatientID"           text primary key,
+      "Hospital_PIN"        text,
       "Age"                 int,
       "Primary_Diagnosis"   text    default '',
       "Final_Billed_Amount" float8,
       "Fraud_Type"          text    default 'Anomalous',
       "AI_Justification"    text    default '',
       "Risk_Score"          float8  default 0,
+      "Investigation_Status" text   default 'Pending',
       "user_id"             uuid    references auth.users,
       "detected_at"         timestamptz default now()
   );
@@ -81,18 +107,84 @@ Required Supabase SQL (run once in SQL Editor):
   alter table detected_frauds enable row level security;
   create policy "Authenticated can read frauds" on detected_frauds for select using (auth.role() = 'authenticated');
   create policy "Users can upsert frauds" on detected_frauds for insert with check (auth.uid() = user_id);
+
+  -- Existing projects: alter table detected_frauds add column if not exists "Hospital_PIN" text;
+
+  -- Keyset pagination for the Fraud Audit Report (Risk_Score desc, PatientID)
+  create index if not exists detected_frauds_user_risk
+      on detected_frauds (user_id, "Risk_Score" desc, "PatientID");
+
+  -- 5. Report summary totals, aggregated in the database
+  create or replace function detected_frauds_summary(p_user_id uuid default null,
+                                                     p_fraud_type text default null,
+                                                     p_status text default null)
+  returns json language sql stable as $$
+    with f as (
+      select "Fraud_Type", "Final_Billed_Amount", "Risk_Score" from detected_frauds
+      where (p_user_id is null or user_id = p_user_id)
+        and (p_fraud_type is null or "Fraud_Type" = p_fraud_type)
+        and (p_status is null or "Investigation_Status" = p_status)
+    )
+    select json_build_object(
+      'cases',        (select count(*) from f),
+      'total_amount', (select coalesce(sum("Final_Billed_Amount"), 0) from f),
+      'avg_risk',     (select coalesce(avg("Risk_Score"), 0) from f),
+      'by_type',      (select coalesce(json_object_agg("Fraud_Type", n), '{}'::json)
+                         from (select "Fraud_Type", count(*) n from f group by 1 order by 2 desc) t)
+    );
+  $$;
+
+  -- 6. Daily claims / flags rollup (State = 'ALL' rows hold the daily totals)
+  create table if not exists claim_daily_rollup (
+      day          date,
+      uid          text   default '',
+      "State"      text   default 'ALL',
+      claims       int    default 0,
+      flagged      int    default 0,
+      flagged_amt  float8 default 0,
+      primary key (uid, "State", day)
+  );
+
+  alter table claim_daily_rollup enable row level security;
+  create policy "Everyone can view rollups" on claim_daily_rollup for select using (true);
+
+  create or replace function bump_claim_daily_rollup(rows json)
+  returns void language sql security definer as $$
+    insert into claim_daily_rollup (day, uid, "State", claims, flagged, flagged_amt)
+    select (r->>'day')::date, coalesce(r->>'uid', ''), coalesce(r->>'State', 'ALL'),
+           (r->>'claims')::int, (r->>'flagged')::int, (r->>'flagged_amt')::float8
+    from json_array_elements(rows) r
+    on conflict (uid, "State", day) do update set
+      claims      = claim_daily_rollup.claims      + excluded.claims,
+      flagged     = claim_daily_rollup.flagged     + excluded.flagged,
+      flagged_amt = claim_daily_rollup.flagged_amt + excluded.flagged_amt;
+  $$;
 """
 
 import os
 import math
+import uuid
+import functools
+import threading
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import streamlit as st
 
+from circuit_breaker import CircuitBreaker
+from rate_limit import limits, RateLimitTimeout
+from rollups import ALL_STATES, trend_window, to_trend_frame
+
+try:
+    from httpx import TransportError as _TransportError      # what supabase-py raises for network failures
+except ImportError:
+    _TransportError = OSError
+
 load_dotenv()
 
+BACKEND_LABEL = "Supabase"
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY", "")
 _client = None
@@ -117,29 +209,162 @@ def init_supabase():
         return None
 
 
+# ══════════════════════════════════════════════════════════════
+#  CIRCUIT BREAKER  (fast-fail when Supabase is slow or down)
+# ══════════════════════════════════════════════════════════════
+CALL_BUDGET_S = float(os.getenv("SUPABASE_CALL_BUDGET_S", "8"))
+KPI_BUDGET_S  = float(os.getenv("SUPABASE_KPI_BUDGET_S", "3"))
+STATUS_CHUNK  = 200      # ids per UPDATE: the in() filter goes in the URL, ~2 KB stays under proxy limits
+MAX_ROWS      = int(os.getenv("SUPABASE_MAX_ROWS", "1000"))   # PostgREST db-max-rows: larger pages come back short
+
+
+def _probe():
+    init_supabase().table("claims").select("PatientID").limit(1).execute()
+
+
+def _is_outage(e: Exception) -> bool:
+    """
+    Only transport errors, timeouts and 5xx / 429 answers count against the
+    breaker.  A 4xx, a wrong password or a missing column means Supabase is
+    up and answered — that is the caller's error, not an outage.
+    """
+    if isinstance(e, (TimeoutError, ConnectionError, OSError, _TransportError)):
+        return True
+    status = str(getattr(e, "status", None) or getattr(e, "code", None) or "")   # gotrue .status, postgrest .code
+    return len(status) == 3 and status.isdigit() and (status[0] == "5" or status == "429")
+
+
+breaker = CircuitBreaker("Supabase",
+                         failure_threshold=int(os.getenv("SUPABASE_BREAKER_FAILURES", "3")),
+                         reset_timeout=float(os.getenv("SUPABASE_BREAKER_RESET_S", "30")),
+                         probe=_probe, is_failure=_is_outage)
+
+_mirror = None
+if os.getenv("SUPABASE_LOCAL_MIRROR", "").strip().lower() in ("1", "true", "yes"):
+    import local_db as _mirror
+
+_last_good      = OrderedDict()     # (function, args) → last successful read
+_last_good_lock = threading.Lock()  # reads run on Streamlit script threads and job workers alike
+_LAST_GOOD_MAX  = 64
+_writes        = threading.local()
+
+
+def _execute(query, budget: float = None):
+    """query.execute() under the shared rate limit, breaker and latency budget."""
+    try:
+        limits.acquire("supabase")
+    except RateLimitTimeout:
+        breaker.degrade()                    # serve last-good data, but don't trip the breaker
+        raise
+    return breaker.run(query.execute, budget=budget or CALL_BUDGET_S)
+
+
+def _copy(value):
+    return value.copy() if isinstance(value, (pd.DataFrame, dict, list)) else value
+
+
+def _fallback(key, name, args, kwargs):
+    with _last_good_lock:
+        last = _last_good.get(key)
+    if last is not None:
+        return _copy(last)
+    if _mirror is not None:
+        try:
+            return getattr(_mirror, name)(*args, **kwargs)
+        except Exception as e:
+            print(f"[Supabase] local mirror {name} error: {e}")
+    return None
+
+
+def _resilient(fn):
+    """
+    Read path guard: remember the last good result of `fn` and serve it (or
+    the local mirror) without waiting whenever the call degrades.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        result, error, called = None, None, False
+        if not breaker.is_open:
+            called = True
+            breaker.begin()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error = e
+            if not breaker.failed_in_call():
+                if error is not None:
+                    raise error
+                with _last_good_lock:
+                    _last_good[key] = _copy(result)
+                    _last_good.move_to_end(key)
+                    while len(_last_good) > _LAST_GOOD_MAX:
+                        _last_good.popitem(last=False)
+                return result
+        fallback = _fallback(key, fn.__name__, args, kwargs)
+        if fallback is not None:
+            return fallback
+        if error is not None:
+            raise error
+        return result if called else fn(*args, **kwargs)
+    return wrapper
+
+
+def _write_ok(result) -> bool:
+    """The write functions report failure in their return value instead of raising:
+    False, (False, msg), {"status": "error"} or {"error": "..."}."""
+    if isinstance(result, tuple):
+        result = result[0] if result else None
+    if isinstance(result, dict):
+        return result.get("status") != "error" and not result.get("error")
+    return result is not False
+
+
+def _mirrored(fn):
+    """Write path: also apply successful writes to the local mirror, if enabled."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _mirror is None or getattr(_writes, "active", False):
+            return fn(*args, **kwargs)       # nested write: the outer call mirrors it
+        _writes.active = True
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _writes.active = False
+        if not _write_ok(result):
+            return result                    # the primary refused it; keep the mirror identical
+        try:
+            getattr(_mirror, fn.__name__)(*args, **kwargs)
+        except Exception as e:
+            print(f"[Supabase] local mirror {fn.__name__} error: {e}")
+        return result
+    return wrapper
+
+
 # ══════════════════════════════════════════════════════════════
 #  AUTH
 # ══════════════════════════════════════════════════════════════
 def sign_up(email, password):
     client = init_supabase()
-    return client.auth.sign_up({"email": email, "password": password})
+    return breaker.run(client.auth.sign_up, {"email": email, "password": password}, budget=CALL_BUDGET_S)
 
 def sign_in(email, password):
     client = init_supabase()
-    return client.auth.sign_in_with_password({"email": email, "password": password})
+    return breaker.run(client.auth.sign_in_with_password, {"email": email, "password": password},
+                       budget=CALL_BUDGET_S)
 
 def sign_out():
     client = init_supabase()
-    return client.auth.sign_out()
+    return breaker.run(client.auth.sign_out, budget=CALL_BUDGET_S)
 
 def send_password_reset_email(email):
     client = init_supabase()
-    return client.auth.reset_password_for_email(email)
+    return breaker.run(client.auth.reset_password_for_email, email, budget=CALL_BUDGET_S)
 
 def get_current_user():
     client = init_supabase()
     try:
-        res = client.auth.get_user()
+        res = breaker.run(client.auth.get_user, budget=KPI_BUDGET_S)
         return res.user if res else None
     except:
         return None
@@ -148,7 +373,7 @@ def recover_session(access_token, refresh_token):
     """Attempt to restore a session using tokens."""
     client = init_supabase()
     try:
-        res = client.auth.set_session(access_token, refresh_token)
+        res = breaker.run(client.auth.set_session, access_token, refresh_token, budget=CALL_BUDGET_S)
         return res.user if res else None
     except:
         return None
@@ -163,6 +388,7 @@ def is_configured() -> bool:
 #  FETCH ALL CLAIMS  (paginated)
 # ══════════════════════════════════════════════════════════════
 @st.cache_data(ttl=600, show_spinner=False)
+@_resilient
 def fetch_data_from_supabase(table: str = "claims",
                              page_size: int = 1000,
                              user_id: str = None) -> pd.DataFrame:
@@ -170,44 +396,66 @@ def fetch_data_from_supabase(table: str = "claims",
     Fetch all rows from the claims table using cursor-based pagination.
     Returns a pd.DataFrame (empty if table is empty).
     """
-    client   = init_supabase()
-    all_rows = []
-    start    = 0
-    
-    # Try fetching with user filter if requested
-    try:
-        while True:
-            query = client.table(table).select("*").range(start, start + page_size - 1)
-            if user_id:
-                query = query.eq("user_id", user_id)
-            resp  = query.execute()
-            batch = resp.data or []
-            all_rows.extend(batch)
-            if len(batch) < page_size:
-                break
-            start += page_size
-    except Exception as e:
-        # If user_id column is missing, fall back to global fetch
-        if "user_id" in str(e).lower() and user_id:
-            all_rows = []
-            start = 0
-            while True:
-                query = client.table(table).select("*").range(start, start + page_size - 1)
-                resp  = query.execute()
-                batch = resp.data or []
-                all_rows.extend(batch)
-                if len(batch) < page_size:
-                    break
-                start += page_size
-        else:
-            raise e
+    client     = init_supabase()
+    all_rows   = []
+    start      = 0
+    use_filter = bool(user_id)
+
+    while True:
+        query = client.table(table).select("*").range(start, start + page_size - 1)
+        if use_filter:
+            query = query.eq("user_id", user_id)
+        try:
+            resp = _execute(query)
+        except Exception as e:
+            # If user_id column is missing the very first page says so —
+            # drop the filter and carry on instead of refetching everything.
+            if use_filter and start == 0 and "user_id" in str(e).lower():
+                use_filter = False
+                breaker.begin()              # the retry alone decides whether this read degraded
+                continue
+            raise
+        batch = resp.data or []
+        all_rows.extend(batch)
+        if len(batch) < page_size:
+            break
+        start += page_size
 
     return pd.DataFrame(all_rows) if all_rows else pd.DataFrame()
 
 
+@_resilient
+def claims_fingerprint(table: str = "claims", user_id: str = None) -> str:
+    """
+    Cheap change marker for the claims behind the dashboard: row count,
+    newest uploaded_at (new claims) and newest updated_at (status or
+    explanation edits, via the claims_touch trigger).  Used to validate disk
+    snapshots.  While Supabase is down the last fingerprint read is served,
+    so the dashboard keeps the snapshot that matched it.
+    """
+    client = init_supabase()
+
+    def newest(col, **count):
+        query = client.table(table).select(col, **count).order(col, desc=True)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        return _execute(query.limit(1), KPI_BUDGET_S)
+
+    resp = newest("uploaded_at", count="exact")
+    last = (resp.data or [{}])[0].get("uploaded_at")
+    try:
+        edit = (newest("updated_at").data or [{}])[0].get("updated_at")
+    except Exception as e:
+        if "updated_at" not in str(e).lower():
+            raise
+        edit = None                          # schema predates the column: new claims only
+    return f"{resp.count or 0}:{last}:{edit}"
+
+
 # ══════════════════════════════════════════════════════════════
 #  INSERT NEW ROWS ONLY  (skip duplicates)
 # ══════════════════════════════════════════════════════════════
+@_mirrored
 def insert_new_rows_only(df: pd.DataFrame,
                          table: str = "claims",
                          conflict_col: str = "PatientID",
@@ -227,10 +475,11 @@ def insert_new_rows_only(df: pd.DataFrame,
         "total":   int,   # rows in the uploaded file
         "new":     int,   # rows actually inserted
         "skipped": int,   # duplicates skipped
+        "new_keys": list, # conflict_col values of the inserted rows
         "error":   str | None
       }
     """
-    result = {"total": len(df), "new": 0, "skipped": 0, "error": None}
+    result = {"total": len(df), "new": 0, "skipped": 0, "new_keys": [], "error": None}
 
     try:
         client = init_supabase()
@@ -242,7 +491,7 @@ def insert_new_rows_only(df: pd.DataFrame,
             query = client.table(table).select(conflict_col).range(page, page + ps - 1)
             if user_id:
                 query = query.eq("user_id", user_id)
-            resp  = query.execute()
+            resp  = _execute(query)
             batch = resp.data or []
             existing_keys.update(row[conflict_col] for row in batch if conflict_col in row)
             if len(batch) < ps:
@@ -262,6 +511,7 @@ def insert_new_rows_only(df: pd.DataFrame,
             new_df["user_id"] = user_id
 
         result["new"] = len(new_df)
+        result["new_keys"] = new_df[conflict_col].astype(str).tolist() if conflict_col in new_df.columns else []
 
         if new_df.empty:
             return result   # nothing to insert
@@ -271,7 +521,7 @@ def insert_new_rows_only(df: pd.DataFrame,
         n_chunks = math.ceil(len(records) / chunk_size)
         for i in range(n_chunks):
             chunk = records[i * chunk_size : (i + 1) * chunk_size]
-            client.table(table).insert(chunk).execute()
+            _execute(client.table(table).insert(chunk))
 
     except RuntimeError as e:
         result["error"] = str(e)
@@ -284,6 +534,7 @@ def insert_new_rows_only(df: pd.DataFrame,
 # ══════════════════════════════════════════════════════════════
 #  CUMULATIVE DATABASE STATS
 # ══════════════════════════════════════════════════════════════
+@_resilient
 def get_db_stats(table: str = "claims",
                  sessions_table: str = "upload_sessions",
                  cost_col: str = None,
@@ -300,13 +551,13 @@ def get_db_stats(table: str = "claims",
         # 1. Total claims count
         q1 = client.table(table).select("*", count="exact")
         if user_id: q1 = q1.eq("user_id", user_id)
-        resp   = q1.limit(0).execute()
+        resp   = _execute(q1.limit(0), KPI_BUDGET_S)
         total  = resp.count or 0
 
         # 2. Fraud count
         q2 = client.table(table).select("*", count="exact").eq("Fraud_Flag", 1)
         if user_id: q2 = q2.eq("user_id", user_id)
-        f_resp  = q2.limit(0).execute()
+        f_resp  = _execute(q2.limit(0), KPI_BUDGET_S)
         fraud   = f_resp.count or 0
 
         # 3. Suspicious amount
@@ -314,7 +565,7 @@ def get_db_stats(table: str = "claims",
         if not cost_col:
             # Try to find a valid cost column
             try:
-                sample = client.table(table).select("*").limit(1).execute()
+                sample = _execute(client.table(table).select("*").limit(1), KPI_BUDGET_S)
                 if sample.data:
                     row = sample.data[0]
                     if "Final_Billed_Amount" in row: cost_col = "Final_Billed_Amount"
@@ -326,7 +577,7 @@ def get_db_stats(table: str = "claims",
             try:
                 q3 = client.table(table).select(cost_col).eq("Fraud_Flag", 1)
                 if user_id: q3 = q3.eq("user_id", user_id)
-                a_resp = q3.execute()
+                a_resp = _execute(q3, KPI_BUDGET_S)
                 amt    = sum(float(r.get(cost_col) or 0) for r in (a_resp.data or []))
             except Exception as e:
                 print(f"[Supabase] Error summing cost: {e}")
@@ -337,7 +588,7 @@ def get_db_stats(table: str = "claims",
         try:
             q4 = client.table(sessions_table).select("uploaded_at", count="exact").order("uploaded_at", desc=True)
             if user_id: q4 = q4.eq("user_id", user_id)
-            s_resp  = q4.limit(1).execute()
+            s_resp  = _execute(q4.limit(1), KPI_BUDGET_S)
             uploads = s_resp.count or 0
             rows    = s_resp.data or []
             if rows:
@@ -362,16 +613,18 @@ def get_db_stats(table: str = "claims",
     except Exception as e:
         default["error"] = str(e)[:300]
         return default
+
+
+@_resilient
 def get_user_activity_stats(uid):
     """
     Fetch total claims and fraud detections for a specific user ID from upload_sessions.
     """
     try:
         client = init_supabase()
-        response = client.table("upload_sessions") \
-            .select("total_rows, fraud_detected") \
-            .or_(f"user_id.eq.{uid},uid.eq.{uid}") \
-            .execute()
+        response = _execute(client.table("upload_sessions")
+                                  .select("total_rows, fraud_detected")
+                                  .or_(f"user_id.eq.{uid},uid.eq.{uid}"), KPI_BUDGET_S)
         
         data = response.data
         if not data:
@@ -387,32 +640,52 @@ def get_user_activity_stats(uid):
 
 
 
-def get_trend_data(sessions_table: str = "upload_sessions", n_days: int = 30, user_id: str = None) -> pd.DataFrame:
+# ══════════════════════════════════════════════════════════════
+#  DAILY ROLLUP  (trend chart; built incrementally at ingest)
+# ══════════════════════════════════════════════════════════════
+@_mirrored
+def bump_daily_rollup(rollup: pd.DataFrame, table: str = "claim_daily_rollup") -> bool:
     """
-    Fetch real daily analysis stats from upload_sessions.
-    Returns a DataFrame with columns: Date, Flagged, Total
+    Add a batch of rollup rows (rollups.build_daily_rollup) onto the stored
+    counts via the bump_claim_daily_rollup() SQL function.
     """
+    if rollup is None or rollup.empty:
+        return True
     try:
         client = init_supabase()
-        q = client.table(sessions_table).select("uploaded_at, fraud_detected, total_rows").order("uploaded_at", desc=True)
-        if user_id:
-            q = q.eq("user_id", user_id)
-        resp = q.limit(100).execute()
-        rows = resp.data or []
-        
-        if not rows:
-            return pd.DataFrame()
+        rows   = _clean_df_for_json(rollup).to_dict(orient="records")
+        _execute(client.rpc("bump_claim_daily_rollup", {"rows": rows}))
+        get_trend_data.clear()
+        return True
+    except Exception as e:
+        print(f"[Supabase] bump_daily_rollup error: {e}")
+        return False
 
-        df = pd.DataFrame(rows)
-        df["Date"] = pd.to_datetime(df["uploaded_at"]).dt.date
-        
-        daily = df.groupby("Date").agg({
-            "fraud_detected": "sum",
-            "total_rows": "sum"
-        }).reset_index()
-        
-        daily.columns = ["Date", "Flagged", "Total"]
-        return daily.sort_values("Date")
+
+@st.cache_data(ttl=600, show_spinner=False)
+@_resilient
+def get_trend_data(n_days: int = 30, user_id: str = None, state: str = None,
+                   table: str = "claim_daily_rollup") -> pd.DataFrame:
+    """
+    Daily claim volume for the last `n_days`, read from the rollup table with
+    one range query on (uid, State, day).  Returns a DataFrame with columns:
+    Date, Flagged, Total, Suspicious (days without claims are zero).
+    """
+    start, end = trend_window(n_days)
+    try:
+        client = init_supabase()
+        rows, page, ps = [], 0, 1000
+        while True:
+            q = (client.table(table).select("day, claims, flagged, flagged_amt")
+                       .eq("uid", str(user_id or "")).eq("State", state or ALL_STATES)
+                       .gte("day", start).lte("day", end)
+                       .order("day").range(page, page + ps - 1))
+            batch = _execute(q).data or []
+            rows.extend((r["day"], r["claims"], r["flagged"], r["flagged_amt"]) for r in batch)
+            if len(batch) < ps:
+                break
+            page += ps
+        return to_trend_frame(rows, start, end)
     except Exception as e:
         print(f"[Supabase] get_trend_data error: {e}")
         return pd.DataFrame()
@@ -421,6 +694,7 @@ def get_trend_data(sessions_table: str = "upload_sessions", n_days: int = 30, us
 # ══════════════════════════════════════════════════════════════
 #  UPLOAD SESSION LOG
 # ══════════════════════════════════════════════════════════════
+@_mirrored
 def log_upload_session(uid: str, filename: str,
                        total_rows: int, new_rows: int,
                        skipped_rows: int, fraud_detected: int,
@@ -430,7 +704,7 @@ def log_upload_session(uid: str, filename: str,
     """
     try:
         client = init_supabase()
-        client.table("upload_sessions").insert({
+        _execute(client.table("upload_sessions").insert({
             "uid":            uid,
             "user_id":        uid if len(str(uid or "")) > 20 else None, # Assume UUID if long
             "filename":       filename,
@@ -440,13 +714,14 @@ def log_upload_session(uid: str, filename: str,
             "fraud_detected": int(fraud_detected),
             "suspicious_amt": float(suspicious_amt),
             "uploaded_at":    datetime.now(timezone.utc).isoformat(),
-        }).execute()
+        }))
         return True
     except Exception as e:
         print(f"[Supabase] log_upload_session error: {e}")
         return False
 
 
+@_resilient
 def get_upload_history(uid: str = None, limit: int = 10) -> list[dict]:
     """
     Retrieve recent upload sessions (newest first).
@@ -462,7 +737,7 @@ def get_upload_history(uid: str = None, limit: int = 10) -> list[dict]:
                    .limit(limit))
         if uid:
             q = q.eq("uid", uid)
-        resp = q.execute()
+        resp = _execute(q)
         rows = resp.data or []
         result = []
         for row in rows:
@@ -482,12 +757,13 @@ def get_upload_history(uid: str = None, limit: int = 10) -> list[dict]:
 # ══════════════════════════════════════════════════════════════
 #  AUDIT LOG
 # ══════════════════════════════════════════════════════════════
+@_mirrored
 def upsert_audit_log(uid: str, action: str, description: str,
                      patient_id: str = "", fraud_type: str = "",
                      amount: float = 0.0) -> bool:
     try:
         client = init_supabase()
-        client.table("audit_log").insert({
+        _execute(client.table("audit_log").insert({
             "uid":         uid,
             "user_id":     uid if len(str(uid or "")) > 20 else None,
             "action":      action,
@@ -496,22 +772,23 @@ def upsert_audit_log(uid: str, action: str, description: str,
             "fraud_type":  fraud_type  or "",
             "amount":      float(amount or 0),
             "created_at":  datetime.now(timezone.utc).isoformat(),
-        }).execute()
+        }))
         return True
     except Exception as e:
         print(f"[Supabase] audit_log error: {e}")
         return False
 
 
+@_resilient
 def fetch_audit_log(uid: str, limit: int = 20) -> list[dict]:
     try:
         client   = init_supabase()
         # Try finding by user_id first (UUID), fallback to uid (Text) for legacy
-        resp     = (client.table("audit_log")
-                          .select("*")
-                          .or_(f"user_id.eq.{uid},uid.eq.{uid}")
-                          .order("created_at", desc=True)
-                          .limit(limit).execute())
+        resp     = _execute(client.table("audit_log")
+                                  .select("*")
+                                  .or_(f"user_id.eq.{uid},uid.eq.{uid}")
+                                  .order("created_at", desc=True)
+                                  .limit(limit))
         rows     = resp.data or []
         now_ts   = datetime.now(timezone.utc)
         result   = []
@@ -543,6 +820,7 @@ def fetch_audit_log(uid: str, limit: int = 20) -> list[dict]:
 # ══════════════════════════════════════════════════════════════
 #  SAVE PROCESSED RESULTS  (upsert — updates existing rows)
 # ══════════════════════════════════════════════════════════════
+@_mirrored
 def save_fraud_results_to_supabase(df: pd.DataFrame,
                                    table: str = "claims",
                                    chunk_size: int = 200,
@@ -558,7 +836,7 @@ def save_fraud_results_to_supabase(df: pd.DataFrame,
         n_chunks = math.ceil(len(records) / chunk_size)
         for i in range(n_chunks):
             chunk = records[i * chunk_size : (i + 1) * chunk_size]
-            client.table(table).upsert(chunk, on_conflict=on_conflict).execute()
+            _execute(client.table(table).upsert(chunk, on_conflict=on_conflict))
         return True, f"✅ Saved {len(df):,} processed records to Supabase."
     except Exception as e:
         return False, f"❌ Could not save results: {str(e)[:300]}"
@@ -626,6 +904,7 @@ def sync_local_csv_to_supabase(csv_path: str, user_id: str = None) -> tuple[bool
 #  DETECTED FRAUDS REPOSITORY
 # ══════════════════════════════════════════════════════════════
 
+@_mirrored
 def upsert_detected_frauds(df: pd.DataFrame, user_id: str = None) -> dict:
     """
     Specifically for the 'detected_frauds' table. Upserts all rows from df.
@@ -633,15 +912,13 @@ def upsert_detected_frauds(df: pd.DataFrame, user_id: str = None) -> dict:
     if df.empty:
         return {"new_count": 0, "status": "empty"}
         
-    client = init_supabase()
-    
     # 1. Clean for JSON
     clean_df = df.copy()
     if user_id: 
         clean_df["user_id"] = user_id
     
     # Ensure relevant columns exist
-    cols = ["PatientID", "Age", "Primary_Diagnosis", "Final_Billed_Amount", 
+    cols = ["PatientID", "Hospital_PIN", "Age", "Primary_Diagnosis", "Final_Billed_Amount", 
             "Fraud_Type", "AI_Justification", "Risk_Score", "user_id"]
     existing_cols = [c for c in cols if c in clean_df.columns]
     
@@ -650,57 +927,241 @@ def upsert_detected_frauds(df: pd.DataFrame, user_id: str = None) -> dict:
     
     # 2. Sequential upsert (can be chunked)
     try:
-        resp = client.table("detected_frauds").upsert(payload, on_conflict="PatientID").execute()
+        client = init_supabase()
+        resp = _execute(client.table("detected_frauds").upsert(payload, on_conflict="PatientID"))
+        _invalidate_frauds()
         return {"status": "success", "count": len(payload)}
     except Exception as e:
         print(f"[Supabase] upsert_detected_frauds error: {e}")
         return {"status": "error", "error": str(e)}
 
+@_mirrored
+def update_ai_justifications(texts: dict, user_id: str = None) -> dict:
+    """
+    Write model-written explanations {PatientID: text} onto existing
+    detected_frauds rows of this user.  A plain UPDATE per case: a row that
+    is missing (or belongs to someone else) is left alone, never created.
+    """
+    if not texts:
+        return {"status": "empty", "updated": 0}
+    try:
+        client  = init_supabase()
+        updated = 0
+        for pid, text in texts.items():
+            q = client.table("detected_frauds").update({"AI_Justification": text}).eq("PatientID", str(pid))
+            if user_id:
+                q = q.eq("user_id", user_id)
+            updated += len(_execute(q).data or [])
+        _invalidate_frauds()
+        return {"status": "success", "updated": updated}
+    except Exception as e:
+        print(f"[Supabase] update_ai_justifications error: {e}")
+        return {"status": "error", "updated": 0, "error": str(e)}
+
 @st.cache_data(ttl=600, show_spinner=False)
+@_resilient
 def fetch_detected_frauds(user_id: str = None) -> pd.DataFrame:
     """
     Fetch high-priority fraud cases for the 'Fraud Audit Report' page.
     If user_id is provided, only fetches cases analyzed by that user.
     """
     try:
-        client = init_supabase()
+        client  = init_supabase()
+        user_id = _frauds_owner(user_id)
         q = client.table("detected_frauds").select("*").order("Risk_Score", desc=True)
         if user_id:
             try:
-                resp = q.eq("user_id", user_id).execute()
+                resp = _execute(q.eq("user_id", user_id))
                 return pd.DataFrame(resp.data or [])
             except Exception as e:
                 # If user_id column is missing in detected_frauds
                 if "user_id" in str(e).lower():
-                    resp = q.execute() # Fallback to global
+                    breaker.begin()
+                    resp = _execute(q) # Fallback to global
                     return pd.DataFrame(resp.data or [])
                 else:
                     raise e
         else:
-            resp = q.execute()
+            resp = _execute(q)
             return pd.DataFrame(resp.data or [])
     except Exception as e:
         print(f"[Supabase] fetch_detected_frauds error: {e}")
         return pd.DataFrame()
 
+
+REPORT_PAGE_SIZE = 30
+
+
+def _frauds_owner(user_id):
+    """
+    detected_frauds.user_id is a uuid: an id that isn't one (legacy / demo
+    accounts) can't match any row, so the queue is shown unscoped.  Every
+    detected_frauds read uses this, so summary totals and listed cases
+    always describe the same rows.
+    """
+    try:
+        return str(uuid.UUID(str(user_id))) if user_id else None
+    except ValueError:
+        return None
+
+
+def _frauds_page(user_id, page_size, cursor, fraud_type, status) -> list:
+    client  = init_supabase()
+    user_id = _frauds_owner(user_id)
+    q = (client.table("detected_frauds").select("*")
+               .order("Risk_Score", desc=True).order("PatientID")
+               .limit(page_size))
+    if user_id:
+        q = q.eq("user_id", user_id)
+    if fraud_type:
+        q = q.eq("Fraud_Type", fraud_type)
+    if status:
+        q = q.eq("Investigation_Status", status)
+    if cursor:
+        risk, pid = cursor
+        q = q.or_(f'Risk_Score.lt.{float(risk)},and(Risk_Score.eq.{float(risk)},PatientID.gt."{pid}")')
+    return _execute(q).data or []
+
+
+def _cursor(rows: list) -> tuple:
+    last = rows[-1]
+    return float(last.get("Risk_Score") or 0), str(last.get("PatientID"))
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+@_resilient
+def fetch_detected_frauds_page(user_id: str = None,
+                               page_size: int = REPORT_PAGE_SIZE,
+                               cursor: tuple = None,
+                               fraud_type: str = None,
+                               status: str = None) -> tuple[pd.DataFrame, tuple]:
+    """
+    One page of the investigation queue, ordered by Risk_Score (desc) then
+    PatientID.  `cursor` is the (Risk_Score, PatientID) of the last row of
+    the previous page; the returned cursor is None when there are no more.
+    """
+    try:
+        rows = _frauds_page(user_id, page_size, cursor, fraud_type, status)
+    except Exception as e:
+        print(f"[Supabase] fetch_detected_frauds_page error: {e}")
+        return pd.DataFrame(), None
+    page = pd.DataFrame(rows)
+    if len(rows) < page_size:
+        return page, None
+    return page, _cursor(rows)
+
+
+def scan_detected_frauds_page(user_id: str = None,
+                              page_size: int = MAX_ROWS,
+                              cursor: tuple = None,
+                              fraud_type: str = None,
+                              status: str = None) -> tuple[pd.DataFrame, tuple]:
+    """
+    Same keyset page for exports: not cached, no last-good fallback, and
+    errors raise — a failed page must fail the export, not end it early.
+    Pages are capped at MAX_ROWS and the scan only stops on an empty page,
+    since the server may return fewer rows than asked for.
+    """
+    rows = _frauds_page(user_id, min(page_size, MAX_ROWS), cursor, fraud_type, status)
+    return pd.DataFrame(rows), (_cursor(rows) if rows else None)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+@_resilient
+def get_detected_frauds_summary(user_id: str = None,
+                                fraud_type: str = None,
+                                status: str = None) -> dict:
+    """
+    Aggregate totals for the Fraud Audit Report:
+      {"cases": int, "total_amount": float, "avg_risk": float, "by_type": {type: count}}
+    Computed by the detected_frauds_summary() SQL function.
+    """
+    summary = {"cases": 0, "total_amount": 0.0, "avg_risk": 0.0, "by_type": {}}
+    try:
+        client = init_supabase()
+        resp = _execute(client.rpc("detected_frauds_summary", {
+            "p_user_id":    _frauds_owner(user_id),
+            "p_fraud_type": fraud_type,
+            "p_status":     status,
+        }))
+        data = resp.data or {}
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        summary.update({
+            "cases":        int(data.get("cases") or 0),
+            "total_amount": float(data.get("total_amount") or 0),
+            "avg_risk":     float(data.get("avg_risk") or 0),
+            "by_type":      {k: int(v) for k, v in (data.get("by_type") or {}).items()},
+        })
+    except Exception as e:
+        print(f"[Supabase] get_detected_frauds_summary error: {e}")
+    return summary
+
+
+_frauds_version = 0
+
+
+def frauds_version() -> int:
+    """Bumped whenever this process changes detected_frauds (for derived caches)."""
+    return _frauds_version
+
+
+def _invalidate_frauds():
+    """Drop cached detected_frauds reads after this process changed the table."""
+    global _frauds_version
+    _frauds_version += 1
+    for fn in (fetch_detected_frauds, fetch_detected_frauds_page, get_detected_frauds_summary):
+        fn.clear()
+
+
+@_mirrored
 def update_claim_status(patient_id: str, status: str, user_id: str = None) -> bool:
     """
     Update the investigation status of a specific claim.
     """
+    return update_claims_status_bulk([patient_id], status, user_id=user_id)["status"] == "success"
+
+
+def _status_audit_text(ids: list, status: str) -> str:
+    if len(ids) == 1:
+        return f"Status for Patient {ids[0]} changed to '{status}'."
+    shown = ", ".join(ids[:10]) + (f" (+{len(ids) - 10} more)" if len(ids) > 10 else "")
+    return f"Status for {len(ids)} patients changed to '{status}': {shown}."
+
+
+@_mirrored
+def update_claims_status_bulk(patient_ids: list, status: str, user_id: str = None) -> dict:
+    """
+    Apply one investigation status to many claims: one UPDATE per table
+    (claims, detected_frauds) and a single audit entry for the batch.
+    Returns {"status": "success"|"error", "updated": int, "error": str | None}.
+    """
+    ids = list(dict.fromkeys(str(p) for p in patient_ids if p is not None and str(p)))
+    if not ids:
+        return {"status": "success", "updated": 0, "error": None}
     try:
-        client = init_supabase()
-        # Update both claims and detected_frauds to keep synced
-        client.table("claims").update({"Investigation_Status": status}).eq("PatientID", patient_id).execute()
-        client.table("detected_frauds").update({"Investigation_Status": status}).eq("PatientID", patient_id).execute()
-        
+        client  = init_supabase()
+        changed = set()
+        # Update both claims and detected_frauds to keep synced; count the rows they returned
+        for i in range(0, len(ids), STATUS_CHUNK):
+            chunk = ids[i:i + STATUS_CHUNK]
+            for table in ("claims", "detected_frauds"):
+                rows = _execute(client.table(table).update({"Investigation_Status": status}).in_("PatientID", chunk)).data
+                changed.update(str(r.get("PatientID")) for r in rows or [])
+
         # Log the action
         upsert_audit_log(
             uid=user_id,
             action="Status Update",
-            description=f"Status for Patient {patient_id} changed to '{status}'.",
-            patient_id=patient_id
+            description=_status_audit_text(ids, status),
+            patient_id=",".join(ids)
         )
-        return True
+        _invalidate_frauds()
+        return {"status": "success", "updated": len(changed), "error": None}
     except Exception as e:
-        print(f"[Supabase] update_claim_status error: {e}")
-        return False
+        print(f"[Supabase] update_claims_status_bulk error: {e}")
+        return {"status": "error", "updated": 0, "error": str(e)[:300]}
+
+
+# Cached reads may hold degraded results from an outage — drop them on recovery.
+breaker.on_recover(fetch_data_from_supabase.clear, get_trend_data.clear, _invalidate_frauds)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import local_db
+import supabase_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db, "LOCAL_DB_PATH", str(tmp_path / "bulk.db"))
+    frauds = pd.DataFrame({"PatientID": ["P1", "P2", "P3"], "Fraud_Type": ["Upcoding"] * 3, "Risk_Score": [0.9, 0.8, 0.7]})
+    local_db.insert_new_rows_only(frauds.drop(columns="Risk_Score"), user_id="u1")
+    local_db.upsert_detected_frauds(frauds, user_id="u1")
+
+
+def test_local_bulk_update_counts_rows_it_changed(db):
+    res = local_db.update_claims_status_bulk(["P1", "P3", "P3", "NOPE"], "Cleared", user_id="u1")
+    assert res == {"status": "success", "updated": 2, "error": None}
+    status = local_db.fetch_detected_frauds("u1").set_index("PatientID")["Investigation_Status"]
+    assert status.to_dict() == {"P1": "Cleared", "P2": "Pending", "P3": "Cleared"}
+    assert local_db.fetch_audit_log("u1", limit=1)[0]["action"] == "Status Update"
+
+
+class FakeTable:
+    def __init__(self, name, calls, known):
+        self.name, self.calls, self.known = name, calls, known
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def in_(self, col, ids):
+        self.ids = list(ids)
+        return self
+
+    def execute(self):
+        self.calls.append((self.name, len(self.ids), len(",".join(self.ids))))
+        return SimpleNamespace(data=[{"PatientID": p} for p in self.ids if p in self.known])
+
+
+def test_supabase_bulk_update_chunks_ids_and_counts_returned_rows(monkeypatch):
+    calls, known = [], {f"PMJAY-2026-{i:08d}" for i in range(0, 1200, 3)}
+    client = SimpleNamespace(table=lambda name: FakeTable(name, calls, known))
+    monkeypatch.setattr(supabase_db, "init_supabase", lambda: client)
+    monkeypatch.setattr(supabase_db, "upsert_audit_log", lambda **kw: None)
+    ids = [f"PMJAY-2026-{i:08d}" for i in range(1200)]
+    res = supabase_db.update_claims_status_bulk(ids, "Cleared", user_id="u1")
+    assert res["status"] == "success" and res["updated"] == len(known)
+    assert len(calls) == 2 * 6
+    assert max(n for _, n, _ in calls) == supabase_db.STATUS_CHUNK
+    assert max(chars for _, _, chars in calls) < 4000         # well under an 8 KB URL limit
@@ -0,0 +1,37 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from case_grid import CARD_HEIGHT, CHROME_PX, GRID_FIELDS, case_grid_html, grid_height, grid_payload
+
+
+def _frauds():
+    return pd.DataFrame({"PatientID": ["P1", "P2"], "Age": [np.int64(40), np.int64(61)],
+                         "Claim_Amount": [1200.0, 3456.789], "Risk_Score": [0.9, math.nan],
+                         "Fraud_Type": ["Upcoding", "Ghost\nBilling"], "Extra": [1, 2]})
+
+
+def test_payload_names_fields_once_and_cleans_cells():
+    payload = grid_payload(_frauds(), cost_col="Claim_Amount")
+    assert payload["f"] == ["PatientID", "Age", "Final_Billed_Amount", "Risk_Score", "Fraud_Type"]
+    assert payload["r"] == [["P1", 40, 1200, 0.9, "Upcoding"], ["P2", 61, 3456.789, None, "Ghost Billing"]]
+    json.dumps(payload, allow_nan=False)
+
+
+def test_empty_payload_keeps_all_fields():
+    assert grid_payload(pd.DataFrame()) == {"f": list(GRID_FIELDS), "r": []}
+
+
+def test_height_fits_one_page():
+    assert grid_height(9) == CHROME_PX + 3 * CARD_HEIGHT
+    assert grid_height(9, 4) == CHROME_PX + 2 * CARD_HEIGHT
+    assert grid_height(9, 0) == CHROME_PX + CARD_HEIGHT
+
+
+def test_html_embeds_payload_and_escapes_script_end():
+    df   = pd.DataFrame({"PatientID": ["P1"], "AI_Justification": ["bad </script> text"]})
+    html = case_grid_html(df, page_size=6)
+    assert "__PAYLOAD__" not in html and "__PAGE_SIZE__" not in html
+    assert "</script> text" not in html and "<\\/script> text" in html
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from chat_context import ChatContextBuilder, render_prompt, summarize_frauds
+from llm_runner import estimate_tokens
+
+
+class FakeBackend:
+    def __init__(self):
+        self.version, self.fetches = 0, []
+
+    def frauds_version(self):
+        return self.version
+
+    def fetch_detected_frauds(self, user_id=None):
+        self.fetches.append(user_id)
+        return pd.DataFrame({
+            "PatientID":           [f"{user_id}-P1", f"{user_id}-P2"],
+            "Fraud_Type":          ["Upcoding", "Ghost Billing"],
+            "Final_Billed_Amount": [150000, 250000],
+            "Risk_Score":          [0.6, 0.9],
+            "AI_Justification":    ["Billed above package.", "Patient never admitted."],
+        })
+
+
+def test_summary_is_cached_until_the_queue_changes():
+    backend = FakeBackend()
+    ctx     = ChatContextBuilder(backend)
+    assert ctx.summary("u1")["cases"] == 2
+    ctx.summary("u1")
+    assert backend.fetches == ["u1"]
+    backend.version += 1
+    ctx.summary("u1")
+    assert backend.fetches == ["u1", "u1"]
+
+
+def test_least_recently_active_users_are_evicted_with_their_index():
+    backend = FakeBackend()
+    ctx     = ChatContextBuilder(backend, max_users=2)
+    for uid in ("u1", "u2", "u1", "u3"):
+        ctx.summary(uid)
+    assert list(ctx._users) == ["u1", "u3"]
+    assert ctx.retrieve("u2", "never admitted")[0]["PatientID"] == "u2-P2"     # rebuilt on demand
+    assert backend.fetches == ["u1", "u2", "u3", "u2"]
+
+
+def test_prompt_stays_within_budget_and_puts_retrieved_cases_first():
+    backend = FakeBackend()
+    ctx     = ChatContextBuilder(backend, token_budget=150)
+    prompt  = ctx.system_prompt("u1", "why was the upcoding case flagged")
+    cases   = prompt.splitlines()[2:]
+    assert cases[0].startswith("u1-P1 | Upcoding")                # highest risk is u1-P2, retrieval wins
+    assert estimate_tokens(prompt) <= 150 + len(cases)
+    assert render_prompt(summarize_frauds(pd.DataFrame())).endswith("No fraud cases in queue.")
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _wait_for(cond, timeout=3.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _fail():
+    raise ConnectionError("down")
+
+
+def test_opens_after_threshold_and_rejects_fast():
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=60, probe=_fail)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.run(_fail)
+    assert breaker.state == OPEN
+    breaker.begin()
+    with pytest.raises(CircuitOpenError):
+        breaker.run(lambda: "never called")
+    assert breaker.failed_in_call()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_probe_closes_the_breaker_and_runs_hooks():
+    healthy   = threading.Event()
+    recovered = []
+
+    def probe():
+        if not healthy.is_set():
+            raise ConnectionError("still down")
+
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0.05, max_reset_timeout=0.05, probe=probe)
+    breaker.on_recover(lambda: recovered.append(True))
+    with pytest.raises(ConnectionError):
+        breaker.run(_fail)
+    time.sleep(0.15)
+    assert breaker.state == OPEN
+    healthy.set()
+    assert _wait_for(lambda: breaker.state == CLOSED)
+    assert recovered == [True]
+    assert breaker.run(lambda: 42) == 42
+
+
+def test_probe_is_not_queued_behind_hung_calls():
+    release = threading.Event()
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=0.05, max_reset_timeout=0.05,
+                             probe=lambda: None, max_workers=2)
+    try:
+        for _ in range(2):                               # both call workers stay stuck
+            with pytest.raises(TimeoutError):
+                breaker.run(release.wait, budget=0.05)
+        assert breaker.stats["timeouts"] == 2
+        assert _wait_for(lambda: breaker.state == CLOSED, timeout=1.0)
+    finally:
+        release.set()
+
+
+def test_rejected_errors_do_not_trip_the_breaker():
+    breaker = CircuitBreaker("t", failure_threshold=1, is_failure=lambda e: not isinstance(e, ValueError))
+
+    def bad_request():
+        raise ValueError("400")
+
+    breaker.begin()
+    with pytest.raises(ValueError):
+        breaker.run(bad_request)
+    assert breaker.state == CLOSED and not breaker.failed_in_call()
+
+
+def test_stats_are_exact_under_concurrency():
+    breaker = CircuitBreaker("t")
+    threads = [threading.Thread(target=lambda: [breaker.run(int) for _ in range(500)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert breaker.stats["calls"] == 4000
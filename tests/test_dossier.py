@@ -0,0 +1,61 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from dossier import DossierService, collect_groups, content_hash, dossier_available, index_groups
+
+
+@pytest.fixture
+def frauds():
+    return pd.DataFrame({
+        "PatientID":         ["P1", "P2", "P3"],
+        "Hospital_PIN":      [500014, 500029, 500014],
+        "Fraud_Type":        ["Upcoding", "Ghost Billing", "Upcoding"],
+        "Risk_Score":        [0.9, 0.8, 0.7],
+        "AI_Justification":  ["Billed 3× the package.", None, "Stay too long."],
+    })
+
+
+def test_groups_from_paged_chunks(frauds):
+    chunks = lambda: iter([frauds.iloc[:2], frauds.iloc[2:]])
+    counts = index_groups(chunks(), "hospital")
+    assert counts == {"Hospital 500014": 2, "Hospital 500029": 1}
+    picked = collect_groups(chunks(), "hospital", ["Hospital 500014"])
+    assert list(picked) == ["Hospital 500014"]
+    assert [c["PatientID"] for c in picked["Hospital 500014"]] == ["P1", "P3"]
+
+
+def test_any_edit_changes_the_hash(frauds):
+    before = content_hash("Hospital 500014", frauds)
+    assert content_hash("Hospital 500014", frauds.iloc[::-1]) == before        # row order does not matter
+    edited = frauds.assign(Investigation_Status=["Cleared", None, None])
+    assert content_hash("Hospital 500014", edited) != before
+
+
+def _age(path, days):
+    t = time.time() - days * 86400
+    os.utime(path, (t, t))
+
+
+def test_prune_drops_old_and_least_recently_used(tmp_path):
+    for name, days in (("old.pdf", 10), ("a.pdf", 3), ("b.pdf", 2), ("c.pdf", 1), ("dead.pdf.part", 1)):
+        (tmp_path / name).write_bytes(b"%PDF")
+        _age(tmp_path / name, days)
+    svc = DossierService(str(tmp_path), workers=1, ttl_days=7, max_files=2)     # prunes on start
+    assert sorted(os.listdir(tmp_path)) == ["b.pdf", "c.pdf"]
+    assert svc.stats["pruned"] == 3
+
+
+@pytest.mark.skipif(not dossier_available(), reason="fpdf2 not installed")
+def test_render_once_then_serve_from_cache(frauds, tmp_path):
+    svc    = DossierService(str(tmp_path), workers=1)
+    digest = svc.request("Hospital 500014", frauds.iloc[[0, 2]])
+    end    = time.time() + 10
+    while svc.status(digest) == "pending" and time.time() < end:
+        time.sleep(0.05)
+    assert svc.status(digest) == "ready"
+    assert open(svc.path(digest), "rb").read(4) == b"%PDF"
+    assert svc.request("Hospital 500014", frauds.iloc[[2, 0]]) == digest
+    assert svc.stats == {"rendered": 1, "cached": 1, "failed": 0, "pruned": 0}
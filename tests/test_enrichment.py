@@ -0,0 +1,77 @@
+import time
+
+import pandas as pd
+
+from enrichment import EnrichmentQueue
+
+FALLBACK = "Risk pattern detected. Manual verification required."
+
+
+class FakeRunner:
+    client, model, fallback = None, "fake", FALLBACK
+
+    def __init__(self, fail_costs=()):
+        self.fail_costs, self.prompts = set(fail_costs), 0
+
+    def run(self, prompts, progress=None):
+        self.prompts += len(prompts)
+        return [FALLBACK if any(f"₹{c}" in p for c in self.fail_costs) else f"explained {i}"
+                for i, p in enumerate(prompts)]
+
+
+class FakeBackend:
+    def __init__(self):
+        self.writes = []
+
+    def update_ai_justifications(self, texts, user_id=None):
+        self.writes.append((dict(texts), user_id))
+
+
+def _frauds(n):
+    return pd.DataFrame({"PatientID": [f"P{i:03d}" for i in range(n)],
+                         "Final_Billed_Amount": [1000.0 + i for i in range(n)],
+                         "Fraud_Type": "Upcoding", "Risk_Score": 0.9})
+
+
+def _wait(q, uid, timeout=3.0):
+    end = time.time() + timeout
+    while q.status(uid)["running"] and time.time() < end:
+        time.sleep(0.01)
+    return q.status(uid)
+
+
+def test_batches_are_written_and_overlaid():
+    backend = FakeBackend()
+    q       = EnrichmentQueue(FakeRunner(), backend, batch_size=4)
+    assert q.submit(_frauds(10), "u1") == 10
+    st = _wait(q, "u1")
+    assert (st["queued"], st["done"], st["failed"], st["version"]) == (10, 10, 0, 3)
+    assert len(backend.writes) == 3 and all(uid == "u1" for _, uid in backend.writes)
+    assert len(q.texts("u1")) == 10
+
+
+def test_resubmitting_skips_done_cases():
+    runner = FakeRunner()
+    q      = EnrichmentQueue(runner, FakeBackend())
+    q.submit(_frauds(5), "u1")
+    _wait(q, "u1")
+    assert q.submit(_frauds(6), "u1") == 1
+    _wait(q, "u1")
+    assert runner.prompts == 6
+
+
+def test_fallback_texts_count_as_failed_and_are_not_written():
+    backend = FakeBackend()
+    q       = EnrichmentQueue(FakeRunner(fail_costs={1001.0}), backend)
+    q.submit(_frauds(3), "u1")
+    st = _wait(q, "u1")
+    assert (st["done"], st["failed"]) == (2, 1)
+    assert "P001" not in q.texts("u1") and "P001" not in backend.writes[0][0]
+
+
+def test_users_and_overlay_bound_are_separate():
+    q = EnrichmentQueue(FakeRunner(), FakeBackend(), max_texts=3)
+    q.submit(_frauds(5), "u1")
+    _wait(q, "u1")
+    assert list(q.texts("u1")) == ["P002", "P003", "P004"]
+    assert q.texts("u2") == {} and q.status("u2")["queued"] == 0
@@ -0,0 +1,37 @@
+import time
+
+from explain_cache import ExplanationCache, claim_signature
+
+
+def test_similar_claims_share_a_signature():
+    a = {"Age": 62, "Primary_Diagnosis": "Cataract ", "Final_Billed_Amount": 48000, "Base_Package_Rate": 20000,
+         "LOS": 3, "Fraud_Type": "Upcoding"}
+    assert claim_signature(a) == claim_signature({**a, "Age": 67, "Final_Billed_Amount": 49500,
+                                                  "Primary_Diagnosis": "cataract"})
+    assert claim_signature(a) != claim_signature({**a, "Final_Billed_Amount": 80000})
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ExplanationCache(str(tmp_path / "c.db"), ttl_days=0.05 / 86400, max_entries=10)
+    cache.put("sig", "text", "m")
+    assert cache.get("sig", "m") == "text"
+    time.sleep(0.1)
+    assert cache.get("sig", "m") is None
+    assert cache.evict() == 1 and len(cache) == 0
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = ExplanationCache(str(tmp_path / "c.db"), ttl_days=1, max_entries=2)
+    for sig in ("a", "b", "c"):
+        cache.put(sig, sig.upper())
+        time.sleep(0.01)
+    cache.get("a")                      # a is now more recent than b and c
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c"]) == {"a": "A", "c": "C"}
+
+
+def test_model_is_part_of_the_key(tmp_path):
+    cache = ExplanationCache(str(tmp_path / "c.db"))
+    cache.put("sig", "from model one", "m1")
+    assert cache.get("sig", "m2") is None
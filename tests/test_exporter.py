@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+import exporter
+import local_db
+from exporter import iter_frauds, sanitize_frame, sanitize_text, write_export
+
+
+def test_sanitize_text_keeps_ascii_devanagari_and_rupee():
+    assert sanitize_text("₹ 5,000 — नमस्ते 🚨 ok") == "₹ 5,000  नमस्ते  ok"
+
+
+def test_sanitize_frame_cleans_text_columns_only():
+    df = pd.DataFrame({
+        "PatientID":  ["P1", "P2", "P3"],
+        "Fraud_Type": ["Upcoding 🚨", None, "Upcoding 🚨"],
+        "Risk_Score": [0.9, 0.5, 0.1],
+    })
+    out = sanitize_frame(df)
+    assert out["Fraud_Type"].tolist() == ["Upcoding ", None, "Upcoding "]
+    assert out["Risk_Score"].tolist() == [0.9, 0.5, 0.1]
+    assert df["Fraud_Type"][0] == "Upcoding 🚨"           # input left untouched
+
+
+class FakeBackend:
+    def __init__(self, pages, fail_at=None):
+        self.pages, self.fail_at, self.calls = pages, fail_at, []
+
+    def scan_detected_frauds_page(self, user_id=None, page_size=0, cursor=None, fraud_type=None, status=None):
+        i = 0 if cursor is None else cursor
+        self.calls.append(i)
+        if i == self.fail_at:
+            raise ConnectionError("backend down")
+        nxt = i + 1 if i + 1 < len(self.pages) else None
+        return self.pages[i], nxt
+
+
+def _page(ids):
+    return pd.DataFrame({"PatientID": ids, "Fraud_Type": ["Upcoding 🚨"] * len(ids)})
+
+
+def test_iter_frauds_follows_cursor_and_skips_empty_pages():
+    backend = FakeBackend([_page(["P1", "P2"]), _page([]), _page(["P3"])])
+    chunks  = list(iter_frauds(backend, chunk_rows=2))
+    assert [c["PatientID"].tolist() for c in chunks] == [["P1", "P2"], ["P3"]]
+    assert backend.calls == [0, 1, 2]
+
+
+def test_write_export_csv_roundtrip(tmp_path):
+    path   = str(tmp_path / "out.csv")
+    result = write_export(iter([_page(["P1", "P2"]), _page(["P3"])]), "CSV", path)
+    assert result["rows"] == 3
+    back = pd.read_csv(path, encoding="utf-8-sig")
+    assert back["PatientID"].tolist() == ["P1", "P2", "P3"]
+    assert back["Fraud_Type"].tolist() == ["Upcoding "] * 3
+
+
+def test_write_export_removes_partial_file_on_error(tmp_path):
+    path    = tmp_path / "out.jsonl"
+    backend = FakeBackend([_page(["P1"]), _page(["P2"])], fail_at=1)
+    with pytest.raises(ConnectionError):
+        write_export(iter_frauds(backend), "JSONL", str(path))
+    assert not path.exists()
+
+
+def test_write_export_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        write_export(iter([]), "PDF")
+
+
+def test_available_formats_follow_installed_writers():
+    formats = exporter.available_formats()
+    assert formats[:2] == ["CSV", "JSONL"]
+    assert ("Parquet" in formats) == exporter._HAS["pyarrow"]
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db, "LOCAL_DB_PATH", str(tmp_path / "export.db"))
+    frauds = pd.DataFrame({"PatientID":  [f"P{i:03d}" for i in range(25)],
+                           "Fraud_Type": ["Upcoding"] * 25,
+                           "Risk_Score": [round(1 - (i // 4) / 10, 2) for i in range(25)]})
+    local_db.upsert_detected_frauds(frauds, user_id="u1")
+    return frauds
+
+
+def test_export_scans_the_whole_queue_past_the_page_size(queue):
+    chunks = list(iter_frauds(local_db, user_id="u1", chunk_rows=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert sorted(pid for c in chunks for pid in c["PatientID"]) == queue["PatientID"].tolist()
+
+
+def test_export_scan_raises_instead_of_ending_short(queue, monkeypatch, tmp_path):
+    def broken(*args, **kw):
+        raise RuntimeError("disk gone")
+    monkeypatch.setattr(local_db, "_frauds_page", broken)
+    with pytest.raises(RuntimeError):
+        local_db.scan_detected_frauds_page(user_id="u1")
+    with pytest.raises(RuntimeError):
+        write_export(iter_frauds(local_db, user_id="u1"), "CSV", str(tmp_path / "x.csv"))
+    assert not (tmp_path / "x.csv").exists()
@@ -0,0 +1,29 @@
+import pytest
+
+import local_db
+from session_store import MemorySessionStore
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db, "LOCAL_DB_PATH", str(tmp_path / "auth.db"))
+    local_db.sign_up("first@example.org", "secret-1")
+    local_db.sign_up("second@example.org", "secret-2")
+
+
+def test_new_session_is_not_recovered_as_the_last_sign_in(db):
+    store = MemorySessionStore(ttl_hours=1, max_entries=10)
+    first = local_db.sign_in("first@example.org", "secret-1").user
+    store.put("sid-1", {"uid": first.id, "email": first.email})
+    assert local_db.get_current_user() is None          # a visitor without ?s= stays signed out
+
+    second = local_db.sign_in("second@example.org", "secret-2").user
+    store.put("sid-2", {"uid": second.id, "email": second.email})
+    assert local_db.get_current_user() is None
+    assert store.get("sid-2")["uid"] == second.id != first.id
+    assert store.get("sid-1")["uid"] == first.id
+
+
+def test_sign_in_rejects_a_wrong_password(db):
+    with pytest.raises(Exception, match="Invalid login"):
+        local_db.sign_in("first@example.org", "secret-2")
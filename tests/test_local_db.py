@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+import local_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db, "LOCAL_DB_PATH", str(tmp_path / "test.db"))
+    frauds = pd.DataFrame({
+        "PatientID":  [f"P{i:03d}" for i in range(23)],
+        "Fraud_Type": ["Upcoding" if i % 2 else "Ghost Billing" for i in range(23)],
+        "Risk_Score": [round(1 - (i // 3) / 10, 2) for i in range(23)],   # ties in threes
+    })
+    assert local_db.upsert_detected_frauds(frauds.iloc[:20], user_id="u1")["status"] == "success"
+    assert local_db.upsert_detected_frauds(frauds.iloc[20:], user_id="u2")["status"] == "success"
+    return frauds
+
+
+def _pages(fetch, **kw):
+    cursor, out = None, []
+    while True:
+        page, cursor = fetch(cursor=cursor, **kw)
+        out.append(page)
+        if cursor is None:
+            return out
+
+
+def _expected(frauds, mask):
+    want = frauds[mask].sort_values(["Risk_Score", "PatientID"], ascending=[False, True])
+    return want["PatientID"].tolist()
+
+
+def test_keyset_pages_cover_the_queue_once_in_order(db):
+    pages = _pages(local_db.fetch_detected_frauds_page, user_id="u1", page_size=4)
+    ids   = [pid for p in pages for pid in p["PatientID"]]
+    assert ids == _expected(db, db.index < 20)
+    assert all(len(p) == 4 for p in pages[:-1])
+
+
+def test_keyset_pages_apply_filters(db):
+    pages = _pages(local_db.fetch_detected_frauds_page, user_id="u1", page_size=3, fraud_type="Upcoding")
+    ids   = [pid for p in pages for pid in p["PatientID"]]
+    assert ids == _expected(db, (db.index < 20) & (db["Fraud_Type"] == "Upcoding"))
+
+
+def test_keyset_pages_without_user_see_every_row(db):
+    pages = _pages(local_db.fetch_detected_frauds_page, page_size=5)
+    assert sum(len(p) for p in pages) == len(db)
+
+
+def test_failed_page_ends_the_queue_quietly(db, monkeypatch):
+    def broken(*args, **kw):
+        raise RuntimeError("disk gone")
+    monkeypatch.setattr(local_db, "_frauds_page", broken)
+    page, cursor = local_db.fetch_detected_frauds_page(user_id="u1")
+    assert page.empty and cursor is None
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import main
+
+CLAIMS = os.path.join(os.path.dirname(__file__), os.pardir, "ayushman_claims.csv")
+
+
+def test_read_chunks_whole_or_in_pieces():
+    assert [len(c) for c in main.read_chunks(CLAIMS)] == [210]
+    assert [len(c) for c in main.read_chunks(CLAIMS, 100)] == [100, 100, 10]
+
+
+def test_find_inputs_expands_directories_once(tmp_path):
+    for name in ("b.csv", "a.csv", "notes.txt"):
+        (tmp_path / name).write_text("x\n")
+    a = str(tmp_path / "a.csv")
+    assert main.find_inputs([str(tmp_path), a]) == [a, str(tmp_path / "b.csv")]
+
+
+def test_output_paths_do_not_collide(tmp_path):
+    taken = set()
+    first = main.output_path("in/claims.csv", str(tmp_path), "csv", taken)
+    again = main.output_path("other/claims.csv", str(tmp_path), "csv", taken)
+    assert os.path.basename(first) == "claims_scored.csv"
+    assert os.path.basename(again) == "claims_2_scored.csv"
+
+
+def _run(tmp_path, *extra):
+    out, summary = tmp_path / "out", tmp_path / "summary.json"
+    code = main.main([CLAIMS, str(tmp_path / "missing.csv"), "--out", str(out), "--no-explain",
+                      "--workers", "2", "--n-estimators", "20", "--summary", str(summary), *extra])
+    return code, json.loads(summary.read_text()), out
+
+
+def test_chunked_run_matches_whole_file_and_reports_failures(tmp_path):
+    code, whole, out = _run(tmp_path / "whole")
+    assert code == 1 and (whole["files"], whole["failed"], whole["rows"]) == (2, 1, 210)
+    assert not [p for p in os.listdir(out) if p.endswith(".part")]
+
+    _, chunked, _ = _run(tmp_path / "chunked", "--chunk-rows", "64", "--fit-rows", "1000")
+    assert (chunked["rows"], chunked["flagged"]) == (whole["rows"], whole["flagged"])
+    assert chunked["results"][0]["chunks"] == 4
+
+    scored = pd.read_csv(whole["results"][0]["output"])
+    assert len(scored) == 210 and int(scored["Fraud_Flag"].sum()) == whole["flagged"]
+
+
+def test_explain_without_key_is_a_usage_error(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert main.main([CLAIMS, "--out", str(tmp_path), "--explain"]) == 2
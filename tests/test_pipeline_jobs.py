@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+import pipeline_jobs
+from pipeline_jobs import JobRunner
+
+STAGES = [("a", "A", 1), ("b", "B", 3)]
+
+
+def _wait(job, timeout=3.0):
+    end = time.time() + timeout
+    while not job.done and time.time() < end:
+        time.sleep(0.01)
+    return job
+
+
+def test_stages_progress_and_result_is_taken_once():
+    gate, runner = threading.Event(), JobRunner(max_workers=1)
+
+    def work(job, n):
+        job.stage("a")
+        job.stage("b", "halfway")
+        gate.wait(2)
+        return {"rows": n}
+
+    job = runner.get(runner.submit(work, 7, stages=STAGES, user_id="u1", label="x.csv"))
+    time.sleep(0.05)
+    snap = job.snapshot()
+    assert (snap["stage"], snap["message"], snap["progress"]) == ("b", "halfway", 0.25)
+    gate.set()
+    assert _wait(job).status == "done" and job.progress() == 1.0
+    assert set(job.stage_times) == {"a", "b"}
+    assert job.take_result() == {"rows": 7}
+    assert job.take_result() is None and job.result is None
+    assert runner.jobs("u1") == [job] and runner.jobs("u2") == []
+
+
+def test_failed_job_reports_its_stage():
+    runner = JobRunner(max_workers=1)
+
+    def work(job):
+        job.stage("b")
+        raise ValueError("bad csv")
+
+    job = _wait(runner.get(runner.submit(work, stages=STAGES)))
+    assert job.status == "failed" and job.error == "bad csv" and job.stage_key == "b"
+
+
+def test_uncollected_results_expire(monkeypatch):
+    runner = JobRunner(max_workers=1)
+    job    = _wait(runner.get(runner.submit(lambda job: {"df": "big"}, stages=STAGES)))
+    assert job.result == {"df": "big"}
+    monkeypatch.setattr(pipeline_jobs, "RESULT_TTL_S", 0)
+    time.sleep(0.01)
+    assert runner.get(job.id).result is None
+    assert runner.get(job.id).status == "done"
+
+
+def test_only_keep_jobs_finished_jobs_are_remembered(monkeypatch):
+    monkeypatch.setattr(pipeline_jobs, "KEEP_JOBS", 2)
+    runner = JobRunner(max_workers=1)
+    ids    = []
+    for _ in range(4):
+        ids.append(runner.submit(lambda job: None, stages=STAGES))
+        _wait(runner.get(ids[-1]))
+    assert [j.id for j in runner.jobs()] == [ids[3], ids[2], ids[1]]     # trimmed on submit, before #4 ran
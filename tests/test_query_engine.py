@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from query_engine import QueryEngine, parse_question
+
+
+@pytest.fixture
+def claims():
+    return pd.DataFrame({
+        "PatientID":           ["P0001", "P0002", "P0003", "P0004", "P0005", "P0006"],
+        "Hospital_PIN":        [500014, 500014, 500029, 500029, 500029, 500035],
+        "District":            ["Nizamabad", "Nizamabad", "Karimnagar", "Karimnagar", "Warangal", "Warangal"],
+        "State":               ["Telangana"] * 6,
+        "Age":                 [66, 27, 45, 70, 33, 52],
+        "Final_Billed_Amount": [16924, 28276, 90000, 12000, 64000, 5000],
+        "Fraud_Flag":          [1, 0, 1, 0, 1, 0],
+        "Fraud_Type":          ["Upcoding", "", "Ghost Billing", "", "Upcoding", ""],
+    })
+
+
+def ask(question, df):
+    return QueryEngine().answer(question, df, "Final_Billed_Amount")
+
+
+@pytest.mark.parametrize("question", [
+    "how many claims over 50000",
+    "how many claims with age above 60",
+    "count of claims for patient P0001",
+    "how many claims from kerala",
+    "how many claims at hospital 999999",
+    "how many cases in mumbai",
+    "how many cases in Mumbai",
+    "how many claims in district mumbai",
+    "total amount of claims more than ₹20000",
+    "how many claims in 2025",
+    "how many escalated cases",
+    "how many claims with missing discharge summaries",
+    "total amount of claims paid twice",
+])
+def test_unparsed_conditions_go_to_the_llm(question, claims):
+    assert parse_question(question, claims) is None
+    assert ask(question, claims) is None
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("how many claims", "6 claims."),
+    ("how many claims in Nizamabad", "2 claims in District Nizamabad."),
+    ("how many claims in district karimnagar", "2 claims in District Karimnagar."),
+    ("how many claims at hospital 500029", "3 claims with Hospital 500029."),
+    ("how many fraud cases in Warangal", "1 flagged claim in District Warangal."),
+    ("how many claims in total", "6 claims."),
+])
+def test_counts(question, expected, claims):
+    assert ask(question, claims).text == expected
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("how many fake admission cases", "0 flagged Fake Admission claims."),
+    ("total suspicious amount for identity misuse", "₹0 across 0 flagged Identity Misuse claims."),
+    ("how many cleared cases", "0 flagged claims with Status Cleared."),
+])
+def test_known_labels_absent_from_the_frame_answer_zero(question, expected, claims):
+    claims["Investigation_Status"] = "Pending"
+    assert ask(question, claims).text == expected
+
+
+def test_sum_with_fraud_type_and_place(claims):
+    ans = ask("total suspicious amount for Upcoding in Nizamabad", claims)
+    assert ans.query.filters == {"Fraud_Type": "Upcoding", "District": "Nizamabad"}
+    assert ans.text.startswith("₹16,924 across 1 flagged Upcoding claim")
+
+
+def test_top_n_and_time_window_are_not_leftovers(claims):
+    assert ask("top 2 claims by amount", claims).query.top_n == 2
+    claims["uploaded_at"] = pd.Timestamp.now()
+    assert ask("how many flagged claims in the last 30 days", claims).text == "3 flagged claims in the last 30 days."
+
+
+def test_group_by(claims):
+    ans = ask("how many claims by district", claims)
+    assert dict(zip(ans.table["District"], ans.table["claims"])) == {"Nizamabad": 2, "Karimnagar": 2, "Warangal": 2}
+
+
+def test_open_ended_questions_are_not_parsed(claims):
+    assert parse_question("why was P0001 flagged", claims) is None
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from rate_limit import Limiter, RateLimitTimeout
+
+
+@pytest.fixture
+def limiter():
+    lim = Limiter()
+    lim.configure("api", rpm=600, user_rpm=60, burst=5, user_burst=2)     # 10/s global, 1/s per user
+    return lim
+
+
+def test_burst_then_queue_timeout(limiter):
+    assert limiter.acquire("api", user="u1", timeout=0) < 0.01
+    assert limiter.acquire("api", user="u1", timeout=0) < 0.01
+    t0 = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire("api", user="u1", timeout=0.2)      # the next token is ~1 s away
+    assert time.monotonic() - t0 < 0.1                      # fails up front, does not sleep the timeout
+    assert limiter.metrics()[0]["timeouts"] == 1
+
+
+def test_waits_in_line_when_capacity_arrives_within_timeout(limiter):
+    for _ in range(5):
+        limiter.acquire("api", user=f"u{_}", timeout=0)
+    waited = limiter.acquire("api", user="u9", timeout=1.0)  # global bucket refills at 10/s
+    assert 0.05 < waited < 0.5
+    assert limiter.metrics()[0]["waited"] == 1
+
+
+def test_users_have_separate_buckets(limiter):
+    limiter.set_user("u1")
+    assert limiter.try_acquire("api") and limiter.try_acquire("api")
+    assert not limiter.try_acquire("api")
+    assert limiter.try_acquire("api", user="u2")
+
+
+def test_unknown_limit_is_free(limiter):
+    assert limiter.acquire("nope", timeout=0) == 0.0
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from retrieval import FraudIndex
+
+
+@pytest.fixture
+def frauds():
+    return pd.DataFrame({
+        "PatientID":         ["P0001", "P0002", "P0003"],
+        "Hospital_PIN":      [500014.0, 500029.0, 500029.0],
+        "Primary_Diagnosis": ["Cataract", "Dengue fever", "Appendicitis"],
+        "Fraud_Type":        ["Upcoding", "Ghost Billing", "Upcoding"],
+        "AI_Justification":  ["Billed far above the cataract package.", "No admission record.", "Stay too long."],
+        "Risk_Score":        [0.7, 0.9, 0.4],
+    })
+
+
+def test_upsert_indexes_only_new_or_changed_rows(frauds):
+    index = FraudIndex()
+    assert index.upsert(frauds) == 3
+    assert index.upsert(frauds) == 0
+    frauds.loc[1, "AI_Justification"] = "Patient never admitted; dengue test missing."
+    assert index.upsert(frauds) == 1
+    assert index.search("never admitted")[0]["PatientID"] == "P0002"
+
+
+def test_sync_drops_cases_no_longer_present(frauds):
+    index = FraudIndex()
+    index.upsert(frauds)
+    assert index.sync(frauds.iloc[1:]) == 1
+    assert len(index) == 2
+    assert index.search("cataract") == []
+    assert index.exact_matches("hospital 500029") == {"P0002", "P0003"}
+
+
+def test_exact_matches_rank_before_text_similarity(frauds):
+    index = FraudIndex()
+    index.upsert(frauds)
+    assert index.search("why is p0003 flagged", k=1)[0]["PatientID"] == "P0003"
+    assert {c["PatientID"] for c in index.search("upcoding cases", k=5)} == {"P0001", "P0003"}
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from rollups import ALL_STATES, ROLLUP_COLUMNS, build_daily_rollup, to_trend_frame
+
+
+def test_daily_rollup_per_state_and_all():
+    df = pd.DataFrame({
+        "Claim_Submission_Date": ["2026-03-01", "2026-03-01", "2026-03-02", None],
+        "uploaded_at":           [None, None, None, "2026-03-02T10:00:00+00:00"],
+        "State":                 ["Telangana", "Bihar", "Telangana", None],
+        "Fraud_Flag":            [1, 0, 1, 1],
+        "Final_Billed_Amount":   [1000, 500, "250.5", 40],
+    })
+    out = build_daily_rollup(df, "Final_Billed_Amount", uid="u1")
+    assert list(out.columns) == ROLLUP_COLUMNS
+    assert set(out["uid"]) == {"u1"}
+    rows = {(r.day, r.State): (r.claims, r.flagged, r.flagged_amt) for r in out.itertuples()}
+    assert rows[("2026-03-01", ALL_STATES)] == (2, 1, 1000.0)
+    assert rows[("2026-03-02", ALL_STATES)] == (2, 2, 290.5)
+    assert rows[("2026-03-01", "Bihar")]    == (1, 0, 0.0)
+    assert rows[("2026-03-02", "Unknown")]  == (1, 1, 40.0)
+
+
+def test_daily_rollup_without_states_or_costs():
+    df  = pd.DataFrame({"Claim_Submission_Date": ["2026-03-01"] * 3, "State": ["A", "B", "B"], "Fraud_Flag": [1, 1, 0]})
+    out = build_daily_rollup(df, by_state=False)
+    assert out[["State", "claims", "flagged", "flagged_amt"]].values.tolist() == [[ALL_STATES, 3, 2, 0.0]]
+
+
+def test_empty_batch_gives_empty_rollup():
+    assert build_daily_rollup(pd.DataFrame()).empty
+
+
+def test_trend_frame_fills_missing_days():
+    rows = [("2026-03-01", 4, 1, 100.0), ("2026-03-03", 2, 2, 50.0), ("2026-03-03", 1, 0, 0.0)]
+    out  = to_trend_frame(rows, "2026-03-01", "2026-03-04")
+    assert list(out.columns) == ["Date", "Flagged", "Total", "Suspicious"]
+    assert out["Total"].tolist()   == [4, 0, 3, 0]
+    assert out["Flagged"].tolist() == [1, 0, 2, 0]
+    assert to_trend_frame([], "2026-03-01", "2026-03-02")["Total"].tolist() == [0, 0]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from scoring_service import CompiledForest
+
+
+@pytest.mark.parametrize("max_features", [1.0, 0.6])
+def test_compiled_forest_matches_isolation_forest(max_features):
+    rng   = np.random.default_rng(7)
+    train = np.vstack([rng.normal(size=(1800, 5)), rng.normal(6, 1, size=(200, 5))])
+    test  = np.vstack([rng.normal(size=(1800, 5)), rng.uniform(-8, 8, size=(200, 5))])
+    forest = IsolationForest(n_estimators=100, contamination=0.12, max_features=max_features,
+                             random_state=42).fit(train)
+    compiled = CompiledForest(forest)
+    np.testing.assert_allclose(compiled.decision_function(test), forest.decision_function(test), atol=1e-9)
+    assert int((compiled.predict(test) != forest.predict(test)).sum()) == 0
+
+
+def test_compiled_forest_single_row():
+    rng    = np.random.default_rng(0)
+    forest = IsolationForest(n_estimators=20, random_state=0).fit(rng.normal(size=(300, 3)))
+    row    = rng.normal(size=(1, 3))
+    assert CompiledForest(forest).predict(row).tolist() == forest.predict(row).tolist()
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(**kw):
+        if request.param == "memory":
+            return MemorySessionStore(**kw)
+        return SQLiteSessionStore(path=str(tmp_path / "sessions.db"), **kw)
+    return make
+
+
+def test_put_get_delete(make_store):
+    store = make_store(ttl_hours=1, max_entries=10)
+    store.put("a", {"uid": "u1", "email": "a@example.org"})
+    assert store.get("a") == {"uid": "u1", "email": "a@example.org"}
+    assert store.get("missing") is None
+    store.delete("a")
+    assert "a" not in store
+    assert store.metrics()["hits"] == 1
+
+
+def test_expired_sessions_are_misses(make_store):
+    store = make_store(ttl_hours=0.05 / 3600, max_entries=10)
+    store.put("a", {"uid": "u1"})
+    time.sleep(0.1)
+    assert store.get("a") is None
+    assert store.metrics()["expired"] == 1
+
+
+def test_put_evicts_least_recently_used(make_store):
+    store = make_store(ttl_hours=1, max_entries=3, sweep_s=3600)
+    for sid in "abc":
+        store.put(sid, {"uid": sid})
+        time.sleep(0.01)
+    store.get("a")                       # a is now the most recently used
+    time.sleep(0.01)
+    store.put("d", {"uid": "d"})
+    assert len(store) == 3
+    assert store.get("b") is None
+    assert all(store.get(sid) for sid in "acd")
+    assert store.metrics()["evicted"] == 1
+
+
+def test_sweep_drops_expired(make_store):
+    store = make_store(ttl_hours=0.05 / 3600, max_entries=10, sweep_s=3600)
+    store.put("a", {"uid": "u1"})
+    store.put("b", {"uid": "u2"})
+    time.sleep(0.1)
+    assert store.sweep() == 2
+    assert len(store) == 0
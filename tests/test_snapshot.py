@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from snapshot import ResultSnapshot
+
+
+@pytest.fixture
+def snaps(tmp_path):
+    return ResultSnapshot(str(tmp_path / "snap"))
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"PatientID": ["P1", "P2"], "Risk_Score": [0.9, 0.1]})
+
+
+def test_matching_fingerprint_warm_starts(snaps, frame):
+    key = snaps.key("cloud:u1", {"contamination": 0.12})
+    snaps.save(key, "2:2026-03-01:2026-03-02", frame, "Final_Billed_Amount", model={"trees": 3})
+    hit = snaps.load(key, "2:2026-03-01:2026-03-02")
+    assert hit["df"].equals(frame) and hit["cost_col"] == "Final_Billed_Amount"
+    assert snaps.load_model(key) == {"trees": 3}
+
+
+def test_fingerprint_mismatch_is_a_miss_but_latest_survives(snaps, frame):
+    key = snaps.key("cloud:u1", {})
+    snaps.save(key, "2:2026-03-01:2026-03-02", frame)
+    assert snaps.load(key, "2:2026-03-01:2026-03-03") is None      # an edit moved last_update
+    assert snaps.load_latest(key)["df"].equals(frame)              # still usable when the source is down
+
+
+def test_resave_replaces_files_and_keys_differ_by_params(snaps, frame, tmp_path):
+    key = snaps.key("cloud:u1", {"n_estimators": 200})
+    assert key != snaps.key("cloud:u1", {"n_estimators": 100})
+    snaps.save(key, "a", frame)
+    snaps.save(key, "b", frame.head(1))
+    assert len(snaps.load(key, "b")["df"]) == 1
+    assert len(list((tmp_path / "snap").iterdir())) == 2            # manifest + current frame
+    snaps.discard(key)
+    assert snaps.load_latest(key) is None
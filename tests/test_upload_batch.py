@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from upload_batch import dedupe_keys, file_summaries, read_files
+
+
+def _csv(rows):
+    return pd.DataFrame(rows).to_csv(index=False).encode()
+
+
+@pytest.fixture
+def batch():
+    files = [
+        ("claims.csv", _csv({"PatientID": ["P1", "P2"], "Amount": [100, 200]})),
+        ("claims.csv", _csv({"PatientID": ["P2", "P3"], "Amount": [300, 400]})),
+        ("broken.csv", b""),
+    ]
+    return read_files(files, workers=2)
+
+
+def test_read_files_names_and_errors(batch):
+    assert batch.names == ["claims.csv", "claims.csv (2)"]
+    assert list(batch.errors) == ["broken.csv"]
+    assert batch.origin.tolist() == ["claims.csv", "claims.csv", "claims.csv (2)", "claims.csv (2)"]
+    assert dedupe_keys(batch.frame)["PatientID"].tolist() == ["P1", "P2", "P3"]
+
+
+def test_read_files_fails_when_nothing_is_readable():
+    with pytest.raises(ValueError):
+        read_files([("a.csv", b""), ("b.csv", b"")])
+
+
+def test_file_summaries_count_new_skipped_and_flagged(batch):
+    result = batch.frame.assign(Fraud_Flag=[1, 0, 1, 1])
+    out    = file_summaries(batch, result, "Amount", new_keys=["P1", "P2", "P3"])
+    assert out == [
+        {"file": "claims.csv",     "rows": 2, "new": 2, "skipped": 0, "flagged": 1, "suspicious": 100.0},
+        {"file": "claims.csv (2)", "rows": 2, "new": 1, "skipped": 1, "flagged": 2, "suspicious": 700.0},
+    ]
+
+
+def test_file_summaries_without_a_write(batch):
+    result = batch.frame.assign(Fraud_Flag=0)
+    out    = file_summaries(batch, result)
+    assert [(s["new"], s["skipped"], s["suspicious"]) for s in out] == [(0, 0, 0.0), (0, 0, 0.0)]
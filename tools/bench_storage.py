@@ -0,0 +1,78 @@
+"""
+bench_storage.py — Time the dashboard's database I/O paths on the local backend
+──────────────────────────────────────────────────────────────────────────────
+Generates a synthetic claims table of realistic size (resampled from
+ayushman_claims.csv) in a throwaway SQLite file and times each call the
+dashboard makes.
+
+  python tools/bench_storage.py --rows 200000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synth_claims(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    base = pd.read_csv(os.path.join(os.path.dirname(__file__), "..", "ayushman_claims.csv"))
+    rng  = np.random.default_rng(seed)
+    df   = base.iloc[rng.integers(0, len(base), size=n_rows)].reset_index(drop=True)
+    df["PatientID"]     = [f"P{i:08d}" for i in range(n_rows)]
+    df["TransactionID"] = [f"TX{i:08d}" for i in range(n_rows)]
+    df["Fraud_Flag"]    = (rng.random(n_rows) < .12).astype(int)
+    df["Risk_Score"]    = rng.random(n_rows).round(2)
+    df["Fraud_Type"]    = rng.choice(["Ghost Billing", "Up-coding", "Fake Admission",
+                                      "Identity Misuse", "Anomalous Pattern"], size=n_rows)
+    return df
+
+
+def timed(label, fn, *args, **kwargs):
+    t0  = time.perf_counter()
+    out = fn(*args, **kwargs)
+    print(f"  {label:<34} {(time.perf_counter() - t0) * 1000:>10.1f} ms")
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--db", default=None, help="SQLite file (default: temp file, deleted afterwards)")
+    args = ap.parse_args(argv)
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["LOCAL_DB_PATH"] = path
+    import local_db as db
+    db.LOCAL_DB_PATH = path
+
+    uid    = "00000000-0000-0000-0000-000000000bench"
+    claims = synth_claims(args.rows)
+    frauds = claims[claims["Fraud_Flag"] == 1]
+    print(f"📊 {len(claims):,} claims, {len(frauds):,} flagged → {path}")
+
+    timed("insert_new_rows_only (fresh)",    db.insert_new_rows_only, claims, user_id=uid)
+    timed("insert_new_rows_only (all dups)", db.insert_new_rows_only, claims, user_id=uid)
+    timed("save_fraud_results (upsert)",     db.save_fraud_results_to_supabase, claims, user_id=uid)
+    timed("upsert_detected_frauds",          db.upsert_detected_frauds, frauds, user_id=uid)
+    timed("fetch_data_from_supabase",        db.fetch_data_from_supabase, user_id=uid)
+    timed("fetch_detected_frauds",           db.fetch_detected_frauds, user_id=uid)
+    timed("get_db_stats",                    db.get_db_stats, user_id=uid)
+    timed("update_claim_status",             db.update_claim_status, frauds["PatientID"].iloc[0], "Closed", uid)
+    for i in range(20):
+        db.log_upload_session(uid, f"file_{i}.csv", 100, 90, 10, 12, 1000.0)
+    timed("fetch_audit_log",                 db.fetch_audit_log, uid, 20)
+    timed("get_upload_history",              db.get_upload_history, uid, 10)
+
+    if not args.db:
+        os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+fake_openai.py — Local OpenAI-compatible chat endpoint for load / retry testing
+──────────────────────────────────────────────────────────────────────────────
+Serves POST /v1/chat/completions with a canned one-sentence answer after a
+configurable delay, and answers a fraction of requests with HTTP 429 so the
+retry path gets exercised.
+
+  python tools/fake_openai.py --port 8089 --latency 0.4 --error-rate 0.1
+  OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=test python main.py
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATS = {"requests": 0, "throttled": 0, "in_flight": 0, "max_in_flight": 0}
+_lock = threading.Lock()
+
+
+def make_handler(latency: float, error_rate: float, stream_chunks: int):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code: int, body: dict, headers: dict = None) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with _lock:
+                STATS["requests"] += 1
+                STATS["in_flight"] += 1
+                STATS["max_in_flight"] = max(STATS["max_in_flight"], STATS["in_flight"])
+            try:
+                if random.random() < error_rate:
+                    with _lock:
+                        STATS["throttled"] += 1
+                    return self._json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                      {"retry-after": "0.2"})
+                time.sleep(latency * random.uniform(0.5, 1.5))
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+                text   = f"Billed amount is far above the package rate for this diagnosis ({len(prompt)} chars reviewed)."
+                if body.get("stream"):
+                    return self._stream(body, text)
+                self._json(200, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20,
+                              "total_tokens": len(prompt) // 4 + 20},
+                })
+            finally:
+                with _lock:
+                    STATS["in_flight"] -= 1
+
+        def _stream(self, body: dict, text: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            words = text.split(" ")
+            size  = max(1, len(words) // stream_chunks)
+            for i in range(0, len(words), size):
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": body.get("model", "fake"),
+                         "choices": [{"index": 0, "delta": {"content": " ".join(words[i:i + size]) + " "},
+                                      "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(latency / stream_chunks)
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency", type=float, default=0.3, help="mean seconds per completion")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    ap.add_argument("--stream-chunks", type=int, default=8)
+    args = ap.parse_args(argv)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(args.latency, args.error_rate, args.stream_chunks))
+    print(f"🧪 Fake OpenAI endpoint on http://127.0.0.1:{args.port}/v1  (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"📊 {STATS}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
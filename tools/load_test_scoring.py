@@ -0,0 +1,119 @@
+"""
+load_test_scoring.py — Throughput and latency of the real-time scoring service
+──────────────────────────────────────────────────────────────────────────────
+Replays claims from a CSV against POST /score from N concurrent clients
+(one keep-alive connection each) for a fixed duration, then prints
+requests/s, claims/s and client-side p50 / p95 / p99 latency next to the
+server's own numbers from GET /metrics.
+
+  python scoring_service.py --port 8095 &
+  python tools/load_test_scoring.py --url http://127.0.0.1:8095 --clients 8 --seconds 20
+  python tools/load_test_scoring.py --batch 25          # 25 claims per request
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+
+import pandas as pd
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))] if sorted_values else 0.0
+
+
+def load_claims(path: str) -> list:
+    df = pd.read_csv(path)
+    return json.loads(df.to_json(orient="records"))
+
+
+def client(url, payloads: list, deadline: float, offset: int, latencies: list, errors: list, lock) -> None:
+    u    = urlparse(url)
+    conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=10)
+    mine, i = [], offset
+    while time.perf_counter() < deadline:
+        body = payloads[i % len(payloads)]
+        i   += 1
+        t0   = time.perf_counter()
+        try:
+            conn.request("POST", "/score", body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+            mine.append(time.perf_counter() - t0)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=10)
+    conn.close()
+    with lock:
+        latencies.extend(mine)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://127.0.0.1:8095")
+    ap.add_argument("--data", default="ayushman_claims.csv", help="claims to replay")
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=15)
+    ap.add_argument("--batch", type=int, default=1, help="claims per request")
+    ap.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = ap.parse_args(argv)
+
+    claims   = load_claims(args.data)
+    payloads = [json.dumps(claims[i] if args.batch == 1 else {"claims": claims[i:i + args.batch]}).encode()
+                for i in range(0, len(claims), args.batch)]
+
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    t0       = time.perf_counter()
+    threads  = [threading.Thread(target=client, args=(args.url, payloads, deadline, k * 7, latencies, errors, lock))
+                for k in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    u    = urlparse(args.url)
+    conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=10)
+    conn.request("GET", "/metrics")
+    server = json.loads(conn.getresponse().read())
+
+    lat    = sorted(latencies)
+    result = {
+        "clients":      args.clients,
+        "batch":        args.batch,
+        "seconds":      round(wall, 1),
+        "requests":     len(lat),
+        "errors":       len(errors),
+        "requests_s":   round(len(lat) / wall, 1),
+        "claims_s":     round(len(lat) * args.batch / wall, 1),
+        "client_ms":    {f"p{int(q * 100)}": round(percentile(lat, q) * 1000, 2) for q in (.5, .95, .99)},
+        "server":       next((r for r in server.get("latency", []) if r["region"] == "score"), None),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"⚡ {result['requests']:,} requests in {result['seconds']}s from {args.clients} clients "
+              f"(batch {args.batch}, {result['errors']} errors)")
+        print(f"   throughput   {result['requests_s']:,} req/s · {result['claims_s']:,} claims/s")
+        print(f"   client       p50 {result['client_ms']['p50']} ms · p95 {result['client_ms']['p95']} ms · "
+              f"p99 {result['client_ms']['p99']} ms")
+        if result["server"]:
+            s = result["server"]
+            print(f"   server       p50 {s['p50_ms']} ms · p95 {s['p95_ms']} ms · p99 {s['p99_ms']} ms "
+                  f"(scoring only, last {s['runs']:,} requests)")
+        if errors:
+            print(f"   first error  {errors[0]}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
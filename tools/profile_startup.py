@@ -0,0 +1,84 @@
+"""
+profile_startup.py — Cold-start profile of the Streamlit app
+─────────────────────────────────────────────────────────────
+Starts a fresh interpreter per run (so nothing is already imported or
+cached), renders the first page a new visitor sees (Account / login) with
+Streamlit's AppTest, and reports:
+
+  • time to first paint  — the first app.py run, imports included
+  • heavy modules        — which of sklearn / openai / pyarrow / supabase / fpdf
+                           that run had to import
+  • slowest imports      — top entries of `python -X importtime` for the run
+
+  python tools/profile_startup.py --runs 3
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("sklearn", "openai", "pyarrow", "supabase", "fpdf")
+
+# Runs in the child: streamlit's own import is paid up front and reported
+# separately — it is the same for every version of app.py.
+CHILD = r"""
+import os, sys, time, json
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_st = time.perf_counter() - t0
+os.chdir(ROOT); sys.path.insert(0, ROOT)
+at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+t1 = time.perf_counter()
+at.run()
+paint = time.perf_counter() - t1
+print("@@" + json.dumps({"paint_s": paint, "streamlit_s": t_st, "errors": [str(e.value) for e in at.exception],
+                         "heavy": [m for m in HEAVY if m in sys.modules]}))
+"""
+
+
+def run_once(env: dict) -> tuple:
+    code = f"ROOT = {ROOT!r}\nHEAVY = {HEAVY!r}\n" + CHILD
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                       capture_output=True, text=True, timeout=300)
+    line = next((l for l in p.stdout.splitlines() if l.startswith("@@")), None)
+    if line is None:
+        raise RuntimeError(p.stderr[-2000:])
+    imports = []
+    for l in p.stderr.splitlines():
+        if l.startswith("import time:") and "|" in l:
+            _, cum, name = l.split("|", 2)
+            if cum.strip().isdigit() and not name.startswith("  "):        # top-level imports only
+                imports.append((int(cum) / 1e6, name.strip()))
+    return json.loads(line[2:]), sorted(imports, reverse=True)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=8, help="slowest top-level imports to list")
+    args = ap.parse_args(argv)
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    paints, result, imports = [], None, []
+    for i in range(args.runs):
+        result, imports = run_once(env)
+        paints.append(result["paint_s"])
+        print(f"run {i + 1}: first paint {result['paint_s']:.2f}s")
+
+    print(f"\nstreamlit import (not counted)   {result['streamlit_s']:.2f}s")
+    print(f"time to first paint, median      {statistics.median(paints):.2f}s  (min {min(paints):.2f}s)")
+    print(f"heavy modules loaded             {', '.join(result['heavy']) or 'none'}")
+    if result["errors"]:
+        print(f"app errors                       {result['errors']}")
+    print("\nslowest top-level imports (cumulative):")
+    for secs, name in imports[:args.top]:
+        print(f"  {secs:6.2f}s  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
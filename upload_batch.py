@@ -0,0 +1,103 @@
+"""
+upload_batch.py — Several claim CSVs, parsed concurrently, scored as one batch
+──────────────────────────────────────────────────────────────────────────────
+District offices send many files a day.  read_files() parses them on a small
+thread pool and concatenates them (remembering which file every row came
+from), so the pipeline scores them in a single pass and storage is written
+once; file_summaries() then splits the outcome back per file for the
+upload_sessions log.
+
+  batch = read_files([("north.csv", b"..."), ("south.csv", b"...")])
+  batch.frame    → all rows, index 0..n-1
+  batch.origin   → file name per row (same index)
+  batch.errors   → {file name: parse error} for files that were skipped
+  file_summaries(batch, result_df, cost_col, new_keys)
+    → [{"file", "rows", "new", "skipped", "flagged", "suspicious"}, ...]
+"""
+
+import io
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+UPLOAD_PARSE_WORKERS = int(os.getenv("UPLOAD_PARSE_WORKERS", "4"))
+KEY_COL              = "PatientID"
+
+Batch = namedtuple("Batch", "frame origin names errors")
+
+
+def _unique_names(names: list) -> list:
+    """Two uploads called claims.csv become "claims.csv" and "claims.csv (2)"."""
+    seen, out = {}, []
+    for n in names:
+        seen[n] = seen.get(n, 0) + 1
+        out.append(n if seen[n] == 1 else f"{n} ({seen[n]})")
+    return out
+
+
+def _parse(data: bytes):
+    try:
+        return pd.read_csv(io.BytesIO(data)), None
+    except Exception as e:
+        return None, str(e)[:200]
+
+
+def read_files(files: list, workers: int = UPLOAD_PARSE_WORKERS) -> Batch:
+    """files: [(name, bytes)].  Unreadable or empty files are reported, not fatal,
+    unless none of them can be read."""
+    names = _unique_names([name for name, _ in files])
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+        parsed = list(pool.map(_parse, [data for _, data in files]))
+
+    frames, origin, errors = [], [], {}
+    for name, (df, err) in zip(names, parsed):
+        if err is None and df.empty:
+            err = "no rows"
+        if err is not None:
+            errors[name] = err
+            print(f"[Upload] skipped {name}: {err}")
+            continue
+        frames.append(df)
+        origin.append(pd.Series(name, index=df.index))
+    if not frames:
+        raise ValueError("None of the uploaded files could be read: " +
+                         "; ".join(f"{n}: {e}" for n, e in errors.items()))
+    frame = pd.concat(frames, ignore_index=True, sort=False)
+    return Batch(frame, pd.concat(origin, ignore_index=True), [n for n in names if n not in errors], errors)
+
+
+def dedupe_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per PatientID (first file wins) — a batch insert / upsert may not
+    touch the same primary key twice."""
+    return df.drop_duplicates(KEY_COL, keep="first") if KEY_COL in df.columns else df
+
+
+def file_summaries(batch: Batch, result_df: pd.DataFrame, cost_col: str = None,
+                   new_keys=None) -> list:
+    """Per-file counts; `new_keys` are the PatientIDs storage actually inserted
+    (None when nothing was written)."""
+    origin  = batch.origin.reindex(result_df.index)
+    flagged = result_df["Fraud_Flag"] == 1
+    amount  = (pd.to_numeric(result_df[cost_col], errors="coerce").fillna(0)
+               if cost_col else pd.Series(0.0, index=result_df.index))
+    is_new  = pd.Series(False, index=result_df.index)
+    if new_keys is not None and KEY_COL in result_df.columns:
+        first  = ~result_df[KEY_COL].duplicated(keep="first")
+        is_new = first & result_df[KEY_COL].astype(str).isin(set(map(str, new_keys)))
+
+    out = []
+    for name in batch.names:
+        mine = origin == name
+        rows = int(mine.sum())
+        new  = int((mine & is_new).sum())
+        out.append({
+            "file":       name,
+            "rows":       rows,
+            "new":        new,
+            "skipped":    rows - new if new_keys is not None else 0,
+            "flagged":    int((mine & flagged).sum()),
+            "suspicious": float(amount[mine & flagged].sum()),
+        })
+    return out